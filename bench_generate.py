@@ -0,0 +1,301 @@
+import argparse
+import contextlib
+import glob
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import threading
+import tracemalloc
+from collections import Counter
+from time import perf_counter
+from urllib.parse import urlsplit
+
+import fake_powerpoint
+import tracing
+from fake_powerpoint import FakeApplication
+from export_assets import INDEX_SUFFIX
+from font_registry import set_font_provider, fixture_fonts
+from image_cache import ImageCache
+from lrc_parser import parse_lrc, MULTIPLE_SINGER_SPLITTER, SINGER_LYRIC_SPLITTER_RE
+from output_shards import ShardWriter, estimate_song_bytes
+from renderer import COVER_MODES, TemplateSnapshot
+from renderer_com import ComRenderer
+from setlist import song_record
+
+# 生成速度的基准测试：不访问网络、不需要 PowerPoint，可在 Linux 上重复运行
+# 接口响应用 public/assets/*.json 中（从网易云获取的）歌词合成，按 URL 回放；渲染用 fake_powerpoint 的内存对象模型，统计 COM 调用数
+# 用法：python bench_generate.py [--rows 10 100 1000] [--animation linear] [--static] [--json result.json]
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main-2ppt-w-timing.py')
+FONT_NAME = '宋体'
+COLORS = {
+    '封面字体颜色': 0xFFFFFF,
+    '合唱歌词颜色': 0x00FFFF,
+    '歌手1歌词颜色': 0xFFFFFF,
+    '歌手2歌词颜色': 0xFFCC00,
+    '歌手3歌词颜色': 0x00CCFF,
+    '歌手4歌词颜色': 0xCC00FF,
+}
+
+
+def load_main():
+    # 主程序文件名带连字符，不能直接 import
+    spec = importlib.util.spec_from_file_location('main_2ppt_w_timing', MAIN_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def singer_count(lrc):
+    # 主程序能渲染的歌词返回歌手数，否则返回 None（如歌词中有“曲：改编词 : 林振强”这种多个冒号的行）
+    lines, singers = parse_lrc(lrc)
+    for line in lines:
+        for word in line.text.split(MULTIPLE_SINGER_SPLITTER):
+            if len(SINGER_LYRIC_SPLITTER_RE.split(word)) != 2:
+                return None
+
+    return max(1, len(singers)) if len(singers) <= 4 else None
+
+
+def load_corpus(pattern):
+    corpus = []
+    for path in sorted(glob.glob(pattern)):
+        if path.endswith(INDEX_SUFFIX):
+            # export_assets.py 生成的热字索引
+            continue
+
+        with open(path, encoding='utf-8') as f:
+            for song in json.load(f):
+                lrc = song.get('lyrics', {}).get('lrc')
+                count = singer_count(lrc) if lrc else None
+                if count is not None:
+                    corpus.append(dict(song, singer_count=count))
+
+    return corpus
+
+
+def cover_bytes():
+    try:
+        from PIL import Image
+    except ImportError:
+        # 没有 Pillow 时不会解码封面，内容无所谓
+        return b'\xff\xd8\xff\xe0fake-cover\xff\xd9'
+
+    output = io.BytesIO()
+    Image.new('RGB', (700, 700), (200, 80, 80)).save(output, 'JPEG', quality=90)
+    return output.getvalue()
+
+
+class FixtureResponse:
+    def __init__(self, content):
+        self.content = content
+        self.status_code = 200
+
+
+class FixtureClient:
+    # 替换主程序的 http_client，按接口路径和参数回放合成的响应
+    def __init__(self):
+        self.kuwo_search = {}
+        self.kuwo_lyrics = {}
+        self.netease_search = {}
+        self.netease_lyrics = {}
+        self.cover = cover_bytes()
+        # 各接口的请求数，取数据的线程会并发请求
+        self.requests = Counter()
+        self.lock = threading.Lock()
+
+    def add_song(self, i, name, artist, lrc):
+        kuwo_ids = [f'{i}{k}' for k in range(5)]
+        self.kuwo_search[f'{name} {artist}'] = {
+            'abslist': [
+                {
+                    'DC_TARGETID': kuwo_id,
+                    'FARTIST': artist,
+                    'SONGNAME': name,
+                    # 只有第一个候选有 MV，评分最高
+                    'MVFLAG': '1' if k == 0 else '0',
+                    'web_albumpic_short': f'120/{kuwo_id}.jpg',
+                }
+                for k, kuwo_id in enumerate(kuwo_ids)
+            ]
+        }
+        lrclist = [{'lineLyric': f'{name} - {artist}'}, {'lineLyric': '作词：林夕'}, {'lineLyric': '作曲：陈辉阳'}]
+        lrclist.extend({'lineLyric': line.split(']')[-1]} for line in lrc.split('\n') if line)
+        for kuwo_id in kuwo_ids:
+            self.kuwo_lyrics[kuwo_id] = {'data': {'lrclist': lrclist}}
+
+        netease_id = str(1000000 + i)
+        self.netease_search[f'{artist} "{name}"'] = {
+            'result': {'songs': [{'id': netease_id, 'name': name, 'artists': [{'name': artist}]}]},
+            'code': 200,
+        }
+        self.netease_lyrics[netease_id] = {'lyric': lrc, 'code': 200}
+
+    def get(self, url, params=None, timeout=None):
+        params = params or {}
+        path = urlsplit(url).path
+        key = '/star/albumcover/' if path.startswith('/star/albumcover/') else path
+        with self.lock:
+            self.requests[key] += 1
+
+        if key == '/star/albumcover/':
+            return FixtureResponse(self.cover)
+
+        if path == '/search/searchMusicBykeyWord':
+            body = self.kuwo_search[params['all']]
+        elif path == '/openapi/v1/www/lyric/getlyric':
+            body = self.kuwo_lyrics[params['musicId']]
+        elif path == '/api/search/get/web':
+            body = self.netease_search[params['s']]
+        elif path == '/api/song/media':
+            body = self.netease_lyrics[str(params['id'])]
+        else:
+            raise KeyError(f'没有回放数据：{url}')
+
+        return FixtureResponse(json.dumps(body, ensure_ascii=False).encode('utf-8'))
+
+
+def build_setlist(corpus, rows, client):
+    # 语料循环使用，重复的歌加上序号，保证每行都是不同的歌
+    setlist = []
+    for i in range(rows):
+        song = corpus[i % len(corpus)]
+        name = song['name'] if i < len(corpus) else f"{song['name']} {i // len(corpus) + 1}"
+        artist = song['artist']
+        client.add_song(i, name, artist, song['lyrics']['lrc'])
+        setlist.append(song_record({'歌曲': name, '歌手': artist, '歌手数量': song['singer_count']}, dict(COLORS), i + 2))
+
+    return setlist
+
+
+@contextlib.contextmanager
+def phase(results, name, songs, memory):
+    # 记录一个阶段的耗时、COM 调用数和内存峰值
+    calls_before = fake_powerpoint.total_calls()
+    if memory:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+
+    start = perf_counter()
+    yield
+    seconds = perf_counter() - start
+    com_calls = fake_powerpoint.total_calls() - calls_before
+    results[name] = {
+        'seconds': seconds,
+        'ms_per_song': seconds * 1000 / songs,
+        'com_calls': com_calls,
+        'calls_per_song': com_calls / songs,
+        'peak_mb': (tracemalloc.get_traced_memory()[1] - base) / 1024 / 1024 if memory else None,
+    }
+
+
+def run(main, corpus, rows, args, work_dir):
+    client = FixtureClient()
+    setlist = build_setlist(corpus, rows, client)
+    main.http_client = client
+    main.response_cache = None
+    main.song_catalog = None
+    main.image_cache = ImageCache(os.path.join(work_dir, 'image_cache'))
+    main.IS_DYNAMIC_LYRIC = not args.static
+    main.IS_COVER_ONLY = False
+    main.IS_TRADITIONAL = args.traditional
+    main.PADDING_TOP = 0 if main.IS_DYNAMIC_LYRIC else 4
+    main.ANIMATION = args.animation
+    main.COVER_MODE = args.cover_mode
+    main.renderer = renderer = ComRenderer(app=FakeApplication())
+    tracing.add_counter('effects', lambda: renderer.effect_count)
+    fake_powerpoint.reset_calls()
+
+    results = {}
+    # 主程序会打印每首歌的歌词，基准测试时不输出
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        with phase(results, 'resolve', rows, args.memory):
+            songs = list(main.prefetch_songs(enumerate(setlist), args.jobs))
+
+        if main.IS_DYNAMIC_LYRIC:
+            # 分片时每片满了就保存，保存的耗时算在 render 中
+            shards = ShardWriter(renderer, 'template.pptx', work_dir, 'out', args.shard_songs)
+            main.template = TemplateSnapshot(renderer, shards.open())
+            with phase(results, 'render', rows, args.memory):
+                for song in songs:
+                    effects = renderer.effect_count
+                    deck = shards.open()
+                    first = renderer.slide_count(deck) - 1
+                    shards.deck = deck = main.generate_ppt(deck, song)
+                    slides = [first, renderer.slide_count(deck) - 2]
+                    shards.add(song['row_idx'] + 2, song['song_name'], slides,
+                               estimate_song_bytes(song, renderer.effect_count - effects))
+
+            with phase(results, 'save', rows, args.memory):
+                shards.close()
+        else:
+            template = renderer.open('template.pptx')
+            main.template = TemplateSnapshot(renderer, template)
+            with phase(results, 'render+save', rows, args.memory):
+                for i, song in enumerate(songs):
+                    new_file = os.path.join(work_dir, f'{i}.pptx')
+                    new_ppt = renderer.copy(template, new_file)
+                    new_ppt = main.generate_ppt(new_ppt, song)
+                    renderer.save(new_ppt, new_file)
+
+    return {
+        'rows': rows,
+        'lines': sum(len(song['lyrics']) for song in songs),
+        'effects': renderer.effect_count,
+        'keyframes': renderer.keyframe_count,
+        'requests': dict(client.requests),
+        'phases': results,
+        'top_calls': fake_powerpoint.calls.most_common(args.top),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='PPT 生成基准测试')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 100, 1000], help='合成歌单的行数')
+    parser.add_argument('--assets', default='public/assets/*.json', help='歌词语料')
+    parser.add_argument('--animation', choices=['legacy', 'linear'], default='legacy', help='动态歌词动画方式')
+    parser.add_argument('--cover-mode', choices=COVER_MODES, default='rebuild', help='动态歌词封面页的生成方式')
+    parser.add_argument('--static', action='store_true', help='静态歌词模式（每首歌一个文件）')
+    parser.add_argument('--traditional', action='store_true', help='歌词转换为繁体')
+    parser.add_argument('--shard-songs', type=int, default=0, help='动态歌词每个输出文件最多包含的歌曲数，0 为不分片')
+    parser.add_argument('--jobs', type=int, default=8, help='并发获取歌曲数据的线程数')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='不统计内存峰值（tracemalloc 会拖慢运行）')
+    parser.add_argument('--top', type=int, default=8, help='列出调用最多的 COM 属性/方法数')
+    parser.add_argument('--json', help='把结果写入 JSON 文件，便于比较')
+    parser.add_argument('--trace-chrome', metavar='PATH', help='把各歌各阶段的计时写成 Chrome trace_event 文件')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    corpus = load_corpus(args.assets)
+    if not corpus:
+        raise SystemExit(f'没有找到歌词：{args.assets}')
+
+    set_font_provider(fixture_fonts([FONT_NAME]))
+    tracing.configure(chrome_path=args.trace_chrome)
+    tracing.add_counter('com_calls', fake_powerpoint.total_calls)
+    main = load_main()
+    if args.memory:
+        tracemalloc.start()
+
+    reports = []
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as work_dir:
+            report = run(main, corpus, rows, args, work_dir)
+
+        reports.append(report)
+        print(f'{rows} 行，{report["lines"]} 句歌词，动画效果 {report["effects"]} 个，关键帧 {report["keyframes"]} 个，请求 {report["requests"]}')
+        for name, r in report['phases'].items():
+            peak = f'，内存峰值 {r["peak_mb"]:.1f}MB' if r['peak_mb'] is not None else ''
+            print(f'  {name}：{r["seconds"]:.3f}s（每首 {r["ms_per_song"]:.2f}ms），'
+                  f'COM 调用 {r["com_calls"]} 次（每首 {r["calls_per_song"]:.0f} 次）{peak}')
+        print('  调用最多：' + '，'.join(f'{name} {count}' for name, count in report['top_calls']))
+
+    if args.trace_chrome:
+        tracing.write()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,96 @@
+import argparse
+import glob
+import json
+import os
+import tempfile
+from time import perf_counter
+
+from export_assets import INDEX_SUFFIX
+from lrc_parser import normalize_lrc, expand_lyrics, parse_lyrics
+from lyrics_corpus import CorpusWriter, LyricsCorpus
+
+# LRC 解析的微基准：用 public/assets/*.json 里的歌词反复解析，不需要网络和 PowerPoint
+# 用法：python bench_lrc_parser.py [--repeat 200] [--assets "public/assets/*.json"]
+
+
+def load_corpus(pattern):
+    corpus = []
+    for path in sorted(glob.glob(pattern)):
+        if path.endswith(INDEX_SUFFIX):
+            # export_assets.py 生成的热字索引
+            continue
+
+        with open(path, encoding='utf-8') as f:
+            for song in json.load(f):
+                lrc = song.get('lyrics', {}).get('lrc')
+                if lrc:
+                    corpus.append((os.path.basename(path), song['name'], lrc))
+
+    return corpus
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='LRC 解析基准')
+    parser.add_argument('--assets', default='public/assets/*.json', help='歌词 JSON 文件的 glob')
+    parser.add_argument('--repeat', type=int, default=200, help='整个语料重复解析的次数')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    corpus = load_corpus(args.assets)
+    if not corpus:
+        raise SystemExit(f'没有找到歌词：{args.assets}')
+
+    # 先完整解析一遍，确认每首都能解析
+    line_count = 0
+    for file_name, song_name, lrc in corpus:
+        try:
+            lines, _ = parse_lyrics(expand_lyrics(normalize_lrc(lrc)))
+        except Exception as e:
+            raise SystemExit(f'{file_name} 《{song_name}》解析出错：{e!r}')
+
+        line_count += len(lines)
+
+    expanded = [expand_lyrics(normalize_lrc(lrc)) for _, _, lrc in corpus]
+    timings = {}
+    start = perf_counter()
+    for _ in range(args.repeat):
+        for _, _, lrc in corpus:
+            normalize_lrc(lrc)
+    timings['normalize_lrc'] = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(args.repeat):
+        for _, _, lrc in corpus:
+            expand_lyrics(normalize_lrc(lrc))
+    timings['normalize_lrc + expand_lyrics'] = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(args.repeat):
+        for lyrics in expanded:
+            parse_lyrics(lyrics)
+    timings['parse_lyrics'] = perf_counter() - start
+
+    # 从列式歌词库读出同样的 LyricLine，与每次重新解析 LRC 对比
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_path = os.path.join(tmp_dir, 'corpus.lyc')
+        writer = CorpusWriter(corpus_path)
+        for (file_name, song_name, _), lyrics in zip(corpus, expanded):
+            writer.add(song_name, os.path.splitext(file_name)[0], '', *parse_lyrics(lyrics))
+        writer.close()
+
+        start = perf_counter()
+        for _ in range(args.repeat):
+            lyrics_corpus = LyricsCorpus(corpus_path)
+            for i in range(len(lyrics_corpus)):
+                lyrics_corpus.lines(i)
+            lyrics_corpus.close()
+        timings['LyricsCorpus.lines'] = perf_counter() - start
+
+    songs = len(corpus) * args.repeat
+    lines = line_count * args.repeat
+    print(f'{len(corpus)} 首歌，{line_count} 行歌词，重复 {args.repeat} 次')
+    for name, seconds in timings.items():
+        print(f'{name}：{seconds:.3f}s，{songs / seconds:.0f} 首/s，{lines / seconds:.0f} 行/s，'
+              f'每首 {seconds / songs * 1000:.3f}ms')
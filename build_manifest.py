@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+
+# 增量生成的清单：记录每行的设置哈希、选中的歌曲 ID、歌词哈希，以及模板和全局设置的哈希
+# 下次生成时，哈希没变的行直接复用上次的输出（静态歌词的文件，或动态歌词文件中的幻灯片）
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 2
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_json(*values):
+    # 数字、NaN 等不能直接序列化的值（如 numpy 类型）按字符串处理
+    raw = json.dumps(values, ensure_ascii=False, sort_keys=True, default=str)
+    return hash_bytes(raw.encode('utf-8'))
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def lyrics_hash(lines, singers):
+    return hash_json([[line.sec, line.singer, line.text, line.trimmed] for line in lines], singers)
+
+
+class BuildManifest:
+    def __init__(self, directory, build_hash, full=False):
+        # build_hash 为模板、全局设置、渲染方式的哈希，变了就全部重新生成；full 为真时也全部重新生成
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self.build_hash = build_hash
+        self.rows = []
+        self.previous = {}
+        if full or not os.path.exists(self.path):
+            return
+
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+
+        if data.get('version') != MANIFEST_VERSION or data.get('build_hash') != build_hash:
+            return
+
+        self.previous = {row['hash']: row for row in data['rows']}
+
+    def find(self, row_hash):
+        # 上次生成过同样输入的行，返回它的记录
+        return self.previous.get(row_hash)
+
+    def find_slides(self, row_hash):
+        # 动态歌词：返回上次输出的 (文件路径, 第一张, 最后一张)，幻灯片从 1 开始；分片输出时每行记录各自所在的文件
+        row = self.find(row_hash)
+        if row is None or 'slides' not in row or not row.get('output'):
+            return None
+
+        path = os.path.join(self.directory, row['output'])
+        if not os.path.exists(path):
+            return None
+
+        return (path, *row['slides'])
+
+    def find_file(self, row_hash, file_name):
+        # 静态歌词：同名文件还在，而且输入没变
+        row = self.find(row_hash)
+        if row is None or row.get('file') != file_name:
+            return False
+
+        return os.path.exists(os.path.join(self.directory, file_name))
+
+    def add(self, row):
+        self.rows.append(row)
+
+    def save(self):
+        data = {
+            'version': MANIFEST_VERSION,
+            'build_hash': self.build_hash,
+            'rows': sorted(self.rows, key=lambda row: row['row']),
+        }
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,218 @@
+import argparse
+import glob
+import importlib.util
+import json
+import os
+
+from lrc_parser import TIME_LYRIC_SPLITTER
+from lyrics_corpus import build_from_assets
+from response_cache import ResponseCache, DEFAULT_TTL, DEFAULT_MAX_BYTES
+from setlist import iter_setlist
+from song_catalog import SongCatalog
+
+# 热字切歌（Game.vue）的资源导出：用 PPT 生成的取歌词流程（网易云搜索、get_dynamic_lyrics 的清理、角色过滤和括号统一）
+# 生成 public/assets/<歌手>.json，格式与 lyrics-scraper.js 相同；另外生成热字的倒排索引 <歌手>.index.json，
+# 游戏按热字查一次索引就能选出可玩的歌词行，不用在 Web Worker 中扫描所有歌词。索引是构建产物，不进版本库，
+# npm run dev / build 前会自动用 --index-only 重建；压缩交给静态服务器
+# 用法：python export_assets.py 歌单.xlsx [--out-dir public/assets]；python export_assets.py --index-only 只重建索引
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main-2ppt-w-timing.py')
+DEFAULT_OUT_DIR = os.path.join('public', 'assets')
+INDEX_SUFFIX = '.index.json'
+INDEX_VERSION = 1
+# 与 lyrics-scraper.js 一致，游戏里显示的歌词用全角空格
+FULL_WIDTH_SPACE = '　'
+# 不进索引的字符
+SKIP_CHARS = {' ', FULL_WIDTH_SPACE, '\t'}
+
+
+def load_main():
+    # 主程序文件名带连字符，不能直接 import
+    spec = importlib.util.spec_from_file_location('main_2ppt_w_timing', MAIN_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parsed_lyrics(lyrics):
+    # lyrics 为 expand_lyrics 的结果（“[时间]歌词”，已按时间排序），去掉时间戳，空格转为全角，跳过空行
+    result = []
+    for lyric in lyrics:
+        text = lyric.split(TIME_LYRIC_SPLITTER, 1)[-1].strip().replace(' ', FULL_WIDTH_SPACE)
+        if text:
+            result.append(text)
+
+    return result
+
+
+def song_asset(order, song_name, artist_name, netease_id, lyrics):
+    # 与 lyrics-scraper.js 输出的一首歌相同；没取到歌词时 lyrics 为 None，parsedLyrics 为空
+    return {
+        'order': str(order),
+        'name': song_name,
+        'artist': artist_name,
+        'id': int(netease_id) if netease_id else None,
+        'lyrics': {'lrc': '\n'.join(lyrics)} if lyrics else None,
+        'parsedLyrics': parsed_lyrics(lyrics) if lyrics else [],
+    }
+
+
+def js_offsets(line):
+    # 游戏里用 JS 的 indexOf，下标按 UTF-16 编码单元计算，BMP 以外的字符占两个
+    offsets = []
+    offset = 0
+    for char in line:
+        offsets.append(offset)
+        offset += 2 if char > '\uffff' else 1
+
+    return offsets
+
+
+def build_index(artist_name, songs):
+    # 字 -> [歌曲下标, 行下标, 字在行中第一次出现的位置, ...] 的扁平数组，按歌曲、行的顺序排列
+    # 下标对应 <歌手>.json 中的歌曲和 parsedLyrics，位置与 line.indexOf(热字) 相同
+    chars = {}
+    for song_idx, song in enumerate(songs):
+        for line_idx, line in enumerate(song.get('parsedLyrics') or []):
+            offsets = js_offsets(line)
+            seen = set()
+            for i, char in enumerate(line):
+                if char in seen or char in SKIP_CHARS:
+                    continue
+
+                seen.add(char)
+                chars.setdefault(char, []).extend((song_idx, line_idx, offsets[i]))
+
+    return {
+        'version': INDEX_VERSION,
+        'artist': artist_name,
+        'songs': [song.get('name') for song in songs],
+        'chars': chars,
+    }
+
+
+def write_asset(path, data, indent=None):
+    # 先写临时文件再替换，开发服务器不会读到写了一半的文件；返回写入的文件路径
+    separators = None if indent else (',', ':')
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent, separators=separators)
+
+    os.replace(tmp_path, path)
+    return path
+
+
+def export_artist(out_dir, artist_name, songs):
+    # 歌曲资源保持 lyrics-scraper.js 的缩进格式，索引只给程序读，写成紧凑格式
+    return [
+        write_asset(os.path.join(out_dir, f'{artist_name}.json'), songs, indent=2),
+        write_asset(os.path.join(out_dir, f'{artist_name}{INDEX_SUFFIX}'), build_index(artist_name, songs)),
+    ]
+
+
+def fetch_lyrics(main, row, row_idx):
+    # 只取网易云歌词，不搜索酷我、不下载封面；歌曲 ID 优先用歌单指定的，其次是歌曲目录
+    song_name = row['歌曲']
+    artist_name = row['歌手']
+    change_lyrics = row['要修改的歌词'].split('\n') if row['要修改的歌词'] else []
+    changed_lyrics = row['修改后歌词'].split('\n') if row['修改后歌词'] else []
+    entry = main.song_catalog.get(song_name, artist_name) if main.song_catalog is not None else None
+    netease_id = row['指定网易云歌曲ID'] or (entry or {}).get('netease_id')
+    try:
+        if not netease_id:
+            netease_id = main.search_163_id(artist_name, song_name)
+
+        lyrics = main.get_dynamic_lyrics(artist_name, song_name, change_lyrics, changed_lyrics, netease_id)
+    except Exception as e:
+        # 出错的歌与 lyrics-scraper.js 一样保留在列表中，歌词为空，游戏会跳过
+        print(f'第{row_idx + 2}行《{song_name}》获取歌词失败：{e!r}')
+        return {'row_idx': row_idx, 'song_name': song_name, 'artist_name': artist_name, 'netease_id': netease_id, 'lyrics': None}
+
+    if main.song_catalog is not None:
+        main.song_catalog.update(song_name, artist_name, netease_id=netease_id)
+
+    return {'row_idx': row_idx, 'song_name': song_name, 'artist_name': artist_name, 'netease_id': netease_id, 'lyrics': lyrics}
+
+
+def export_setlist(main, file_path, out_dir, jobs):
+    # 按歌手分组，每个歌手一个资源文件，歌曲顺序与歌单相同
+    artists = {}
+    for song in main.prefetch_songs(iter_setlist(file_path), jobs, resolve=lambda row, idx: fetch_lyrics(main, row, idx)):
+        songs = artists.setdefault(song['artist_name'], [])
+        songs.append(song_asset(len(songs) + 1, song['song_name'], song['artist_name'], song['netease_id'], song['lyrics']))
+
+    paths = []
+    for artist_name, songs in artists.items():
+        paths += export_artist(out_dir, artist_name, songs)
+        print(f'{artist_name}：{sum(1 for song in songs if song["parsedLyrics"])}/{len(songs)} 首有歌词')
+
+    return paths
+
+
+def reindex(out_dir):
+    # 用目录中已有的 <歌手>.json（包括 lyrics-scraper.js 生成的）重建索引，歌词文件本身不重写
+    paths = []
+    for path in sorted(glob.glob(os.path.join(out_dir, '*.json'))):
+        if path.endswith(INDEX_SUFFIX):
+            continue
+
+        with open(path, encoding='utf-8') as f:
+            songs = json.load(f)
+
+        artist_name = os.path.splitext(os.path.basename(path))[0]
+        paths.append(write_asset(os.path.join(out_dir, f'{artist_name}{INDEX_SUFFIX}'), build_index(artist_name, songs)))
+
+    return paths
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('file_path', nargs='?', help='歌单（Excel、CSV 或 JSON），只用“各歌设置”中的歌曲、歌手、要修改的歌词和网易云歌曲 ID')
+    parser.add_argument('--out-dir', default=DEFAULT_OUT_DIR, help='资源输出目录')
+    parser.add_argument('--index-only', action='store_true', help='不取歌词，只用输出目录中已有的 <歌手>.json 重建索引')
+    parser.add_argument('--corpus', metavar='PATH', help='导出后再用输出目录中所有 <歌手>.json 建列式歌词库（PPT 生成可用 --corpus 读取）')
+    parser.add_argument('--cache-file', default='lyrics_cache.sqlite', help='接口响应缓存文件')
+    parser.add_argument('--no-cache', action='store_true', help='不使用接口响应缓存')
+    parser.add_argument('--offline', action='store_true', help='离线模式：只从缓存读取，不访问网络')
+    parser.add_argument('--cache-ttl-days', type=float, default=DEFAULT_TTL / 86400, help='缓存有效天数')
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024, help='缓存最大容量（MB）')
+    parser.add_argument('--catalog-file', default='song_catalog.json', help='歌曲 ID 目录文件，已知的歌不再调用搜索接口')
+    parser.add_argument('--no-catalog', action='store_true', help='不使用歌曲 ID 目录')
+    parser.add_argument('--jobs', type=int, default=8, help='并发获取歌词的线程数')
+    args = parser.parse_args()
+    if not args.index_only and not args.file_path:
+        parser.error('需要指定歌单，或用 --index-only 只重建索引')
+
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    os.makedirs(args.out_dir, exist_ok=True)
+    if args.index_only:
+        written = reindex(args.out_dir)
+    else:
+        main = load_main()
+        if not args.no_cache or args.offline:
+            main.response_cache = ResponseCache(
+                args.cache_file,
+                ttl=args.cache_ttl_days * 86400,
+                max_bytes=int(args.cache_max_mb * 1024 * 1024),
+                offline=args.offline,
+            )
+
+        if not args.no_catalog:
+            main.song_catalog = SongCatalog(args.catalog_file)
+
+        try:
+            written = export_setlist(main, args.file_path, args.out_dir, args.jobs)
+        finally:
+            if main.response_cache is not None:
+                main.response_cache.close()
+            if main.song_catalog is not None:
+                main.song_catalog.save()
+
+    if args.corpus:
+        print(f'歌词库 {args.corpus}：{build_from_assets(args.corpus, os.path.join(args.out_dir, "*.json"))} 首歌')
+
+    for path in written:
+        print(f'{path}：{os.path.getsize(path) / 1024:.1f}KB')
@@ -0,0 +1,356 @@
+import copy
+import functools
+import os
+from collections import Counter
+
+# PowerPoint 对象模型（Presentations/Slides/Shapes/TimeLine...）的内存替身，给 ComRenderer 用，不需要 Windows 和 Office
+# 每次读写属性、调用方法都计为一次 COM 调用（真实 PowerPoint 中每次都是一次跨进程调用），用于基准测试
+calls = Counter()
+
+msoTextBox = 17
+msoAutoShape = 1
+msoPicture = 13
+SLIDE_WIDTH = 960
+SLIDE_HEIGHT = 540
+
+
+def reset_calls():
+    calls.clear()
+
+
+def total_calls():
+    return sum(calls.values())
+
+
+def com_method(func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        calls[f'{self._kind}.{func.__name__}'] += 1
+        return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+class ComObject:
+    # 属性存在 _props 中，读写都经过 __getattr__/__setattr__ 计数；没设置过的属性自动创建子对象（如 TextFrame、Font）
+    def __init__(self, kind, **props):
+        self.__dict__['_kind'] = kind
+        self.__dict__['_props'] = props
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        calls[f'{self._kind}.{name}'] += 1
+        props = self._props
+        if name not in props:
+            props[name] = ComObject(name)
+
+        return props[name]
+
+    def __setattr__(self, name, value):
+        calls[f'{self._kind}.{name}'] += 1
+        self._props[name] = value
+
+
+class FakeCollection(ComObject):
+    # COM 集合：下标从 1 开始，遍历时每个元素计一次调用
+    def __init__(self, kind, items=None, **props):
+        super().__init__(kind, **props)
+        self.__dict__['_items'] = items if items is not None else []
+
+    @property
+    def Count(self):
+        calls[f'{self._kind}.Count'] += 1
+        return len(self._items)
+
+    @com_method
+    def Item(self, index):
+        return self._items[index - 1]
+
+    def __call__(self, index):
+        return self.Item(index)
+
+    def __getitem__(self, index):
+        return self.Item(index)
+
+    def __iter__(self):
+        for item in list(self._items):
+            calls[f'{self._kind}.Next'] += 1
+            yield item
+
+
+class FakeTextRange(ComObject):
+    def __init__(self, text='', font_name='宋体', font_size=18):
+        super().__init__(
+            'TextRange',
+            Text=text,
+            Font=ComObject('Font', Name=font_name, NameFarEast=font_name, Size=font_size, Bold=0, Italic=0, Underline=0),
+            ParagraphFormat=ComObject('ParagraphFormat', Alignment=1),
+        )
+
+    @com_method
+    def Characters(self, start, length):
+        return FakeTextRange(self._props['Text'][start - 1:start - 1 + length])
+
+    @com_method
+    def Replace(self, FindWhat, ReplaceWhat):
+        # 只替换第一处，找不到时返回 None
+        text = self._props['Text']
+        start = text.find(FindWhat)
+        if start == -1:
+            return None
+
+        self._props['Text'] = text[:start] + ReplaceWhat + text[start + len(FindWhat):]
+        return FakeTextRange(ReplaceWhat)
+
+
+class FakeShape(ComObject):
+    # 形状在所属 Shapes 集合中的位置即层次
+    def __init__(self, **props):
+        super().__init__('Shape', **props)
+        self.__dict__['_shapes'] = None
+
+    @com_method
+    def Delete(self):
+        self._shapes._items.remove(self)
+
+    @com_method
+    def ZOrder(self, ZOrderCmd):
+        items = self._shapes._items
+        i = items.index(self)
+        # 只实现用到的 msoSendBackward
+        if ZOrderCmd == 3 and i > 0:
+            items[i - 1], items[i] = items[i], items[i - 1]
+
+
+def fake_shape(shape_type, left, top, width, height, text=None, font_name='宋体', font_size=18):
+    props = {
+        'Type': shape_type,
+        'Left': left,
+        'Top': top,
+        'Width': width,
+        'Height': height,
+        'Rotation': 0,
+        'HasTextFrame': text is not None,
+        'Fill': ComObject('Fill', ForeColor=ComObject('ColorFormat', RGB=0)),
+    }
+    if text is not None:
+        props['TextFrame'] = ComObject('TextFrame', TextRange=FakeTextRange(text, font_name, font_size))
+
+    return FakeShape(**props)
+
+
+class FakeShapes(FakeCollection):
+    def __init__(self):
+        super().__init__('Shapes')
+
+    def append(self, shape):
+        shape.__dict__['_shapes'] = self
+        self._items.append(shape)
+        return shape
+
+    @com_method
+    def AddTextbox(self, Orientation, Left, Top, Width, Height):
+        return self.append(fake_shape(msoTextBox, Left, Top, Width, Height, text=''))
+
+    @com_method
+    def AddShape(self, Type, Left, Top, Width, Height):
+        return self.append(fake_shape(msoAutoShape, Left, Top, Width, Height))
+
+    @com_method
+    def AddPicture(self, FileName, LinkToFile, SaveWithDocument, Left, Top, Width, Height):
+        shape = fake_shape(msoPicture, Left, Top, Width, Height)
+        shape._props['FileName'] = FileName
+        return self.append(shape)
+
+
+class FakePoints(FakeCollection):
+    def __init__(self):
+        super().__init__('AnimationPoints')
+
+    @com_method
+    def Add(self):
+        point = ComObject('AnimationPoint', Time=0, Value=None)
+        self._items.append(point)
+        return point
+
+
+class FakeBehaviors(FakeCollection):
+    def __init__(self):
+        super().__init__('AnimationBehaviors')
+
+    @com_method
+    def Add(self, Type):
+        behavior = ComObject(
+            'AnimationBehavior',
+            Type=Type,
+            MotionEffect=ComObject('MotionEffect', ByX=0, ByY=0),
+            PropertyEffect=ComObject('PropertyEffect', Property=0, Points=FakePoints()),
+        )
+        self._items.append(behavior)
+        return behavior
+
+
+class FakeSequence(FakeCollection):
+    def __init__(self):
+        super().__init__('Sequence')
+
+    @com_method
+    def AddEffect(self, Shape, effectId, trigger):
+        effect = ComObject(
+            'Effect',
+            Shape=Shape,
+            EffectType=effectId,
+            Behaviors=FakeBehaviors(),
+            Timing=ComObject('Timing', Duration=0.5, TriggerType=trigger, TriggerDelayTime=0),
+        )
+        self._items.append(effect)
+        return effect
+
+
+class FakeSlide(ComObject):
+    def __init__(self, slides, layout):
+        super().__init__(
+            'Slide',
+            Shapes=FakeShapes(),
+            CustomLayout=layout,
+            TimeLine=ComObject('TimeLine', MainSequence=FakeSequence()),
+        )
+        self.__dict__['_slides'] = slides
+
+    @com_method
+    def Delete(self):
+        self._slides._items.remove(self)
+
+    @com_method
+    def Duplicate(self):
+        # 副本放在原幻灯片之后，返回只含副本的 SlideRange
+        items = self._slides._items
+        clone = copy.deepcopy(self, {id(self._slides): self._slides, id(self._props['CustomLayout']): self._props['CustomLayout']})
+        items.insert(items.index(self) + 1, clone)
+        return FakeSlideRange(self._slides, clone)
+
+
+class FakeSlideRange(FakeCollection):
+    def __init__(self, slides, slide):
+        super().__init__('SlideRange', [slide])
+        self.__dict__['_slides'] = slides
+
+    @com_method
+    def MoveTo(self, toPos):
+        items = self._slides._items
+        slide = self._items[0]
+        items.remove(slide)
+        items.insert(toPos - 1, slide)
+
+
+class FakeSlides(FakeCollection):
+    def __init__(self, presentation):
+        super().__init__('Slides')
+        self.__dict__['_presentation'] = presentation
+
+    @com_method
+    def AddSlide(self, Index, pCustomLayout):
+        slide = FakeSlide(self, pCustomLayout)
+        self._items.insert(Index - 1, slide)
+        return slide
+
+    @com_method
+    def InsertFromFile(self, FileName, Index, SlideStart, SlideEnd):
+        source = self._presentation._app.saved[os.path.abspath(FileName)]
+        for i, slide in enumerate(source._items[SlideStart - 1:SlideEnd]):
+            slide = copy.deepcopy(slide, {id(source): self})
+            self._items.insert(Index + i, slide)
+
+        return SlideEnd - SlideStart + 1
+
+
+class FakePresentation(ComObject):
+    def __init__(self, app):
+        layout = ComObject('CustomLayout', Name='歌词')
+        super().__init__(
+            'Presentation',
+            PageSetup=ComObject('PageSetup', SlideWidth=SLIDE_WIDTH, SlideHeight=SLIDE_HEIGHT),
+            Designs=FakeCollection('Designs', [
+                ComObject('Design', SlideMaster=ComObject('Master', CustomLayouts=FakeCollection('CustomLayouts', [layout]))),
+            ]),
+        )
+        self.__dict__['_app'] = app
+        self.__dict__['_slides'] = FakeSlides(self)
+        self.__dict__['_layout'] = layout
+
+    @property
+    def Slides(self):
+        calls['Presentation.Slides'] += 1
+        return self._slides
+
+    def clone(self):
+        return copy.deepcopy(self, {id(self._app): self._app})
+
+    @com_method
+    def SaveCopyAs(self, FileName):
+        self._app.copies[os.path.abspath(FileName)] = self.clone()
+
+    @com_method
+    def SaveAs(self, FileName):
+        if self._app.keep_saved:
+            self._app.saved[os.path.abspath(FileName)] = self._slides
+
+    @com_method
+    def Close(self):
+        # 关闭后 PowerPoint 释放演示文稿占用的内存
+        items = self._app._presentations._items
+        if self in items:
+            items.remove(self)
+
+
+def template_presentation(app):
+    # 与实际模板相同的结构：第 1 张是歌曲封面（歌名、歌手、词曲文本框，底色矩形，封面图片），第 2 张是歌词文本框
+    deck = FakePresentation(app)
+    slides = deck._slides
+    cover = slides.AddSlide(1, deck._layout)
+    for shape in [
+        fake_shape(msoAutoShape, 0, 0, SLIDE_WIDTH, SLIDE_HEIGHT),
+        fake_shape(msoPicture, 60, 90, 360, 360),
+        fake_shape(msoTextBox, 480, 120, 420, 80, text='<歌名>', font_size=40),
+        fake_shape(msoTextBox, 480, 220, 420, 60, text='<歌手>', font_size=28),
+        fake_shape(msoTextBox, 480, 300, 420, 60, text='作曲：<作曲人>\n作词：<作词人>', font_size=20),
+    ]:
+        cover.Shapes.append(shape)
+
+    lyric = slides.AddSlide(2, deck._layout)
+    lyric.Shapes.append(fake_shape(msoTextBox, 0, 0, SLIDE_WIDTH, 72, text='歌词', font_size=54))
+    return deck
+
+
+class FakePresentations(FakeCollection):
+    def __init__(self, app):
+        super().__init__('Presentations')
+        self.__dict__['_app'] = app
+
+    @com_method
+    def Open(self, FileName):
+        # SaveCopyAs 保存过的文件打开它的副本，其他文件都当作模板
+        deck = self._app.copies.pop(os.path.abspath(FileName), None) or template_presentation(self._app)
+        self._items.append(deck)
+        return deck
+
+
+class FakeApplication(ComObject):
+    def __init__(self, keep_saved=False):
+        # keep_saved 为真时保存的演示文稿留在内存中，供 InsertFromFile 使用
+        super().__init__('Application', Visible=False)
+        self.__dict__['keep_saved'] = keep_saved
+        self.__dict__['copies'] = {}
+        self.__dict__['saved'] = {}
+        self.__dict__['_presentations'] = FakePresentations(self)
+
+    @property
+    def Presentations(self):
+        calls['Application.Presentations'] += 1
+        return self._presentations
+
+    @com_method
+    def Quit(self):
+        pass
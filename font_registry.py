@@ -0,0 +1,134 @@
+import os
+import shutil
+import subprocess
+import sys
+import threading
+
+# 字体注册表：每个进程只枚举一次系统字体，之后 O(1) 判断字体是否存在
+# 枚举方式可替换：Windows 用 win32gui，Linux 用 fontconfig / fontTools，测试时可直接给字体列表
+FONT_FILE_EXTS = ('.ttf', '.otf', '.ttc', '.otc')
+FONT_DIRS = [
+    os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts'),
+    os.path.expanduser('~/.fonts'),
+    os.path.expanduser('~/.local/share/fonts'),
+    os.path.expanduser('~/Library/Fonts'),
+    '/Library/Fonts',
+    '/System/Library/Fonts',
+    '/usr/share/fonts',
+    '/usr/local/share/fonts',
+]
+# 字体名表中的 family 名称：1 为旧式 family，16 为 typographic family
+FAMILY_NAME_IDS = (1, 16)
+
+_lock = threading.Lock()
+_font_provider = None
+_font_names = None
+
+
+def win32_fonts():
+    import win32gui
+
+    # 回调函数，用于添加字体名称
+    def enum_font_callback(logfont, textmetric, font_type, font_list):
+        font_list.append(logfont.lfFaceName)
+        return True
+
+    fonts = []
+    # 使用 EnumFontFamilies 函数枚举字体
+    hdc = win32gui.GetDC(0)  # 获取屏幕的设备上下文
+    win32gui.EnumFontFamilies(hdc, None, enum_font_callback, fonts)
+    win32gui.ReleaseDC(0, hdc)  # 释放设备上下文
+    return fonts
+
+
+def fontconfig_fonts():
+    # 每行形如 "Noto Sans CJK SC,Noto Sans CJK SC Regular"，逗号分隔的都是同一字体的别名（含中文名）
+    output = subprocess.run(['fc-list', ':', 'family'], capture_output=True, text=True, check=True).stdout
+    fonts = []
+    for line in output.splitlines():
+        fonts.extend(name.strip() for name in line.split(',') if name.strip())
+
+    return fonts
+
+
+def fonttools_fonts(font_dirs=None):
+    from fontTools.ttLib import TTCollection, TTFont
+
+    def family_names(font):
+        if 'name' not in font:
+            return []
+
+        return [record.toUnicode() for record in font['name'].names if record.nameID in FAMILY_NAME_IDS]
+
+    fonts = []
+    for font_dir in font_dirs or FONT_DIRS:
+        for root, _, files in os.walk(font_dir):
+            for file in files:
+                if not file.lower().endswith(FONT_FILE_EXTS):
+                    continue
+
+                path = os.path.join(root, file)
+                try:
+                    if file.lower().endswith(('.ttc', '.otc')):
+                        for font in TTCollection(path, lazy=True).fonts:
+                            fonts.extend(family_names(font))
+                    else:
+                        fonts.extend(family_names(TTFont(path, lazy=True)))
+                except Exception:
+                    # 损坏或不支持的字体文件，跳过
+                    continue
+
+    return fonts
+
+
+def fixture_fonts(fonts):
+    # fonts 可以是字体名列表，也可以是每行一个字体名的文件路径
+    def provider():
+        if isinstance(fonts, str):
+            with open(fonts, encoding='utf-8') as file:
+                return [line.strip() for line in file if line.strip()]
+
+        return list(fonts)
+
+    return provider
+
+
+def default_font_provider():
+    if sys.platform == 'win32':
+        return win32_fonts
+
+    if shutil.which('fc-list'):
+        return fontconfig_fonts
+
+    return fonttools_fonts
+
+
+def set_font_provider(provider):
+    # 更换字体来源，并丢弃已缓存的字体列表
+    global _font_provider
+    with _lock:
+        _font_provider = provider
+
+    refresh_fonts()
+
+
+def refresh_fonts():
+    # 运行中途安装了新字体时调用，下次查询会重新枚举
+    global _font_names
+    with _lock:
+        _font_names = None
+
+
+def get_fonts():
+    global _font_names
+    with _lock:
+        if _font_names is None:
+            provider = _font_provider or default_font_provider()
+            _font_names = frozenset(provider())
+
+        return _font_names
+
+
+# 检查字体是否在系统中可用
+def is_font_available(font_name):
+    return font_name in get_fonts()
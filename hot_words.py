@@ -0,0 +1,235 @@
+import argparse
+import glob
+import json
+import os
+from time import perf_counter
+
+import numpy as np
+
+from export_assets import INDEX_SUFFIX
+
+# 热字难度分析：对歌手的所有歌词，一次算出每个候选热字在每首歌中可玩的歌词行、热字第一次出现的位置，
+# 以及按 Game.vue 的规则（随机 10 首歌，每支签最多拉出的字数由屏幕宽度决定，断 3 支签结束）玩家能拿到的期望最高分
+# 所有字一起算：歌词转成 UTF-16 编码单元数组，(行, 字) 的第一次出现一次排序求出，即稀疏的 字×行 关联矩阵，再按字聚合，不逐字循环
+# 长度、位置和拉出的字数都按 UTF-16 编码单元计算，与游戏中 JS 的 length、indexOf、substring 相同（BMP 以外的字占两个）
+# 用法：python hot_words.py [--assets "public/assets/*.json"] [--corpus corpus.lyc] [--top 20] [--screen-width 390]
+# 与 Game.vue 中的常量一致
+PIXELS_PER_CHAR = 14
+INIT_WIDTH = 136
+MAX_BROKEN_SCROLLS_COUNT = 3
+SONGS_PER_GAME = 10
+# 签的最大宽度为屏幕宽度减去 2rem
+SCREEN_PADDING = 32
+DEFAULT_SCREEN_WIDTH = 390
+# 可玩的歌词行：长度大于 5，热字第一次出现的位置大于 1（与选歌的 Web Worker、热字索引的规则相同）
+MIN_LINE_LENGTH = 5
+MIN_OFFSET = 1
+# 候选热字：与 count-lyrics.js 相同，只统计常用汉字
+CANDIDATE_FIRST = 0x4e00
+CANDIDATE_LAST = 0x9fa5
+# JS 正则 \s 匹配的字符，计分时不算
+WHITESPACE = ' \t\n\r\x0b\x0c\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a' \
+             '\u2028\u2029\u202f\u205f\u3000\ufeff'
+WHITESPACE_CODES = np.array([ord(c) for c in WHITESPACE], dtype=np.uint16)
+
+
+def max_visible_chars(screen_width=DEFAULT_SCREEN_WIDTH):
+    # 签拉到最宽时露出的字数
+    return max(0, (screen_width - SCREEN_PADDING - INIT_WIDTH) // PIXELS_PER_CHAR)
+
+
+def comb(n, m, max_m=SONGS_PER_GAME):
+    # 逐元素的组合数 C(n, m)，m 不超过 max_m；n < m 或 m < 0 时为 0
+    n = np.asarray(n, dtype=np.float64)
+    m = np.asarray(m)
+    result = np.where(m < 0, 0.0, 1.0)
+    for i in range(max_m):
+        factor = np.where(i < m, (n - i) / (i + 1), 1.0)
+        result = result * np.clip(factor, 0, None)
+
+    return result
+
+
+def expected_breaks(songs, breakable, drawn, limit=MAX_BROKEN_SCROLLS_COUNT):
+    # 从 songs 首歌（其中 breakable 首拉到最宽时会露出热字）中随机抽 drawn 首，能弄断的签数 min(limit, B) 的期望
+    # B 服从超几何分布：E[min(limit, B)] = limit - Σ_{j<limit} (limit - j) P(B = j)
+    total = comb(songs, drawn)
+    result = np.full(np.shape(songs), float(limit))
+    for j in range(limit):
+        p = comb(breakable, j, limit) * comb(songs - breakable, drawn - j) / np.where(total > 0, total, 1)
+        result -= (limit - j) * p
+
+    return np.where(total > 0, result, 0.0)
+
+
+def first_in_groups(groups, values, value_count):
+    # 每组（groups 相同）中最小的 value，返回按组排序的 (组, 最小值)；value 都小于 value_count
+    # 打包成一个整数后用普通排序，比 np.unique(return_index=True) 需要的稳定排序快得多
+    packed = np.sort(groups * value_count + values)
+    packed_groups = packed // value_count
+    first = np.ones(len(packed), dtype=bool)
+    first[1:] = packed_groups[1:] != packed_groups[:-1]
+    packed = packed[first]
+    return packed_groups[first], packed % value_count
+
+
+def analyze(lines, line_songs, song_count, screen_width=DEFAULT_SCREEN_WIDTH):
+    # lines 为所有歌词行（已去掉首尾空白），line_songs 为每行所属歌曲的下标（同一首歌的行连续且按顺序）
+    # 返回每个候选字的统计，以及每首歌选中的行（(字, 歌曲, 行, 热字位置)，即热字第一次出现的位置，单位为 UTF-16 编码单元）
+    cap = max_visible_chars(screen_width)
+    line_songs = np.asarray(line_songs, dtype=np.int64)
+    # 候选字和空白都在 BMP 内，只占一个编码单元；BMP 以外的字拆成两个代理项，既不是候选字也不是空白
+    codes = np.frombuffer(''.join(lines).encode('utf-16-le'), dtype='<u2')
+    lengths = np.fromiter((len(line.encode('utf-16-le')) // 2 for line in lines), dtype=np.int64, count=len(lines))
+    max_length = int(lengths.max(initial=0)) + 1
+    starts = np.zeros(len(lines) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=starts[1:])
+    line_ids = np.repeat(np.arange(len(lines)), lengths)
+    # 每个位置之前的非空白字数，算拉出的字数用
+    counted = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(~np.isin(codes, WHITESPACE_CODES), out=counted[1:])
+
+    # 候选字编号：码位范围固定，用查表代替 np.unique 排序
+    candidate = (codes >= CANDIDATE_FIRST) & (codes <= CANDIDATE_LAST)
+    positions = np.flatnonzero(candidate)
+    candidate_codes = codes[positions].astype(np.int64) - CANDIDATE_FIRST
+    present = np.bincount(candidate_codes, minlength=CANDIDATE_LAST - CANDIDATE_FIRST + 1) > 0
+    chars = np.flatnonzero(present) + CANDIDATE_FIRST
+    char_count = len(chars)
+    char_ids = (np.cumsum(present) - 1)[candidate_codes]
+
+    # 候选字在每行第一次出现的位置，即稀疏的 字×行 关联矩阵
+    position_lines = line_ids[positions]
+    pairs, pair_offsets = first_in_groups(position_lines * char_count + char_ids, positions - starts[position_lines], max_length)
+    pair_lines, pair_chars = pairs // char_count, pairs % char_count
+    # 出现该字的行占所有行的比例
+    line_share = np.bincount(pair_chars, minlength=char_count) / max(1, len(lines))
+
+    # 每首歌取第一句可玩的行（与 Web Worker 一样按行的顺序找）：(字, 歌) 中行最小的，行和位置打包在一起排序
+    playable = (lengths[pair_lines] > MIN_LINE_LENGTH) & (pair_offsets > MIN_OFFSET)
+    pick_groups, picked = first_in_groups(
+        pair_chars[playable] * song_count + line_songs[pair_lines[playable]],
+        pair_lines[playable] * max_length + pair_offsets[playable], len(lines) * max_length)
+    pick_chars, pick_songs = pick_groups // song_count, pick_groups % song_count
+    pick_lines, pick_offsets = picked // max_length, picked % max_length
+
+    # 最优玩法：每支签都拉到热字前（或拉到最宽），再弄断能露出热字的签，每断一支多拉出热字本身
+    shown = np.minimum(pick_offsets, cap)
+    safe = counted[starts[pick_lines] + shown] - counted[starts[pick_lines]]
+    breakable = pick_offsets < cap
+    songs = np.bincount(pick_chars, minlength=char_count)
+    safe_sum = np.bincount(pick_chars, weights=safe, minlength=char_count)
+    breakable_count = np.bincount(pick_chars, weights=breakable, minlength=char_count)
+    offset_sum = np.bincount(pick_chars, weights=pick_offsets, minlength=char_count)
+    drawn = np.minimum(songs, SONGS_PER_GAME)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_safe = np.where(songs > 0, safe_sum / songs, 0.0)
+        break_prob = np.where(songs > 0, breakable_count / songs, 0.0)
+        mean_offset = np.where(songs > 0, offset_sum / songs, 0.0)
+
+    return {
+        'chars': [chr(code) for code in chars],
+        'songs': songs,
+        'line_share': line_share,
+        'break_prob': break_prob,
+        'mean_offset': mean_offset,
+        'expected_score': drawn * mean_safe + expected_breaks(songs, breakable_count, drawn),
+        'picks': {'char': pick_chars, 'song': pick_songs, 'line': pick_lines, 'offset': pick_offsets},
+    }
+
+
+def rank(result, min_songs=SONGS_PER_GAME, top=20, hardest=True):
+    # 可玩歌曲数够一局的字，按期望最高分排序（默认分数低、更难的在前）
+    candidates = np.flatnonzero(result['songs'] >= min_songs)
+    score = result['expected_score'][candidates]
+    order = np.argsort(score if hardest else -score, kind='stable')
+    return candidates[order[:top]]
+
+
+def load_assets(pattern):
+    # 各歌手的 <歌手>.json（与游戏读取的相同），返回 {歌手: (歌名列表, 行列表, 每行的歌曲下标)}
+    artists = {}
+    for path in sorted(glob.glob(pattern)):
+        if path.endswith(INDEX_SUFFIX):
+            continue
+
+        with open(path, encoding='utf-8') as f:
+            songs = json.load(f)
+
+        artist = os.path.splitext(os.path.basename(path))[0]
+        names, lines, line_songs = artists.setdefault(artist, ([], [], []))
+        for song in songs:
+            if not isinstance(song.get('name'), str) or not song.get('parsedLyrics'):
+                continue
+
+            for line in song['parsedLyrics']:
+                lines.append(line.strip())
+                line_songs.append(len(names))
+            names.append(song['name'].strip())
+
+    return artists
+
+
+def load_corpus(path):
+    # 列式歌词库，按歌手分组，用去掉歌手的歌词
+    from lyrics_corpus import LyricsCorpus
+
+    corpus = LyricsCorpus(path)
+    artists = {}
+    try:
+        for i in range(len(corpus)):
+            names, lines, line_songs = artists.setdefault(corpus.artist_name(i), ([], [], []))
+            for line in corpus.lines(i):
+                lines.append(line.trimmed.strip())
+                line_songs.append(len(names))
+            names.append(corpus.song_name(i))
+    finally:
+        corpus.close()
+
+    return artists
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='热字难度分析')
+    parser.add_argument('--assets', default='public/assets/*.json', help='游戏歌词 JSON 文件的 glob')
+    parser.add_argument('--corpus', metavar='PATH', help='改用列式歌词库（lyrics_corpus.py 生成）')
+    parser.add_argument('--screen-width', type=int, default=DEFAULT_SCREEN_WIDTH, help='屏幕宽度（像素），决定每支签最多拉出的字数')
+    parser.add_argument('--min-songs', type=int, default=SONGS_PER_GAME, help='可玩歌曲数至少为此值的字才参与排名')
+    parser.add_argument('--top', type=int, default=20, help='每个歌手显示的字数')
+    parser.add_argument('--easiest', action='store_true', help='按期望最高分从高到低排（默认从低到高，更难的在前）')
+    parser.add_argument('--json', metavar='PATH', help='把所有候选字的统计写入 JSON 文件')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    artists = load_corpus(args.corpus) if args.corpus else load_assets(args.assets)
+    if not artists:
+        raise SystemExit(f'没有找到歌词：{args.corpus or args.assets}')
+
+    print(f'每支签最多拉出 {max_visible_chars(args.screen_width)} 个字（屏幕宽度 {args.screen_width}px）')
+    output = {}
+    for artist, (names, lines, line_songs) in artists.items():
+        start = perf_counter()
+        result = analyze(lines, line_songs, len(names), args.screen_width)
+        seconds = perf_counter() - start
+        print(f'\n{artist}：{len(names)} 首歌，{len(lines)} 行，{len(result["chars"])} 个候选字，用时 {seconds * 1000:.1f}ms')
+        for rank_no, i in enumerate(rank(result, args.min_songs, args.top, not args.easiest), 1):
+            print(f'{rank_no}. {result["chars"][i]}：可玩 {result["songs"][i]} 首，出现在 {result["line_share"][i]:.1%} 的行，'
+                  f'断签概率 {result["break_prob"][i]:.0%}，平均位置 {result["mean_offset"][i]:.1f}，'
+                  f'期望最高分 {result["expected_score"][i]:.1f}')
+
+        output[artist] = {
+            char: {
+                'songs': int(result['songs'][i]),
+                'line_share': float(result['line_share'][i]),
+                'break_prob': float(result['break_prob'][i]),
+                'mean_offset': float(result['mean_offset'][i]),
+                'expected_score': float(result['expected_score'][i]),
+            }
+            for i, char in enumerate(result['chars'])
+        }
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,147 @@
+import bisect
+import random
+import threading
+from time import monotonic, sleep
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 所有网络请求的统一入口：每个域名一个连接池化的 Session，带超时、重试（指数退避+抖动）、
+# 按域名的令牌桶限流，以及请求数/字节数/耗时分布的统计
+DEFAULT_TIMEOUT = (5, 20)  # (连接超时, 读取超时)，单位秒
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POOL_SIZE = 16
+DEFAULT_RATE = 10  # 每秒请求数
+DEFAULT_BURST = 10
+# 耗时分布的桶上界（秒）
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, float('inf')]
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            sleep(wait)
+
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.latency = [0] * len(LATENCY_BUCKETS)
+
+    def record(self, seconds, size):
+        self.requests += 1
+        self.bytes += size
+        self.latency[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+
+_lock = threading.Lock()
+_sessions = {}
+_buckets = {}
+_rate_limits = {}
+_stats = {}
+
+
+def set_rate_limit(host, rate, burst=None):
+    # 为某个域名单独设置每秒请求数
+    with _lock:
+        _rate_limits[host] = (rate, burst or max(1, int(rate)))
+        _buckets.pop(host, None)
+
+
+def _get_host(host):
+    with _lock:
+        if host not in _sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[host] = session
+            _stats[host] = HostStats()
+
+        if host not in _buckets:
+            rate, burst = _rate_limits.get(host, (DEFAULT_RATE, DEFAULT_BURST))
+            _buckets[host] = TokenBucket(rate, burst)
+
+        return _sessions[host], _buckets[host], _stats[host]
+
+
+def backoff(attempt):
+    # 指数退避，加上全抖动，避免并发请求同时重试
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def get(url, params=None, timeout=DEFAULT_TIMEOUT):
+    host = urlsplit(url).netloc
+    session, bucket, stats = _get_host(host)
+    for attempt in range(MAX_RETRIES):
+        bucket.acquire()
+        start = monotonic()
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            with _lock:
+                stats.errors += 1
+
+            if attempt == MAX_RETRIES - 1:
+                raise
+        else:
+            with _lock:
+                stats.record(monotonic() - start, len(response.content))
+
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES - 1:
+                response.raise_for_status()
+                return response
+
+        with _lock:
+            stats.retries += 1
+
+        sleep(backoff(attempt))
+
+
+def get_stats():
+    with _lock:
+        return {
+            host: {
+                'requests': s.requests,
+                'errors': s.errors,
+                'retries': s.retries,
+                'bytes': s.bytes,
+                'latency': dict(zip(LATENCY_BUCKETS, s.latency)),
+            }
+            for host, s in _stats.items()
+        }
+
+
+def format_stats():
+    lines = []
+    for host, s in get_stats().items():
+        buckets = ' '.join(
+            (f'≤{b}s:{n}' if b != float('inf') else f'>{LATENCY_BUCKETS[-2]}s:{n}') for b, n in s['latency'].items() if n
+        )
+        lines.append(f'{host}：请求 {s["requests"]} 次，{s["bytes"] / 1024:.1f}KB，重试 {s["retries"]} 次，出错 {s["errors"]} 次，耗时分布 {buckets}')
+
+    return '\n'.join(lines)
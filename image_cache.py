@@ -0,0 +1,87 @@
+import hashlib
+import os
+import threading
+from urllib.parse import urlsplit
+
+# 封面图片缓存：按 URL 的哈希保存原图，同一封面只下载一次；每次运行、每个进程共用，不再写固定的 tmp.jpg
+# 插入幻灯片前按图片框的实际大小缩小并重新压缩，同一原图同一尺寸总是得到同一个文件（内容也相同），
+# 相同的图片在 .pptx 包里只保存一份（python-pptx 按内容的 SHA1 复用图片）
+DEFAULT_DIR = 'image_cache'
+# 缩放到图片框大小时的分辨率（每英寸像素数），1 磅 = 1/72 英寸
+DEFAULT_DPI = 150
+JPEG_QUALITY = 85
+# 按 URL 哈希分片的下载锁个数：同一 URL 同时只下载一次，锁的个数固定，不随 URL 增长
+LOCK_STRIPES = 64
+
+
+def url_hash(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+class ImageCache:
+    def __init__(self, directory=DEFAULT_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 同一 URL 同时只下载一次；不同 URL 偶尔落在同一把锁上，只是多等一会儿
+        self._url_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def path_of(self, url):
+        # 按哈希前两位分目录，避免单个目录文件过多；保留扩展名，PowerPoint 按扩展名识别图片格式
+        digest = url_hash(url)
+        ext = os.path.splitext(urlsplit(url).path)[1] or '.jpg'
+        return os.path.join(self.directory, digest[:2], f'{digest}{ext}')
+
+    def fetch(self, url, download):
+        # download 为真正下载的函数，返回图片 bytes；返回原图在缓存中的路径
+        path = self.path_of(url)
+        url_lock = self._url_locks[int(url_hash(url)[:8], 16) % LOCK_STRIPES]
+        with url_lock:
+            if os.path.exists(path):
+                with self._lock:
+                    self.hits += 1
+                return path
+
+            body = download()
+            write_file(path, body)
+            with self._lock:
+                self.misses += 1
+            return path
+
+
+def write_file(path, body):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # 多个进程可能同时写同一文件，先写到各自的临时文件再替换
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+
+    os.replace(tmp_path, path)
+
+
+def fit_image(path, width_pt, height_pt, dpi=DEFAULT_DPI):
+    # 把图片缩小到图片框的大小（磅），返回缩小后的文件路径；没有装 Pillow 或图片本来就更小时返回原图
+    try:
+        from PIL import Image
+    except ImportError:
+        return path
+
+    width = max(1, round(width_pt * dpi / 72))
+    height = max(1, round(height_pt * dpi / 72))
+    fit_path = f'{os.path.splitext(path)[0]}-{width}x{height}.jpg'
+    if os.path.exists(fit_path):
+        return fit_path
+
+    with Image.open(path) as image:
+        if image.width <= width and image.height <= height:
+            return path
+
+        # 图片会被拉伸到图片框大小，直接缩放到框的比例，显示效果不变
+        image = image.convert('RGB').resize((width, height), Image.LANCZOS)
+        tmp_path = f'{fit_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        image.save(tmp_path, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+
+    os.replace(tmp_path, fit_path)
+    return fit_path
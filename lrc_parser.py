@@ -0,0 +1,307 @@
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+from zh_convert import to_simplified
+
+# LRC 歌词解析：清理、展开多时间戳、排序，再按时间和歌手状态机解析成 LyricLine 列表
+# 只处理字符串，不涉及网络和 PowerPoint，可以单独用来批量校验歌词
+EXCLUDED_ROLES = [
+    '编曲',
+    '制作人',
+    '监制',
+    'OP',
+    'SP',
+    '和音',
+    '录音',
+    '混音',
+    'Mastering',
+    '编程',
+    '键盘',
+    '吉他',
+    '电吉他',
+    '电结他',
+    '贝斯',
+    '鼓',
+    '弦乐编写',
+    '铜管乐编写',
+    '和声编写',
+    '和声',
+    '混音师',
+    '录音室',
+    '混音室',
+    '录音工程师',
+    '母带后期处理录音师',
+    '录音室',
+    '母带后期处理录音室',
+    '基本轨录音工程',
+    '演唱',
+    '主唱',
+]
+# 歌词行里要排除的角色，比 EXCLUDED_ROLES 多了词曲
+EXCLUDED_LYRIC_ROLES = EXCLUDED_ROLES + ['作词', '作曲']
+# 一次匹配所有角色，等价于对每个角色做子串判断
+EXCLUDED_LYRIC_ROLES_RE = re.compile('|'.join(map(re.escape, EXCLUDED_LYRIC_ROLES)))
+# 歌词与 要修改的歌词 的相似度达到这个值就替换
+CORRECTION_RATIO = 0.8
+DEFAULT_SINGER = '默'
+CHORUS_SINGER = '合'
+TIME_LYRIC_SPLITTER = ']'
+SINGER_LYRIC_SPLITTERS = ['：', ':']
+SINGER_LYRIC_SPLITTER_PATTERN = '|'.join(map(re.escape, SINGER_LYRIC_SPLITTERS))  # 将分隔符数组转换为正则表达式
+SINGER_LYRIC_SPLITTER_RE = re.compile(SINGER_LYRIC_SPLITTER_PATTERN)
+MULTIPLE_SINGER_SPLITTER = '___'
+# 匹配格式 "[00:21xx]abc"
+VALID_LYRIC_RE = re.compile(r"^\[\d{2}:\d{2}.*\].+")
+# LyricLine.singer 不是 singers 的下标时的取值
+SINGER_INDEX_DEFAULT = -1
+SINGER_INDEX_CHORUS = -2
+
+
+class LyricLine:
+    # 一行解析后的歌词，用 __slots__ 减少几千首歌批量解析时的内存
+    # sec: 显示时间（秒）；singer: 本行第一个歌手在 singers 中的下标；
+    # text: 带歌手的显示文本，如 `歌手：歌词` 或 `歌手1：歌词1___歌手2：歌词2`；trimmed: 去掉歌手的歌词
+    __slots__ = ('sec', 'singer', 'text', 'trimmed')
+
+    def __init__(self, sec, singer, text, trimmed):
+        self.sec = sec
+        self.singer = singer
+        self.text = text
+        self.trimmed = trimmed
+
+    def __repr__(self):
+        return f'LyricLine({self.sec!r}, {self.singer!r}, {self.text!r}, {self.trimmed!r})'
+
+
+def similarity_ratio(str1, str2):
+    return SequenceMatcher(None, str1, str2).ratio()
+
+
+def ratio_bound(matches, length):
+    # 与 SequenceMatcher.ratio 的计算方式相同，matches 取上界时得到相似度的上界
+    return 2.0 * matches / length if length else 1.0
+
+
+class LyricCorrector:
+    # 歌词修改规则：返回第一条与歌词相似度 >= CORRECTION_RATIO 的规则对应的修改后歌词，结果与逐条计算 ratio 相同
+    # 规则按字符建倒排索引，先用长度（real_quick_ratio）和字符交集（quick_ratio）的上界排除，剩下的才算完整的 ratio
+    def __init__(self, change_lyrics, changed_lyrics):
+        self.change_lyrics = list(change_lyrics)
+        self.changed_lyrics = changed_lyrics
+        self.lengths = [len(rule) for rule in self.change_lyrics]
+        # 字符 -> [(规则下标, 该字符在规则中出现的次数)]
+        self.index = defaultdict(list)
+        for i, rule in enumerate(self.change_lyrics):
+            for char, count in Counter(rule).items():
+                self.index[char].append((i, count))
+
+        self.matcher = SequenceMatcher(None)
+        self.results = {}
+
+    def find(self, lyric):
+        # 返回匹配的规则下标，没有则为 -1
+        if not self.change_lyrics:
+            return -1
+
+        if lyric in self.results:
+            return self.results[lyric]
+
+        lyric_len = len(lyric)
+        common = defaultdict(int)
+        for char, count in Counter(lyric).items():
+            for i, rule_count in self.index.get(char, ()):
+                common[i] += min(count, rule_count)
+
+        found = -1
+        # lyric 作为 seq2，SequenceMatcher 只需分析一次
+        self.matcher.set_seq2(lyric)
+        for i, rule_len in enumerate(self.lengths):
+            length = rule_len + lyric_len
+            if ratio_bound(min(rule_len, lyric_len), length) < CORRECTION_RATIO:
+                continue
+
+            if ratio_bound(common.get(i, 0), length) < CORRECTION_RATIO:
+                continue
+
+            self.matcher.set_seq1(self.change_lyrics[i])
+            if self.matcher.ratio() >= CORRECTION_RATIO:
+                found = i
+                break
+
+        self.results[lyric] = found
+        return found
+
+    def correct(self, lyric):
+        i = self.find(lyric)
+        return lyric if i == -1 else self.changed_lyrics[i]
+
+
+def time_to_seconds(time_str):
+    # 将时间字符串分割成分钟、秒和毫秒部分
+    minutes, rest = time_str.split(':')
+    seconds, milliseconds = rest.split('.')
+
+    # 转换为秒
+    total_seconds = int(minutes) * 60 + int(seconds) + int(milliseconds) / 1000
+    return total_seconds
+
+
+def is_valid_lyric(x):
+    return VALID_LYRIC_RE.match(x)
+
+
+def normalize_lrc(lrc_str):
+    # 转换括号，修复一些typo，返回有时间戳的歌词行
+    lrc_str = lrc_str.replace('（(', '（').replace('（', '(').replace('）', ')').replace('\\u3000', ' ')
+    lrcs = []
+    for i, tmp_lrc in enumerate(lrc_str.split('\n')):
+        if is_valid_lyric(tmp_lrc):
+            lrcs.append(tmp_lrc)
+        elif tmp_lrc.strip() != '' and tmp_lrc.find('[') == -1:
+            # 如果没有时间戳，添加
+            lrcs.append(f'[00:00.{str(i).zfill(2)}]' + tmp_lrc)
+
+    return lrcs
+
+
+def expand_lyrics(arr, change_lyrics=(), changed_lyrics=()):
+    # 替换某些古怪的歌词：如记忆棉最后一句“——-”
+    corrector = LyricCorrector(change_lyrics, changed_lyrics)
+    result = []
+    for item in arr:
+        # 用']'分割字符串
+        parts = item.split(TIME_LYRIC_SPLITTER)
+        if len(parts) > 1:
+            # 歌词会有些形如“[01:50.67][00:36.57]谁伴我 冒险跳下爱河”，每个时间戳展开为一行
+            # 最后部分为歌词，把它的中文空格转为英文空格
+            lyric = parts[-1].replace("　", " ").strip()
+            if EXCLUDED_LYRIC_ROLES_RE.search(SINGER_LYRIC_SPLITTER_RE.split(lyric, 1)[0].strip()):
+                # 排除形如 [00:05.0]编曲：Johnny Yim 的歌词
+                continue
+
+            # 如果歌词在 change_lyrics 中，进行替换
+            lyric = corrector.correct(lyric)
+            for part in parts[:-1]:
+                result.append(f"{part}{TIME_LYRIC_SPLITTER}{lyric}")
+
+        else:
+            # 若无法分割，直接添加到结果数组
+            result.append(item)
+
+    # 把歌词根据时间排序
+    return sorted(result)
+
+
+def parse_lyrics(lyrics):
+    # lyrics 为 expand_lyrics 的结果，返回 (LyricLine 列表, 歌手列表)
+    # 每行只分割一次时间和歌词，预读下一行时间时复用
+    times = []
+    texts = []
+    for lyric in lyrics:
+        words = lyric.split(TIME_LYRIC_SPLITTER)
+        times.append(words[0][1:])
+        texts.append(words[1])
+
+    chn_colon = SINGER_LYRIC_SPLITTERS[0]
+    split = SINGER_LYRIC_SPLITTER_RE.split
+    # 同一首歌的歌手名反复出现，简体转换的结果按歌缓存，没有的再查各歌共用的 LRU
+    simplified = {}
+    curr_singer = DEFAULT_SINGER
+    singers = []
+    lines = []
+    is_move_time = False
+    last = len(lyrics) - 1
+    for i, text in enumerate(texts):
+        # 获取时间
+        sec = time_to_seconds(times[i])
+        if i != 0:
+            prev = lines[i - 1]
+            if not is_move_time:
+                if (sec - prev.sec) < 2 and len(prev.trimmed) > 6 and i < last:
+                    # 如果前一歌词时间<2s而且文字>6，意味着和本句是合唱，要同时出现和消失，所以要获取下一句的时间，作为本句的时间
+                    is_move_time = True
+                    sec = time_to_seconds(times[i + 1])
+
+            else:
+                is_move_time = False
+                sec = prev.sec
+
+        # 获取歌词，括号是合唱特征
+        # 歌词如果已有2个冒号，不需再加；否则加1个冒号
+        tw = chn_colon if len(split(text, 1)) < 2 else ''
+        if text.find('(') == 0:
+            # 如果第一个字符是(，意味着这歌词用了`(歌手)歌词`的格式，来指明本句的歌手，要转换为：`歌手：歌词`这个格式
+            strip_str = text.replace('(', '').replace(')', chn_colon)
+        else:
+            strip_str = text.replace(')', '').replace('(', f'{tw}(').replace('(', '')\
+                .replace(f'{chn_colon}{chn_colon}', chn_colon)
+
+        words = split(strip_str)
+        if len(words) > 1:
+            # 合唱歌曲
+            # 如果歌手有&字符，视为合唱
+            singer = words[0].strip() if words[0].find('&') == -1 else CHORUS_SINGER
+            if singer == '合唱':
+                singer = CHORUS_SINGER
+
+            if singer not in simplified:
+                simplified[singer] = to_simplified.convert(singer)
+
+            singer = simplified[singer]
+            if curr_singer == DEFAULT_SINGER:
+                curr_singer = singer
+
+            singer_len = len(singer)
+            if singer_len != len(curr_singer) and singer != CHORUS_SINGER:
+                # 不正常的歌手简称，如：无非想 扮诚实来换舒畅P，其实这是"合唱，本行有2个歌手"这种情况
+                words = f'{curr_singer}{chn_colon}{strip_str}'.split(chn_colon)
+                singer = curr_singer
+                singer_len = len(singer)
+
+            if singer == CHORUS_SINGER:
+                # 排除合唱的歌手：合
+                lines.append(LyricLine(sec, SINGER_INDEX_CHORUS, f'{CHORUS_SINGER}{chn_colon}{words[1]}', words[1]))
+                continue
+
+            if singer not in singers:
+                singers.append(singer)
+
+            if singer != curr_singer:
+                curr_singer = singer
+
+            if len(words) == 2:
+                # 合唱，本行是独唱
+                display, trimmed = f'{curr_singer}{chn_colon}{words[1]}', words[1]
+            else:
+                # 合唱，本行有2个歌手，words[1]是第一个歌手的歌词+第二个歌手的简称
+                singer = words[1][-singer_len:]
+                if singer not in singers:
+                    # 属于括号前没有歌手的情况，歌手为非 curr_singer 的那个歌手
+                    idx = len(singers) - singers.index(curr_singer) - 1
+                    singer = singers[idx]
+                    words[1] += singer
+
+                tl = len(words[1])
+                w1 = words[1][:tl - singer_len]
+                w2 = words[2]
+                display = f'{curr_singer}{chn_colon}{w1}{MULTIPLE_SINGER_SPLITTER}{singer}{chn_colon}{w2}'
+                trimmed = f'{w1} {w2}'
+
+        else:
+            # 独唱歌曲
+            display, trimmed = f'{curr_singer}{chn_colon}{words[0]}', words[0]
+
+        if curr_singer in singers:
+            singer_idx = singers.index(curr_singer)
+        else:
+            singer_idx = SINGER_INDEX_CHORUS if curr_singer == CHORUS_SINGER else SINGER_INDEX_DEFAULT
+
+        lines.append(LyricLine(sec, singer_idx, display, trimmed))
+
+    return lines, singers
+
+
+def parse_lrc(lrc_str, change_lyrics=(), changed_lyrics=()):
+    # 从接口返回的 LRC 原文一步解析到 LyricLine
+    return parse_lyrics(expand_lyrics(normalize_lrc(lrc_str), change_lyrics, changed_lyrics))
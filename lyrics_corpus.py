@@ -0,0 +1,273 @@
+import argparse
+import glob
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from lrc_parser import LyricLine, parse_lrc
+from song_catalog import catalog_key
+
+# 列式歌词库：所有歌的解析结果（LyricLine）按列存在一个文件中，读取时用 mmap 映射，不解码 JSON、不把整个歌词库读进内存
+# 每行歌词：时间（float32）、歌手（int16，为本歌 singers 的下标或 SINGER_INDEX_*）、显示文本和去掉歌手的歌词（UTF-8 缓冲区 + 偏移）
+# 每首歌：在行数组中的起止位置、歌手在全局歌手表中的 ID、歌名、歌手名、网易云歌曲 ID
+# 数值都按小端序存储，各段按 8 字节对齐，可以直接交给 array/memoryview 或 numpy.frombuffer
+# 用法：python lyrics_corpus.py build corpus.lyc "public/assets/*.json"；python lyrics_corpus.py info corpus.lyc
+MAGIC = b'LYRC'
+CORPUS_VERSION = 1
+# 文件头：魔数、版本、歌曲数、歌词行数、歌手数
+HEADER = struct.Struct('<4sIIII')
+# 段表：每段的偏移和元素个数
+SECTION = struct.Struct('<QQ')
+ALIGN = 8
+# 数值列：(名称, array 类型码)
+NUMBER_COLUMNS = [
+    ('line_times', 'f'),
+    ('line_singers', 'h'),
+    ('song_lines', 'I'),
+    ('song_singers', 'I'),
+    ('singer_ids', 'I'),
+]
+# 字符串列，每列分为 <名称>_offsets（uint32，个数为字符串数 + 1）和 <名称>_data（UTF-8）两段
+STRING_COLUMNS = ['text', 'trimmed', 'singer_name', 'song_name', 'artist_name', 'netease_id']
+SECTIONS = NUMBER_COLUMNS + [
+    section for name in STRING_COLUMNS for section in [(f'{name}_offsets', 'I'), (f'{name}_data', 'B')]
+]
+
+
+class StringColumn:
+    # 写入时的字符串列：所有字符串的 UTF-8 连在一个缓冲区里，offsets[i]..offsets[i + 1] 为第 i 个
+    def __init__(self):
+        self.offsets = array('I', [0])
+        self.data = bytearray()
+
+    def append(self, text):
+        self.data += text.encode('utf-8')
+        self.offsets.append(len(self.data))
+
+
+class CorpusWriter:
+    def __init__(self, path):
+        self.path = path
+        self.numbers = {name: array(typecode) for name, typecode in NUMBER_COLUMNS}
+        self.numbers['song_lines'].append(0)
+        self.numbers['song_singers'].append(0)
+        self.strings = {name: StringColumn() for name in STRING_COLUMNS}
+        # 歌手名 -> 全局歌手 ID
+        self.singer_ids = {}
+
+    def __len__(self):
+        return len(self.numbers['song_lines']) - 1
+
+    def add(self, song_name, artist_name, netease_id, lyrics, singers):
+        # lyrics、singers 为 parse_lyrics 的结果
+        numbers = self.numbers
+        for line in lyrics:
+            numbers['line_times'].append(line.sec)
+            numbers['line_singers'].append(line.singer)
+            self.strings['text'].append(line.text)
+            self.strings['trimmed'].append(line.trimmed)
+
+        for singer in singers:
+            if singer not in self.singer_ids:
+                self.singer_ids[singer] = len(self.singer_ids)
+                self.strings['singer_name'].append(singer)
+
+            numbers['singer_ids'].append(self.singer_ids[singer])
+
+        numbers['song_lines'].append(len(numbers['line_times']))
+        numbers['song_singers'].append(len(numbers['singer_ids']))
+        self.strings['song_name'].append(str(song_name))
+        self.strings['artist_name'].append(str(artist_name))
+        self.strings['netease_id'].append(str(netease_id or ''))
+
+    def sections(self):
+        for name, _ in NUMBER_COLUMNS:
+            yield self.numbers[name]
+
+        for name in STRING_COLUMNS:
+            yield self.strings[name].offsets
+            yield self.strings[name].data
+
+    def close(self):
+        # 先写临时文件再替换，读的一方不会看到写了一半的文件
+        table_end = HEADER.size + SECTION.size * len(SECTIONS)
+        offset = aligned(table_end)
+        table = []
+        for values in self.sections():
+            count = len(values)
+            table.append((offset, count))
+            offset = aligned(offset + count * (values.itemsize if isinstance(values, array) else 1))
+
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, CORPUS_VERSION, len(self), len(self.numbers['line_times']), len(self.singer_ids)))
+            for section in table:
+                f.write(SECTION.pack(*section))
+
+            for (start, _), values in zip(table, self.sections()):
+                f.write(b'\0' * (start - f.tell()))
+                if isinstance(values, array) and sys.byteorder != 'little':
+                    values = array(values.typecode, values)
+                    values.byteswap()
+
+                f.write(values)
+
+        os.replace(tmp_path, self.path)
+
+
+def aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+class LyricsCorpus:
+    # 只读打开歌词库；每首歌在访问时才解码，打开本身只读文件头
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = None
+        self.columns = {}
+        self._keys = None
+        magic, version, self.song_count, self.line_count, self.singer_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != CORPUS_VERSION:
+            self.close()
+            raise ValueError(f'不支持的歌词库文件：{path}')
+
+        self._view = view = memoryview(self._mmap)
+        for i, (name, typecode) in enumerate(SECTIONS):
+            offset, count = SECTION.unpack_from(self._mmap, HEADER.size + SECTION.size * i)
+            size = struct.calcsize(typecode)
+            column = view[offset:offset + count * size].cast(typecode)
+            if sys.byteorder != 'little' and size > 1:
+                # 大端机器上不能直接映射，复制一份转换字节序
+                column = array(typecode, column.tobytes())
+                column.byteswap()
+            self.columns[name] = column
+
+    def __len__(self):
+        return self.song_count
+
+    def close(self):
+        for column in self.columns.values():
+            if isinstance(column, memoryview):
+                column.release()
+
+        self.columns = {}
+        if self._view is not None:
+            self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # 调用方还持有列的视图（如 numpy 数组），映射在它们释放后随对象回收
+            pass
+
+        self._file.close()
+
+    def _string(self, name, i):
+        offsets = self.columns[f'{name}_offsets']
+        return self.columns[f'{name}_data'][offsets[i]:offsets[i + 1]].tobytes().decode('utf-8')
+
+    def _strings(self, name, start, end):
+        # 连续的一段字符串只切一次缓冲区
+        offsets = self.columns[f'{name}_offsets']
+        base = offsets[start]
+        data = self.columns[f'{name}_data'][base:offsets[end]].tobytes()
+        return [data[offsets[i] - base:offsets[i + 1] - base].decode('utf-8') for i in range(start, end)]
+
+    def line_range(self, i):
+        # 第 i 首歌在各行数组中的 [起, 止)
+        song_lines = self.columns['song_lines']
+        return song_lines[i], song_lines[i + 1]
+
+    def song_name(self, i):
+        return self._string('song_name', i)
+
+    def artist_name(self, i):
+        return self._string('artist_name', i)
+
+    def singers(self, i):
+        song_singers = self.columns['song_singers']
+        singer_ids = self.columns['singer_ids']
+        return [self._string('singer_name', singer_ids[k]) for k in range(song_singers[i], song_singers[i + 1])]
+
+    def lines(self, i):
+        # 与 parse_lyrics 返回的 LyricLine 列表相同（时间为 float32 精度）
+        start, end = self.line_range(i)
+        times = self.columns['line_times'][start:end].tolist()
+        singers = self.columns['line_singers'][start:end].tolist()
+        texts = self._strings('text', start, end)
+        trimmed = self._strings('trimmed', start, end)
+        return [LyricLine(*line) for line in zip(times, singers, texts, trimmed)]
+
+    def song(self, i):
+        # 字段名与主程序 fetch_song 的结果一致
+        return {
+            'song_name': self.song_name(i),
+            'artist_name': self.artist_name(i),
+            'netease_id': self._string('netease_id', i),
+            'lyrics': self.lines(i),
+            'singers': self.singers(i),
+        }
+
+    def find(self, song_name, artist_name):
+        # 按歌名+歌手（简体、统一括号、大写后）查歌曲下标，没有则为 None；第一次查询时建索引
+        if self._keys is None:
+            # 取数据的线程会并发查询，建好后再赋值，其他线程不会看到一半的索引
+            keys = {}
+            for i in range(self.song_count):
+                keys.setdefault(catalog_key(self.song_name(i), self.artist_name(i)), i)
+            self._keys = keys
+
+        return self._keys.get(catalog_key(song_name, artist_name))
+
+
+def build_from_assets(path, pattern):
+    # 用游戏资源（lyrics-scraper.js 或 export_assets.py 生成的 <歌手>.json）中的 LRC 原文建歌词库
+    writer = CorpusWriter(path)
+    for asset_path in sorted(glob.glob(pattern)):
+        if asset_path.endswith('.index.json'):
+            continue
+
+        with open(asset_path, encoding='utf-8') as f:
+            songs = json.load(f)
+
+        for song in songs:
+            lrc = (song.get('lyrics') or {}).get('lrc')
+            if not lrc:
+                continue
+
+            try:
+                lines, singers = parse_lrc(lrc)
+            except Exception as e:
+                print(f'{os.path.basename(asset_path)} 《{song["name"]}》解析出错，跳过：{e!r}')
+                continue
+
+            writer.add(song['name'], song.get('artist', ''), song.get('id'), lines, singers)
+
+    writer.close()
+    return len(writer)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='列式歌词库')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='用游戏资源 JSON 建歌词库')
+    build.add_argument('path', help='歌词库文件')
+    build.add_argument('assets', nargs='?', default='public/assets/*.json', help='歌词 JSON 文件的 glob')
+    info = commands.add_parser('info', help='显示歌词库的歌曲数、行数和各段大小')
+    info.add_argument('path', help='歌词库文件')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.command == 'build':
+        print(f'{args.path}：{build_from_assets(args.path, args.assets)} 首歌')
+
+    corpus = LyricsCorpus(args.path)
+    print(f'{corpus.song_count} 首歌，{corpus.line_count} 行歌词，{corpus.singer_count} 个歌手，'
+          f'{os.path.getsize(args.path) / 1024:.1f}KB')
+    corpus.close()
@@ -1,62 +1,54 @@
 import os
-import sys
+import re
+import argparse
+import json
 from time import time
 from datetime import datetime
-import re
-import pandas as pd
-import requests
-import zhconv
-import openpyxl
-from comtypes.client import CreateObject
-import win32gui
-from difflib import SequenceMatcher
-import math
+import http_client
+import tracing
+from font_registry import is_font_available
+from response_cache import ResponseCache, DEFAULT_TTL, DEFAULT_MAX_BYTES
+from song_catalog import SongCatalog
+from lyrics_corpus import LyricsCorpus
+from build_manifest import BuildManifest, hash_json, file_hash, lyrics_hash
+from output_shards import ShardWriter, estimate_song_bytes
+from setlist import open_setlist, singer_color_column
+from zh_convert import to_traditional
+from image_cache import ImageCache, fit_image, DEFAULT_DIR as DEFAULT_IMAGE_CACHE_DIR
+from lrc_parser import (
+    EXCLUDED_ROLES,
+    DEFAULT_SINGER,
+    SINGER_LYRIC_SPLITTERS,
+    SINGER_LYRIC_SPLITTER_RE,
+    MULTIPLE_SINGER_SPLITTER,
+    similarity_ratio,
+    normalize_lrc,
+    expand_lyrics,
+    parse_lyrics,
+)
+from renderer import (
+    create_renderer,
+    TemplateSnapshot,
+    RENDERERS,
+    ANIMATIONS,
+    COVER_MODES,
+    EFFECT_MOTION,
+    EFFECT_OPACITY,
+    EFFECT_VISIBILITY,
+    SHAPE_AUTO,
+    SHAPE_PICTURE,
+    TRIGGER_AFTER_PREVIOUS,
+    TRIGGER_ON_CLICK,
+    TRIGGER_WITH_PREVIOUS,
+)
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
 
 
 def cm_to_points(cm):
     return (cm * 72) / 2.54
 
 
-SETTING_SHEET = '全局设置'
-LIST_SHEET = '各歌设置'
-EXCLUDED_ROLES = [
-    '编曲',
-    '制作人',
-    '监制',
-    'OP',
-    'SP',
-    '和音',
-    '录音',
-    '混音',
-    'Mastering',
-    '编程',
-    '键盘',
-    '吉他',
-    '电吉他',
-    '电结他',
-    '贝斯',
-    '鼓',
-    '弦乐编写',
-    '铜管乐编写',
-    '和声编写',
-    '和声',
-    '混音师',
-    '录音室',
-    '混音室',
-    '录音工程师',
-    '母带后期处理录音师',
-    '录音室',
-    '母带后期处理录音室',
-    '基本轨录音工程',
-    '演唱',
-    '主唱',
-]
-DEFAULT_SINGER = '默'
-CHORUS_SINGER = '合'
-TIME_LYRIC_SPLITTER = ']'
-SINGER_LYRIC_SPLITTERS = ['：', ':']
-SINGER_LYRIC_SPLITTER_PATTERN = '|'.join(map(re.escape, SINGER_LYRIC_SPLITTERS))  # 将分隔符数组转换为正则表达式
-MULTIPLE_SINGER_SPLITTER = '___'
 SHOW_LEN_2_PTS = {
     0: {
         'font': 54,
@@ -81,12 +73,81 @@ IS_DYNAMIC_LYRIC = True
 IS_TRADITIONAL = False
 MAX_FONT_SIZE_PT = 54
 LINE_SPACING = 16
+ANIMATION = 'legacy'
+COVER_MODE = 'rebuild'
+# 接口响应缓存，为 None 时不缓存
+response_cache = None
+# 封面图片缓存
+image_cache = ImageCache()
+# 歌曲 ID 目录，为 None 时每首歌都调用搜索接口
+song_catalog = None
+# 列式歌词库，为 None 时歌词都从网易云获取
+lyrics_corpus = None
+# 渲染后端（PowerPoint 或直接写 .pptx）
+renderer = None
+# 多进程渲染时，本进程打开的模板
+template_ppt = None
+# 模板幻灯片的快照（形状、占位符、版式位置），启动时读取一次
+template = None
+
+
+def get_content(url, params=None, is_error=None):
+    # is_error(原文) 为真时是接口的错误响应，缓存只保留一会儿
+    def download():
+        return http_client.get(url, params=params).content
+
+    if response_cache is None:
+        content = download()
+    else:
+        content = response_cache.fetch(url, params, download, is_error)
+
+    tracing.count('bytes', len(content))
+    return content
+
+
+def get_json(url, params=None, is_error=None):
+    # is_error(解析后的数据) 为真时是接口的错误或空响应；不是 JSON 的响应也按错误处理
+    def is_error_body(content):
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return True
+
+        return is_error is not None and is_error(data)
+
+    return json.loads(get_content(url, params, is_error_body))
+
+
+def is_kuwo_search_error(data):
+    return not isinstance(data, dict) or not data.get('abslist')
+
+
+def is_kuwo_lyric_error(data):
+    # 没有 data 才是接口出错；data 中没有 lrclist 是这首歌没有歌词，结果不会变，按正常响应缓存
+    return not isinstance(data, dict) or not isinstance(data.get('data'), dict)
+
+
+def is_netease_error(data):
+    return not isinstance(data, dict) or data.get('code') != 200
+
+
+def get_cover(url):
+    # 封面存在图片缓存里，不再经过接口响应缓存；返回缓存中原图的路径
+    def download():
+        if response_cache is not None and response_cache.offline:
+            # 离线模式下，以前存在接口响应缓存里的封面也可以用
+            return response_cache.fetch(url, None, None)
+
+        content = http_client.get(url).content
+        tracing.count('bytes', len(content))
+        return content
+
+    return image_cache.fetch(url, download)
 
 
 def get_song_info(sid):
-    search_url = f'https://yinyue.kuwo.cn/openapi/v1/www/lyric/getlyric?musicId={sid}'
-    response = requests.get(search_url)
-    return response.json()
+    search_url = 'https://yinyue.kuwo.cn/openapi/v1/www/lyric/getlyric'
+    return get_json(search_url, {'musicId': sid}, is_kuwo_lyric_error)
 
 
 def is_chinese(char):
@@ -100,16 +161,6 @@ def is_all_not_chinese(chars):
     return not any(is_chinese(c) for c in chars)
 
 
-def time_to_seconds(time_str):
-    # 将时间字符串分割成分钟、秒和毫秒部分
-    minutes, rest = time_str.split(':')
-    seconds, milliseconds = rest.split('.')
-
-    # 转换为秒
-    total_seconds = int(minutes) * 60 + int(seconds) + int(milliseconds) / 1000
-    return total_seconds
-
-
 def extract_song(lyrics):
     song_info = {}
     song_info['lyrics'] = []
@@ -120,7 +171,7 @@ def extract_song(lyrics):
         if ' - ' in line_lyric:
             song_info['songName'] = line_lyric.split(' - ')[0]
         else:
-            words = re.split(SINGER_LYRIC_SPLITTER_PATTERN, line_lyric)
+            words = SINGER_LYRIC_SPLITTER_RE.split(line_lyric)
             if len(words) > 1:
                 if any(role in words[0].split(' ')[0].strip() for role in EXCLUDED_ROLES):
                     continue
@@ -159,14 +210,10 @@ def get_from_163(artist_name, song_name):
         "limit": 5  # 返回前 5 条结果
     }
 
-    response = requests.get(url, params=params)
-    return response.json()
+    return get_json(url, params, is_netease_error)
 
 
-def get_dynamic_lyrics(artist_name, song_name, change_lyrics, changed_lyrics, specified_163_id):
-    def similarity_ratio(str1, str2):
-        return SequenceMatcher(None, str1, str2).ratio()
-
+def search_163_id(artist_name, song_name):
     def match_song_artist(x):
         return similarity_ratio(x['name'], song_name) >= 0.4 and 'artists' in x and similarity_ratio(
             x['artists'][0]['name'], artist_name) >= 0.4
@@ -174,495 +221,489 @@ def get_dynamic_lyrics(artist_name, song_name, change_lyrics, changed_lyrics, sp
     def match_song(x):
         return similarity_ratio(x['name'], song_name) >= 0.1
 
-    def is_valid_lyric(x):
-        # Lambda 表达式，用于匹配格式 "[00:21xx]abc"
-        pattern = r"^\[\d{2}:\d{2}.*\].+"
-        return re.match(pattern, x)
-
-    def replace_lyrics(arr, change_lyrics, changed_lyrics):
-        # 替换某些古怪的歌词：如记忆棉最后一句“——-”
-        result = []
-        for item in arr:
-            # 用']'分割字符串
-            parts = item.split(TIME_LYRIC_SPLITTER)
-            if len(parts) > 1:
-                # 歌词会有些形如“[01:50.67][00:36.57]谁伴我 冒险跳下爱河”
-                # 最后部分为歌词，把它的中文空格转为英文空格
-                prefix, lyric = parts[0], parts[-1].replace("　", " ").strip()
-                if any(role in re.split(SINGER_LYRIC_SPLITTER_PATTERN, lyric)[0].strip() for role in EXCLUDED_ROLES + ['作词', '作曲']):
-                    # 排除形如 [00:05.0]编曲：Johnny Yim 的歌词
-                    continue
-
-                # 如果歌词在 change_lyrics 中，进行替换
-                for i, change_lyric in enumerate(change_lyrics):
-                    if similarity_ratio(change_lyric, lyric) >= 0.8:
-                        lyric = changed_lyrics[i]
-                        break
-
-                for part in parts[:-1]:
-                    result.append(f"{part}{TIME_LYRIC_SPLITTER}{lyric}")
+    # 只在有歌曲和歌手都匹配的结果里找最小的id
+    res = get_from_163(artist_name, song_name)
+    # 过滤没有时间的行
+    songs = list(filter(match_song_artist, res['result']['songs']))
+    if len(songs) == 0:
+        # 如《遗物 - (TVB电视剧《法外风云》主题曲)》这种歌如果加上歌手会搜不到，所以减少歌手再找一次
+        res = get_from_163('', song_name)
+        songs = list(filter(match_song, res['result']['songs']))
 
-            else:
-                # 若无法分割，直接添加到结果数组
-                result.append(item)
+    song = min(songs, key=lambda s: s['id'])
+    return str(song['id'])
 
-        # 把歌词根据时间排序
-        return sorted(result)
 
+def get_dynamic_lyrics(artist_name, song_name, change_lyrics, changed_lyrics, netease_id):
     params = {
-        "id": specified_163_id,
+        "id": netease_id,
     }
-    if not specified_163_id:
-        # 只在有歌曲和歌手都匹配的结果里找最小的id
-        res = get_from_163(artist_name, song_name)
-        # 过滤没有时间的行
-        songs = list(filter(match_song_artist, res['result']['songs']))
-        if len(songs) == 0:
-            # 如《遗物 - (TVB电视剧《法外风云》主题曲)》这种歌如果加上歌手会搜不到，所以减少歌手再找一次
-            res = get_from_163('', song_name)
-            songs = list(filter(match_song, res['result']['songs']))
-
-        song = min(songs, key=lambda s: s['id'])
-        params = {
-            "id": song['id'],
-        }
-
     url = 'http://music.163.com/api/song/media'
-    response = requests.get(url, params=params)
-    # 转换括号，修复一些typo
-    lrc_str = response.json()['lyric'].replace('（(', '（').replace('（', '(').replace('）', ')').replace('\\u3000', ' ')
-    tmp_lrcs = lrc_str.split('\n')
-    lrcs = []
-    for i, tmp_lrc in enumerate(tmp_lrcs):
-        if is_valid_lyric(tmp_lrc):
-            lrcs.append(tmp_lrc)
-        elif tmp_lrc.strip() != '' and tmp_lrc.find('[') == -1:
-            # 如果没有时间戳，添加
-            lrcs.append(f'[00:00.{str(i).zfill(2)}]' + tmp_lrc)
-
-    print(song_name, params, lrcs)
-
-    # 过滤没有时间的行
-    return replace_lyrics(list(filter(is_valid_lyric, lrcs)), change_lyrics, changed_lyrics)
+    with tracing.span('netease_fetch'):
+        lrc_str = get_json(url, params, is_netease_error)['lyric']
 
+    with tracing.span('lyric_parse') as counts:
+        lrcs = normalize_lrc(lrc_str)
+        counts['lines'] = len(lrcs)
 
-# 检查字体是否在系统中可用
-def is_font_available(font_name):
-    # 回调函数，用于添加字体名称
-    def enum_font_callback(logfont, textmetric, font_type, font_list):
-        font_list.append(logfont.lfFaceName)
-        return True
+        return expand_lyrics(lrcs, change_lyrics, changed_lyrics)
 
-    # 获取系统中的字体
-    def get_system_fonts():
-        fonts = []
-        # 使用 EnumFontFamilies 函数枚举字体
-        hdc = win32gui.GetDC(0)  # 获取屏幕的设备上下文
-        win32gui.EnumFontFamilies(hdc, None, enum_font_callback, fonts)
-        win32gui.ReleaseDC(0, hdc)  # 释放设备上下文
-        return sorted(set(fonts))  # 去重并排序
 
-    # 检查字体名称是否在可用字体列表中
-    return font_name in get_system_fonts()
+def multi_singer_title(song_name, singers):
+    # 多个歌手时的歌名行，返回 (歌手之前的部分, 整行)；歌手之间用空格隔开
+    pfx = f'{song_name}（歌手及颜色：'
+    sfx = '合唱）'
+    return pfx, pfx + ''.join(f'{singer} ' for singer in singers) + sfx
 
 
 def add_textbox(slide, shape, left, top, width, height, text, font_pt, solo_colors, chorus_color, cover_color, singers=None):
     def conv_chn(lyric):
-        return zhconv.convert(lyric, 'zh-hk') if IS_TRADITIONAL else lyric
+        # 整首歌的歌词已在 generate_ppt 中一次转换好，这里基本都是从 LRU 中取
+        return to_traditional.convert(lyric) if IS_TRADITIONAL else lyric
 
     # 定义 PowerPoint 对齐常量
     ppAlignLeft = 1
     ppAlignCenter = 2
 
-    template_font = shape.TextFrame.TextRange.Font
-    tb = slide.Shapes.AddTextbox(
-        Orientation=1,  # msoTextOrientationHorizontal
-        Left=left,
-        Top=top,
-        Width=width,
-        Height=height,
-    )
-    tb.Rotation = shape.Rotation
-    tf = tb.TextFrame
+    tb = renderer.add_textbox(slide, left, top, width, height)
+    renderer.set_rotation(tb, shape.rotation)
     # 中文空格转为英文空格
     strip_str = text.strip()
+    # 字体有可能本机没有装，要先从 https://freefonts.top/font/60a5feb12b07ed2b26d4e1dd 下载安装，否则打开文件选取文字时会改变字体
+    # 检查字体是否可用
+    # Font.Name设置的仅为拉丁字体，因此中文字符可能未受到影响
+    # 要确保中文字体生效需要设置 Font.NameFarEast 属性
+    font_name = shape.font_name
+    if not is_font_available(font_name):
+        font_name = "宋体"  # 使用默认字体
+
+    # 先算好最终的文字和各段文字的颜色，再一次设置到文本框，每次设置都是一次 COM 调用
+    # color 为整个文本框的颜色，runs 为 [(开始位置, 长度, 颜色)]，位置从 1 开始
+    color = None
+    runs = []
     is_song_name = False
-    for i, _ in enumerate(strip_str.split('\n')):
-        # 字体有可能本机没有装，要先从 https://freefonts.top/font/60a5feb12b07ed2b26d4e1dd 下载安装，否则打开文件选取文字时会改变字体
-        # 检查字体是否可用
-        # Font.Name设置的仅为拉丁字体，因此中文字符可能未受到影响
-        # 要确保中文字体生效需要设置 Font.NameFarEast 属性
-        if is_font_available(template_font.Name):
-            tf.TextRange.Font.Name = template_font.Name
-            tf.TextRange.Font.NameFarEast = template_font.Name
+    # 转换中文简繁
+    if singers is None:
+        # 封面
+        s = conv_chn(strip_str)
+        color = cover_color
+    elif strip_str.find(SINGER_LYRIC_SPLITTERS[0]) == -1:
+        # 没有歌手，意味着是 歌名
+        is_song_name = True
+        if len(singers) == 0:
+            # 单个歌手，直接显示歌名
+            s = conv_chn(strip_str)
         else:
-            tf.TextRange.Font.Name = "宋体"  # 使用默认字体
-            tf.TextRange.Font.NameFarEast = "宋体"  # 使用默认字体
-
-        tf.TextRange.Font.Size = font_pt
-        tf.TextRange.Font.Bold = template_font.Bold
-        tf.TextRange.Font.Italic = template_font.Italic
-        tf.TextRange.Font.Underline = template_font.Underline
-        # 转换中文简繁
-        if singers is None:
-            # 封面
-            tf.TextRange.Text = conv_chn(strip_str)
-            tf.TextRange.Font.Color.RGB = cover_color
-        else:
-            if strip_str.find(SINGER_LYRIC_SPLITTERS[0]) == -1:
-                # 没有歌手，意味着是 歌名
-                is_song_name = True
-                if len(singers) == 0:
-                    # 单个歌手，直接显示歌名
-                    tf.TextRange.Text = conv_chn(strip_str)
-                else:
-                    # 多个歌手，本行是：歌名（歌手颜色：歌手1 歌手2。。） 这个格式，歌手1 2。。用不同颜色
-                    pfx = f'{strip_str}（歌手及颜色：'
-                    pos = len(pfx)
-                    s = ''
-                    for j, singer in enumerate(singers):
-                        # +1意味着用空格隔开
-                        l = len(singer) + 1
-                        s += singer + ' '
-                        pos += l
-
-                    sfx = '合唱）'
-                    s = pfx + s + sfx
-                    tf.TextRange.Text = conv_chn(s)
-                    pos = len(pfx) + 1
-                    for j, singer in enumerate(singers):
-                        l = len(singer)
-                        chars = tf.TextRange.Characters(pos, l)
-                        chars.Font.Color.RGB = solo_colors[j]
-                        # +1意味着用空格隔开
-                        pos += l + 1
-
-                    chars = tf.TextRange.Characters(pos, 2)
-                    chars.Font.Color.RGB = chorus_color
-
+            # 多个歌手，本行是：歌名（歌手颜色：歌手1 歌手2。。） 这个格式，歌手1 2。。用不同颜色
+            pfx, title = multi_singer_title(strip_str, singers)
+            s = conv_chn(title)
+            pos = len(pfx) + 1
+            for j, singer in enumerate(singers):
+                runs.append((pos, len(singer), solo_colors[j]))
+                # +1意味着用空格隔开
+                pos += len(singer) + 1
+
+            runs.append((pos, 2, chorus_color))
+    else:
+        # 有歌手，意味着是 歌词
+        ws = []
+        pos = 1
+        for word in strip_str.split(MULTIPLE_SINGER_SPLITTER):
+            [singer, lyric] = SINGER_LYRIC_SPLITTER_RE.split(word)
+            ws.append(conv_chn(lyric))
+            if singer == DEFAULT_SINGER:
+                # 整个文本框的颜色，覆盖前面各段的颜色
+                color = solo_colors[0]
+                runs = []
             else:
-                # 有歌手，意味着是 歌词
-                words = strip_str.split(MULTIPLE_SINGER_SPLITTER)
-                ws = []
-                for word in words:
-                    [_, lyric] = re.split(SINGER_LYRIC_SPLITTER_PATTERN, word)
-                    s = conv_chn(lyric)
-                    ws.append(s)
-
-                tf.TextRange.Text = ' '.join(ws)
-
-                pos = 1
-                for word in words:
-                    [singer, lyric] = re.split(SINGER_LYRIC_SPLITTER_PATTERN, word)
-                    if singer == DEFAULT_SINGER:
-                        tf.TextRange.Font.Color.RGB = solo_colors[0]
-                    else:
-                        chars = tf.TextRange.Characters(pos, len(lyric))
-                        try:
-                            idx = singers.index(singer)
-                            # 找得到歌手，意味着不是合唱
-                            chars.Font.Color.RGB = solo_colors[idx]
-                        except Exception:
-                            # 找不到歌手，意味着是合唱
-                            chars.Font.Color.RGB = chorus_color
-
-                    # 要用空格连起来，所以+1
-                    pos += len(lyric) + 1
-
-        source_alignment = shape.TextFrame.TextRange.ParagraphFormat.Alignment
-        if IS_DYNAMIC_LYRIC:
-            tf.TextRange.ParagraphFormat.Alignment = source_alignment
-        else:
-            tf.TextRange.ParagraphFormat.Alignment = ppAlignCenter if is_song_name else ppAlignLeft
+                idx = singers.index(singer) if singer in singers else -1
+                # 找得到歌手，意味着不是合唱；找不到歌手，意味着是合唱
+                runs.append((pos, len(lyric), solo_colors[idx] if 0 <= idx < len(solo_colors) else chorus_color))
+
+            # 要用空格连起来，所以+1
+            pos += len(lyric) + 1
+
+        s = ' '.join(ws)
+
+    if IS_DYNAMIC_LYRIC:
+        alignment = shape.alignment
+    else:
+        alignment = ppAlignCenter if is_song_name else ppAlignLeft
 
+    font = (font_name, font_pt, shape.bold, shape.italic, shape.underline)
+    renderer.set_styled_text(tb, s, font, color, runs, alignment)
     return tb
 
 
 def add_animation(slide, idx, shapes, distance, formatted_lyrics):
-    msoAnimTriggerOnPageClick = 1
-    msoAnimTriggerAfterPrevious = 3
-    msoAnimEffectPathUp = 148
-    msoAnimTypeNone = 0
-    msoAnimTypeMotion = 1
-    # 要分别用 msoAnimOpacity 和 msoAnimVisibility 控制显示/隐藏
-    msoAnimTypeProperty = 5
-    msoAnimOpacity = 5
-    msoAnimVisibility = 8
-    msoAnimShapeFillOpacity = 1006
     # 最顶的歌词，在上一动画后，显示歌词时长，然后消失
-    effect = slide.TimeLine.MainSequence.AddEffect(
-        shapes[0],
-        effectId=msoAnimTypeNone,
-        trigger=msoAnimTriggerAfterPrevious,
-    )
-    behavior = effect.Behaviors.Add(msoAnimTypeProperty)
-    behavior.PropertyEffect.Property = msoAnimOpacity
-    effect.Timing.Duration = (formatted_lyrics[idx + 1]['sec'] - formatted_lyrics[idx]['sec']) if idx <= len(formatted_lyrics) - 2 else 9999
-
-    effect = slide.TimeLine.MainSequence.AddEffect(
-        shapes[0],
-        effectId=msoAnimTypeNone,
-        # 第一行歌词，点击后才开始动画
-        trigger=msoAnimTriggerOnPageClick if idx == 0 else msoAnimTriggerAfterPrevious,
-    )
-    behavior = effect.Behaviors.Add(msoAnimTypeProperty)
-    behavior.PropertyEffect.Property = msoAnimVisibility
-    effect.Timing.Duration = 0
+    duration = (formatted_lyrics[idx + 1].sec - formatted_lyrics[idx].sec) if idx <= len(formatted_lyrics) - 2 else 9999
+    renderer.add_effect(slide, shapes[0], EFFECT_OPACITY, TRIGGER_AFTER_PREVIOUS, duration)
+    # 第一行歌词，点击后才开始动画
+    trigger = TRIGGER_ON_CLICK if idx == 0 else TRIGGER_AFTER_PREVIOUS
+    renderer.add_effect(slide, shapes[0], EFFECT_VISIBILITY, trigger, 0)
 
     # 其他歌词，在上一动画后上移
     for shape in shapes[1:]:
-        effect = slide.TimeLine.MainSequence.AddEffect(
-            shape,
-            effectId=msoAnimEffectPathUp,
-            trigger=msoAnimTriggerAfterPrevious,
-        )
         # 设置路径动画的属性——移动距离 = idx==0时的y到当前的y * 0.25，上移是负数
-        behavior = effect.Behaviors.Add(msoAnimTypeMotion)
-        behavior.MotionEffect.ByX = 0
-        behavior.MotionEffect.ByY = -distance * (idx + 1) * 0.25
-        effect.Timing.Duration = 0
+        renderer.add_effect(slide, shape, EFFECT_MOTION, TRIGGER_AFTER_PREVIOUS, 0, by_y=-distance * (idx + 1) * 0.25)
+
+
+def add_linear_animation(slide, shapes, distance, formatted_lyrics):
+    # 与逐行调用 add_animation 的滚动效果相同，但每行歌词只用一个关键帧移动效果和一个消失效果
+    if not shapes:
+        return
+
+    def line_duration(idx):
+        return (formatted_lyrics[idx + 1].sec - formatted_lyrics[idx].sec) if idx <= len(formatted_lyrics) - 2 else 9999
+
+    # 第一行歌词显示歌词时长，点击后消失，其余效果都以这次点击为起点
+    renderer.add_effect(slide, shapes[0], EFFECT_OPACITY, TRIGGER_AFTER_PREVIOUS, line_duration(0))
+    renderer.add_effect(slide, shapes[0], EFFECT_VISIBILITY, TRIGGER_ON_CLICK, 0)
+
+    # 第 i 行歌词消失的时间，同时它下面的歌词都上移一次
+    hide_times = [0]
+    for i in range(1, len(shapes)):
+        hide_times.append(hide_times[-1] + line_duration(i))
+
+    # 每次上移的磅数（by_y 为幻灯片高度的百分比）
+    step_pt = distance * 0.25 / 100 * template.slide_height
+    for j in range(1, len(shapes)):
+        # 第 j 行在前 j 行消失时各上移一次，移动距离与 add_animation 相同（相对原位置）
+        # 在幻灯片下边缘以下、上边缘以上时都看不到：进入幻灯片前的上移不加关键帧，进入的那次直接跳到位；
+        # 移出上边缘后不再移动。每行的关键帧数不超过一屏能经过的次数，总数随行数线性增长；两头各多保留一次，避免计算误差
+        top = PADDING_TOP + (j + 1) * distance
+        first, last = 0, j - 1
+        if step_pt > 0:
+            first = min(max(int((top - template.slide_height) // step_pt) - 1, 0), j - 1)
+            last = max(min(int((top + distance) // step_pt) + 1, j - 1), first)
+
+        steps = [(hide_times[k] - hide_times[first], -distance * (k + 1) * 0.25) for k in range(first, last + 1)]
+        renderer.add_step_motion(slide, shapes[j], TRIGGER_WITH_PREVIOUS, steps, delay=hide_times[first])
+        renderer.add_effect(slide, shapes[j], EFFECT_VISIBILITY, TRIGGER_WITH_PREVIOUS, 0, delay=hide_times[j])
+
+
+def score_kuwo_candidate(info, song, song_name, artist_name):
+    if 'lrclist' not in song['data']:
+        # 没有歌词的，不采用
+        return -1
+
+    has_lyricist = False
+    has_composer = False
+    for item in song['data']['lrclist']:
+        # 没有词曲的，不采用
+        if item['lineLyric'].find('词') != -1:
+            has_lyricist = True
+
+        if item['lineLyric'].find('曲') != -1:
+            has_composer = True
+
+    if not has_lyricist or not has_composer:
+        return -1
+
+    # 符合以下条件的歌词，每符合一个条件加分：
+    # 1. 歌手名匹配
+    # 2. 歌名匹配
+    # 3. 网站有MV
+    score = 0
+    arr1 = artist_name.upper().split('&')
+    arr2 = info['FARTIST'].upper().split('&')
+    if sorted(arr1) == sorted(arr2):
+        score += 1
+
+    file_song_name = song_name.strip().replace('（', '(').replace('）', ')').upper()
+    web_song_name = info['SONGNAME'].strip().replace('（', '(').replace('）', ')').upper()
+    if file_song_name == web_song_name:
+        score += 1
+
+    if info['MVFLAG'] == '1':
+        score += 1
+
+    return score
+
+
+def resolve_kuwo_song(infos, song_name, artist_name, specified_kuwo_id):
+    # 在前5个搜索结果中选出最合适的歌曲，返回 (结果下标, 该歌的歌词响应)
+    candidates = infos[:5]
+    if len(candidates) == 0:
+        raise ValueError(f'酷我音乐搜索不到：{song_name} {artist_name}')
+
+    for i, info in enumerate(candidates):
+        if info['DC_TARGETID'] == specified_kuwo_id:
+            # 匹配指定的酷我音乐id，直接使用该sid，其他候选不用再请求
+            return i, get_song_info(specified_kuwo_id)
+
+    # 并发获取各候选的歌词，选中的那首直接复用，不再重复请求
+    with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+        songs = list(executor.map(get_song_info, [info['DC_TARGETID'] for info in candidates]))
+
+    scores = [score_kuwo_candidate(info, song, song_name, artist_name) for info, song in zip(candidates, songs)]
+    idx = scores.index(max(scores))
+    return idx, songs[idx]
+
 
+def resolve_song(row, row_idx):
+    # 只做网络请求和数据准备，不碰 PowerPoint，可以在线程池里并发执行
+    with tracing.song(row_idx + 2, str(row['歌曲']), 'resolve'):
+        return fetch_song(row, row_idx)
 
-def generate_ppt(new_ppt, row, row_idx):
+
+def fetch_song(row, row_idx):
     song_name = str(row['歌曲'])
     artist_name = str(row['歌手'])
     singer_cnt = row['歌手数量']
-    cover_color = get_setting_color(file_path, LIST_SHEET, '封面字体颜色', row_idx + 2)
-    chorus_color = get_setting_color(file_path, LIST_SHEET, '合唱歌词颜色', row_idx + 2)
+    row_colors = row['colors']
+    cover_color = row_colors['封面字体颜色']
+    chorus_color = row_colors['合唱歌词颜色']
     solo_colors = []
-    change_lyrics = str(row['要修改的歌词']).split('\n')
-    changed_lyrics = str(row['修改后歌词']).split('\n')
-    specified_kuwo_id = str(int(row['指定酷我音乐歌曲ID'])) if not math.isnan(row['指定酷我音乐歌曲ID']) else ''
-    specified_163_id = str(int(row['指定网易云歌曲ID'])) if not math.isnan(row['指定网易云歌曲ID']) else ''
+    change_lyrics = row['要修改的歌词'].split('\n') if row['要修改的歌词'] else []
+    changed_lyrics = row['修改后歌词'].split('\n') if row['修改后歌词'] else []
+    specified_kuwo_id = row['指定酷我音乐歌曲ID']
+    specified_163_id = row['指定网易云歌曲ID']
     for i in list(range(singer_cnt)):
-        solo_colors.append(get_setting_color(file_path, LIST_SHEET, f'歌手{i + 1}歌词颜色', row_idx + 2))
-
-    # 搜索歌曲ID
-    search_url = f'https://yinyue.kuwo.cn/search/searchMusicBykeyWord?vipver=1&client=kt&ft=music&cluster=0&strategy=2012&encoding=utf8&rformat=json&mobi=1&issubtitle=1&show_copyright_off=1&pn=0&rn=20&all={song_name} {artist_name}'
-    response = requests.get(search_url)
-    infos = response.json()['abslist']
-    scores = []
-    for i in range(0, min(5, len(infos))):
-        score = 0
-        sid = infos[i]['DC_TARGETID']
-        if sid == specified_kuwo_id:
-            # 匹配指定的酷我音乐id，直接使用该sid
-            score = 99999
-            scores.append(score)
-            break
+        solo_colors.append(row_colors[singer_color_column(i)])
+
+    # 目录里有这首歌时，直接用上次选中的 ID，不再搜索；指定的 ID 与目录不同时以指定的为准
+    entry = song_catalog.get(song_name, artist_name) if song_catalog is not None else None
+    kuwo_id = albumpic = netease_id = ''
+    if entry is not None and entry.get('kuwo_id') and specified_kuwo_id in ('', entry['kuwo_id']):
+        kuwo_id = entry['kuwo_id']
+        albumpic = entry.get('kuwo_albumpic', '')
+        with tracing.span('kuwo_candidates', catalog=True):
+            song = get_song_info(kuwo_id)
+    else:
+        # 搜索歌曲ID
+        search_url = 'https://yinyue.kuwo.cn/search/searchMusicBykeyWord'
+        search_params = {
+            'vipver': 1,
+            'client': 'kt',
+            'ft': 'music',
+            'cluster': 0,
+            'strategy': 2012,
+            'encoding': 'utf8',
+            'rformat': 'json',
+            'mobi': 1,
+            'issubtitle': 1,
+            'show_copyright_off': 1,
+            'pn': 0,
+            'rn': 20,
+            'all': f'{song_name} {artist_name}',
+        }
+        with tracing.span('kuwo_search'):
+            infos = get_json(search_url, search_params, is_kuwo_search_error)['abslist']
 
-        song = get_song_info(sid)
-        if 'lrclist' not in song['data']:
-            # 没有歌词的，不采用
-            score = -1
-            scores.append(score)
-            continue
-
-        has_lyricist = False
-        has_composer = False
-        for item in song['data']['lrclist']:
-            # 没有词曲的，不采用
-            if item['lineLyric'].find('词') != -1:
-                has_lyricist = True
-
-            if item['lineLyric'].find('曲') != -1:
-                has_composer = True
-
-        if not has_lyricist or not has_composer:
-            score = -1
-            scores.append(score)
-            continue
-
-        # 符合以下条件的歌词，每符合一个条件加分：
-        # 1. 歌手名匹配
-        # 2. 歌名匹配
-        # 3. 网站有MV
-        arr1 = artist_name.upper().split('&')
-        arr2 = infos[i]['FARTIST'].upper().split('&')
-        if sorted(arr1) == sorted(arr2):
-            score += 1
-
-        file_song_name = song_name.strip().replace('（', '(').replace('）', ')').upper()
-        web_song_name = infos[i]['SONGNAME'].strip().replace('（', '(').replace('）', ')').upper()
-        if file_song_name == web_song_name:
-            score += 1
-
-        if infos[i]['MVFLAG'] == '1':
-            score += 1
-
-        scores.append(score)
+        with tracing.span('kuwo_candidates', candidates=min(len(infos), 5)):
+            idx, song = resolve_kuwo_song(infos, song_name, artist_name, specified_kuwo_id)
 
-    idx = scores.index(max(scores))
-    sid = infos[idx]['DC_TARGETID']
-    song = get_song_info(sid)
-    # 把唱片封面改成700*700（酷我封面的最大值）
-    album_cover = f"https://img1.kuwo.cn/star/albumcover/{infos[idx]['web_albumpic_short']}".replace('/120/', '/700/')
-    response = requests.get(album_cover)
-    # 保存图片到本地文件
-    with open('tmp.jpg', 'wb') as file:
-        file.write(response.content)
+        kuwo_id = infos[idx]['DC_TARGETID']
+        albumpic = infos[idx]['web_albumpic_short']
 
     if 'lrclist' in song['data']:
         song_info = extract_song(song['data']['lrclist'])
     else:
         song_info = {}
 
-    slides, layout = get_last_layout(new_ppt)
-    template_song_slide = slides[1]
-    template_lyric_slide = slides[2]
+    cover = None
+    lyrics = []
+    singers = []
     if IS_DYNAMIC_LYRIC:
-        # 处理歌曲封面
-        slide = slides.AddSlide(slides.Count + 1, layout)
-        for shape in template_song_slide.shapes:
-            # 获取图形的位置和大小
-            left = shape.left
-            top = shape.top
-            width = shape.width
-            height = shape.height
-            if shape.HasTextFrame:  # msoTextBox
-                text = shape.TextFrame.TextRange.Text
-                if text.find('<歌名>') != -1:
-                    text = text.replace('<歌名>', song_info['songName'] if 'songName' in song_info else '')
-                if text.find('<歌手>') != -1:
-                    text = text.replace('<歌手>', artist_name)
-                if text.find('<作曲人>') != -1:
-                    text = text.replace('<作曲人>', song_info['composer'] if 'composer' in song_info else '')
-                if text.find('<作词人>') != -1:
-                    text = text.replace('<作词人>', song_info['lyricist'] if 'lyricist' in song_info else '')
-
-                add_textbox(slide, shape, left, top, width, height, text, shape.TextFrame.TextRange.Font.Size, solo_colors, chorus_color, cover_color)
-
-            # 判断形状类型是否为 AutoShape 或 Picture
-            elif shape.Type == 1:  # msoAutoShape
-                # 添加一个新的 AutoShape 到幻灯片
-                new_shape = slide.Shapes.AddShape(
-                    1,  # msoShapeRectangle (示例形状)
-                    Left=left,
-                    Top=top,
-                    Width=width,
-                    Height=height,
-                )
-                new_shape.Fill.ForeColor.RGB = shape.Fill.ForeColor.RGB
-
-            elif shape.Type == 13:  # msoPicture
-                # 添加一个新的图片到幻灯片
-                picture_path = f"{os.getcwd()}/tmp.jpg"  # 指定图片路径
-                slide.Shapes.AddPicture(
-                    picture_path,
-                    LinkToFile=False,
-                    SaveWithDocument=True,
-                    Left=left,
-                    Top=top,
-                    Width=width,
-                    Height=height,
-                )
+        # 封面图只在动态歌词的封面页用到
+        # 把唱片封面改成700*700（酷我封面的最大值）
+        album_cover = f"https://img1.kuwo.cn/star/albumcover/{albumpic}".replace('/120/', '/700/')
+        with tracing.span('cover_download'):
+            cover = get_cover(album_cover)
+
+    if not (IS_DYNAMIC_LYRIC and IS_COVER_ONLY):
+        stored = find_stored_lyrics(song_name, artist_name, change_lyrics, specified_163_id)
+        if stored is not None:
+            netease_id, lyrics, singers = stored
+        else:
+            netease_id = specified_163_id or (entry or {}).get('netease_id')
+            if not netease_id:
+                with tracing.span('netease_search'):
+                    netease_id = search_163_id(artist_name, song_name)
+
+            lyrics = get_dynamic_lyrics(artist_name, song_name, change_lyrics, changed_lyrics, netease_id)
+            with tracing.span('lyric_parse') as counts:
+                lyrics, singers = parse_lyrics(lyrics)
+                counts['lines'] = len(lyrics)
+
+    if song_catalog is not None:
+        # 全部获取成功后才记录
+        song_catalog.update(song_name, artist_name, kuwo_id=kuwo_id, kuwo_albumpic=albumpic, netease_id=netease_id)
+
+    return {
+        'row_idx': row_idx,
+        # 本行所有设置（含颜色）的哈希，用于增量生成；不含行号，调整歌曲顺序后仍可复用
+        'settings_hash': hash_json({k: v for k, v in row.items() if k != 'row'}),
+        'kuwo_id': kuwo_id,
+        'netease_id': netease_id,
+        'song_name': song_name,
+        'artist_name': artist_name,
+        'cover_color': cover_color,
+        'chorus_color': chorus_color,
+        'solo_colors': solo_colors,
+        'song_info': song_info,
+        'cover': cover,
+        'lyrics': lyrics,
+        'singers': singers,
+    }
 
-        if IS_COVER_ONLY:
-            return new_ppt
+
+def find_stored_lyrics(song_name, artist_name, change_lyrics, specified_163_id):
+    # 歌词库里有这首歌时直接用解析好的歌词，返回 (网易云歌曲 ID, 歌词, 歌手)，否则返回 None
+    # 要修改歌词的行仍从网易云获取（修改在解析前进行）；指定的网易云 ID 与歌词库不同时以指定的为准
+    if lyrics_corpus is None or change_lyrics:
+        return None
+
+    idx = lyrics_corpus.find(song_name, artist_name)
+    if idx is None:
+        return None
+
+    with tracing.span('corpus_read') as counts:
+        song = lyrics_corpus.song(idx)
+        if specified_163_id and specified_163_id != song['netease_id']:
+            return None
+
+        counts['lines'] = len(song['lyrics'])
+        return song['netease_id'], song['lyrics'], song['singers']
+
+
+def resolve_song_or_error(row, row_idx):
+    # 出错时不中断整个歌单，把错误记在结果里，由调用方按行汇报
+    try:
+        return resolve_song(row, row_idx)
+    except Exception as e:
+        return {'row_idx': row_idx, 'song_name': str(row['歌曲']), 'error': e}
+
+
+def prefetch_songs(rows, jobs, resolve=resolve_song):
+    # rows 为 (索引, 行) 的迭代器；用线程池并发获取各歌数据，按原顺序逐个交给渲染
+    # 最多同时预取 jobs * 4 首，避免长歌单一次占用过多内存
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    pending = deque()
+    rows = iter(rows)
+
+    def submit_next():
+        item = next(rows, None)
+        if item is not None:
+            index, row = item
+            pending.append(executor.submit(resolve, row, index))
+
+    try:
+        for _ in range(jobs * 4):
+            submit_next()
+
+        while pending:
+            song = pending.popleft().result()
+            submit_next()
+            yield song
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def cover_placeholder_values(song):
+    song_info = song['song_info']
+    return {
+        '<歌名>': song_info['songName'] if 'songName' in song_info else '',
+        '<歌手>': song['artist_name'],
+        '<作曲人>': song_info['composer'] if 'composer' in song_info else '',
+        '<作词人>': song_info['lyricist'] if 'lyricist' in song_info else '',
+    }
+
+
+def cover_text(shape, placeholder_values):
+    # 快照中已记下文字里有哪些占位符
+    text = shape.text
+    for placeholder in shape.placeholders:
+        text = text.replace(placeholder, placeholder_values[placeholder])
+
+    return text
+
+
+def add_cover_slide(new_ppt, layout, template_shapes, song):
+    cover_color = song['cover_color']
+    chorus_color = song['chorus_color']
+    solo_colors = song['solo_colors']
+
+    # 处理歌曲封面
+    slide = renderer.add_slide(new_ppt, layout)
+    placeholder_values = cover_placeholder_values(song)
+    for shape in template_shapes:
+        # 获取图形的位置和大小
+        left = shape.left
+        top = shape.top
+        width = shape.width
+        height = shape.height
+        if shape.has_text_frame:  # msoTextBox
+            text = cover_text(shape, placeholder_values)
+            add_textbox(slide, shape, left, top, width, height, text, shape.font_size, solo_colors, chorus_color, cover_color)
+
+        # 判断形状类型是否为 AutoShape 或 Picture
+        elif shape.type == SHAPE_AUTO:
+            # 添加一个新的 AutoShape 到幻灯片（矩形）
+            renderer.add_rectangle(slide, left, top, width, height, shape.fill_rgb)
+
+        elif shape.type == SHAPE_PICTURE:
+            # 添加一个新的图片到幻灯片，图片先缩小到图片框的大小
+            picture_path = fit_image(song['cover'], width, height)
+            renderer.add_picture(slide, picture_path, left, top, width, height)
+
+
+def template_text_pieces(shape):
+    # 模板文字中占位符以外的各段，按段落分开（替换文字不跨段落）
+    text = shape.text
+    for placeholder in shape.placeholders:
+        text = text.replace(placeholder, '\n')
+
+    return [piece for piece in re.split(r'[\r\n\v]+', text) if piece.strip()]
+
+
+def clone_cover_slide(new_ppt, template_shapes, song):
+    # 复制模板的封面页（第 1 张），只替换占位符文字和封面图片，形状的样式、位置、层次都与模板相同
+    slide = renderer.clone_slide(new_ppt, 1)
+    placeholder_values = cover_placeholder_values(song)
+    if IS_TRADITIONAL:
+        # 与 rebuild 模式一样，填入的内容和模板中原有的文字都转换成繁体；模板文字每首歌都一样，基本都从 LRU 中取
+        placeholder_values = dict(zip(placeholder_values, to_traditional.convert_many(placeholder_values.values())))
+
+    for i, shape in enumerate(template_shapes, 1):
+        if shape.has_text_frame:
+            # 占位符出现几次就替换几次
+            replacements = [(p, placeholder_values[p]) for p in shape.placeholders for _ in range(shape.text.count(p))]
+            if IS_TRADITIONAL:
+                # 模板文字按段替换成繁体，各段保留原来的格式；先换占位符，免得模板文字匹配到占位符里面
+                for piece in template_text_pieces(shape):
+                    converted = to_traditional.convert(piece)
+                    if converted != piece:
+                        replacements.append((piece, converted))
+
+            # 与 rebuild 模式一样，封面的文字都用封面字体颜色
+            renderer.replace_text(slide, i, replacements, song['cover_color'])
+
+        elif shape.type == SHAPE_PICTURE:
+            picture_path = fit_image(song['cover'], shape.width, shape.height)
+            renderer.replace_picture(slide, i, picture_path, shape.left, shape.top, shape.width, shape.height)
+
+
+def add_lyric_slide(new_ppt, layout, template_text_boxs, song):
+    # 返回 (歌词幻灯片, 行距)
+    song_name = song['song_name']
+    cover_color = song['cover_color']
+    chorus_color = song['chorus_color']
+    solo_colors = song['solo_colors']
 
     # 添加歌词
-    lyrics = get_dynamic_lyrics(artist_name, song_name, change_lyrics, changed_lyrics, specified_163_id)
-    # 检查并提取模板幻灯片中的文本框
-    template_text_boxs = [shape for shape in template_lyric_slide.shapes if shape.HasTextFrame]
+    formatted_lyrics = song['lyrics']
+    singers = song['singers']
     # 找出占用最大字节数的元素
     max_len = 0
     longest_lyric = ''
-    curr_singer = DEFAULT_SINGER
-    singers = []
-    formatted_lyrics = []
-    is_move_time = False
-    for i, lyric in enumerate(lyrics):
-        words = lyric.split(TIME_LYRIC_SPLITTER)
-        # 获取时间
-        sec = time_to_seconds(words[0][1:])
-        if i != 0:
-            if not is_move_time:
-                if 'trimmed_lyric' in formatted_lyrics[i - 1]:
-                    prev_lyric = formatted_lyrics[i - 1]['trimmed_lyric']
-                    prev_sec = formatted_lyrics[i - 1]['sec']
-                    if (sec - prev_sec) < 2 and len(prev_lyric) > 6 and i < len(lyrics) - 1:
-                        # 如果前一歌词时间<2s而且文字>6，意味着和本句是合唱，要同时出现和消失，所以要获取下一句的时间，作为本句的时间
-                        is_move_time = True
-                        ws = lyrics[i + 1].split(TIME_LYRIC_SPLITTER)
-                        # 获取时间
-                        sec = time_to_seconds(ws[0][1:])
-
-            else:
-                is_move_time = False
-                sec = formatted_lyrics[i - 1]['sec']
-
-        formatted_lyrics.append({'sec': sec})
-
-        # 获取歌词，括号是合唱特征
-        chn_colon = SINGER_LYRIC_SPLITTERS[0]
-        ws = re.split(SINGER_LYRIC_SPLITTER_PATTERN, words[1])
-        # 歌词如果已有2个冒号，不需再加；否则加1个冒号
-        tw = chn_colon if len(ws) < 2 else ''
-        if words[1].find('(') == 0:
-            # 如果第一个字符是(，意味着这歌词用了`(歌手)歌词`的格式，来指明本句的歌手，要转换为：`歌手：歌词`这个格式
-            strip_str = words[1].replace('(', '').replace(')', f'{chn_colon}')
-        else:
-            strip_str = words[1].replace(')', '').replace('(', f'{tw}(').replace('(', '')\
-                .replace(f'{chn_colon}{chn_colon}', f'{chn_colon}')
-
-        words = re.split(SINGER_LYRIC_SPLITTER_PATTERN, strip_str)
-        if len(words) > 1:
-            # 合唱歌曲
-            # 如果歌手有&字符，视为合唱
-            singer = words[0].strip() if words[0].find('&') == -1 else CHORUS_SINGER
-            if singer == '合唱':
-                singer = CHORUS_SINGER
-
-            singer = zhconv.convert(singer, 'zh-cn')
-            if curr_singer == DEFAULT_SINGER:
-                curr_singer = singer
-
-            singer_len = len(singer)
-            if singer_len != len(curr_singer) and singer != CHORUS_SINGER:
-                # 不正常的歌手简称，如：无非想 扮诚实来换舒畅P，其实这是"合唱，本行有2个歌手"这种情况
-                words = f'{curr_singer}{chn_colon}{strip_str}'.split(chn_colon)
-                singer = curr_singer
-                singer_len = len(singer)
-
-            if singer == CHORUS_SINGER:
-                # 排除合唱的歌手：合
-                formatted_lyrics[i]['singer_lyric'] = f'{CHORUS_SINGER}{chn_colon}{words[1]}'
-                formatted_lyrics[i]['trimmed_lyric'] = words[1]
-            else:
-                if singer not in singers:
-                    singers.append(singer)
-
-                if singer != curr_singer:
-                    curr_singer = singer
-
-                if len(words) == 2:
-                    # 合唱，本行是独唱
-                    formatted_lyrics[i]['singer_lyric'] = f'{curr_singer}{chn_colon}{words[1]}'
-                    formatted_lyrics[i]['trimmed_lyric'] = words[1]
-                else:
-                    # 合唱，本行有2个歌手，words[1]是第一个歌手的歌词+第二个歌手的简称
-                    singer = words[1][-singer_len:]
-                    if singer not in singers:
-                        # 属于括号前没有歌手的情况，歌手为非 curr_singer 的那个歌手
-                        idx = len(singers) - singers.index(curr_singer) - 1
-                        singer = singers[idx]
-                        words[1] += singer
-
-                    tl = len(words[1])
-                    w1 = words[1][:tl - singer_len]
-                    w2 = words[2]
-                    formatted_lyrics[i]['singer_lyric'] = f'{curr_singer}{chn_colon}{w1}{MULTIPLE_SINGER_SPLITTER}{singer}{chn_colon}{w2}'
-                    formatted_lyrics[i]['trimmed_lyric'] = f'{w1} {w2}'
-
-        else:
-            # 独唱歌曲
-            formatted_lyrics[i]['singer_lyric'] = f'{curr_singer}{chn_colon}{words[0]}'
-            formatted_lyrics[i]['trimmed_lyric'] = words[0]
-
-        ml = len(formatted_lyrics[i]['trimmed_lyric'].encode('utf-8'))
+    for formatted_lyric in formatted_lyrics:
+        ml = len(formatted_lyric.trimmed.encode('utf-8'))
         if ml > max_len:
             max_len = ml
-            longest_lyric = formatted_lyrics[i]['trimmed_lyric']
+            longest_lyric = formatted_lyric.trimmed
 
     max_show_len = 0
     for c in longest_lyric:
@@ -670,13 +711,13 @@ def generate_ppt(new_ppt, row, row_idx):
         max_show_len += delta
 
     font_pt, line_pt = get_pts(max_show_len)
-    slide = slides.AddSlide(slides.Count + 1, layout)
+    slide = renderer.add_slide(new_ppt, layout)
     idx = left = 0
-    lyric_width = new_ppt.PageSetup.SlideWidth
+    lyric_width = template.slide_width
     top = PADDING_TOP
     is_all_eng = True
     for formatted_lyric in formatted_lyrics:
-        if not is_all_not_chinese(formatted_lyric['trimmed_lyric']):
+        if not is_all_not_chinese(formatted_lyric.trimmed):
             # 不全是英文
             is_all_eng = False
             break
@@ -694,175 +735,395 @@ def generate_ppt(new_ppt, row, row_idx):
 
     if not IS_DYNAMIC_LYRIC:
         # 警惕歌词，歌词要上对齐，在增加textbox前就要设好ppt高度 和 加歌名
-        new_ppt.PageSetup.SlideHeight = line_height_pt * len(formatted_lyrics)
+        renderer.set_slide_height(new_ppt, line_height_pt * len(formatted_lyrics))
 
         if not is_all_eng:
             # 如果有非英文，缩短slide高度
-            new_ppt.PageSetup.SlideHeight /= 2.4
+            renderer.set_slide_height(new_ppt, renderer.slide_height(new_ppt) / 2.4)
 
         add_textbox(slide, template_text_boxs[0], left, top, lyric_width, line_pt, song_name, tmp_font_pt, solo_colors,
                 chorus_color, cover_color, singers)
 
-    for i, formatted_lyric in enumerate(formatted_lyrics):
-        if 'singer_lyric' in formatted_lyric:
-            text = formatted_lyric['singer_lyric']
-            if not IS_DYNAMIC_LYRIC:
-                # 静态歌词：
-                # 1、如果全句都是英文，独立一行显示
-                # 2、否则一行显示两句歌词
-                if is_all_not_chinese(formatted_lyric['trimmed_lyric']):
-                    lyric_width = new_ppt.PageSetup.SlideWidth
+    for formatted_lyric in formatted_lyrics:
+        text = formatted_lyric.text
+        if not IS_DYNAMIC_LYRIC:
+            # 静态歌词：
+            # 1、如果全句都是英文，独立一行显示
+            # 2、否则一行显示两句歌词
+            if is_all_not_chinese(formatted_lyric.trimmed):
+                lyric_width = template.slide_width
+                top += distance
+                left = 0
+                idx = 0
+            else:
+                lyric_width = template.slide_width / 2
+                if idx % 2 == 0:
                     top += distance
                     left = 0
-                    idx = 0
                 else:
-                    lyric_width = new_ppt.PageSetup.SlideWidth / 2
-                    if idx % 2 == 0:
-                        top += distance
-                        left = 0
-                    else:
-                        left = lyric_width
+                    left = lyric_width
 
-                    idx += 1
+                idx += 1
 
-            else:
-                top += distance
+        else:
+            top += distance
 
-            add_textbox(slide, template_text_boxs[0], left, top, lyric_width, line_pt, text, tmp_font_pt, solo_colors, chorus_color, cover_color, singers)
+        add_textbox(slide, template_text_boxs[0], left, top, lyric_width, line_pt, text, tmp_font_pt, solo_colors, chorus_color, cover_color, singers)
 
-    if not IS_DYNAMIC_LYRIC:
-        return new_ppt
+    return slide, distance
 
-    text_boxs = [shape for shape in slide.shapes if shape.HasTextFrame]
-    for i, _ in enumerate(text_boxs):
-        add_animation(slide, i, text_boxs[i:], distance, formatted_lyrics)
-        # if i == 2:
-        #     break
 
-    return new_ppt
+def traditional_texts(song):
+    # 一首歌要转换繁体的所有文本。封面页：rebuild 模式为各文本框填好占位符的文字，clone 模式为占位符的值和模板文字的各段
+    # 歌词页的分支与 add_textbox 相同：没有歌手的一行（歌名）整行转换，多个歌手时为带歌手的歌名行；有歌手的歌词转换各歌手的那一段
+    texts = []
+    if IS_DYNAMIC_LYRIC:
+        placeholder_values = cover_placeholder_values(song)
+        for shape in template.song_shapes:
+            if shape.has_text_frame:
+                if COVER_MODE == 'clone':
+                    texts += template_text_pieces(shape)
+                else:
+                    texts.append(cover_text(shape, placeholder_values).strip())
 
+        if COVER_MODE == 'clone':
+            texts += placeholder_values.values()
 
-def get_setting_color(file_path, sheet_name, col_name, row_no):
-    workbook = openpyxl.load_workbook(file_path)
-    worksheet = workbook[sheet_name]
+        if IS_COVER_ONLY:
+            return texts
 
-    # 遍历第一行，查找含有 '歌词颜色' 的列
-    column_letter = None
-    for cell in worksheet[1]:  # 遍历第一行
-        if cell.value == col_name:
-            column_letter = cell.column_letter  # 获取列字母
-            break
+    singers = song['singers']
+    for text in [song['song_name']] + [line.text for line in song['lyrics']]:
+        strip_str = text.strip()
+        if strip_str.find(SINGER_LYRIC_SPLITTERS[0]) == -1:
+            texts.append(multi_singer_title(strip_str, singers)[1] if singers else strip_str)
+        else:
+            for word in strip_str.split(MULTIPLE_SINGER_SPLITTER):
+                texts.append(SINGER_LYRIC_SPLITTER_RE.split(word)[-1])
 
-    # 获取该列第二行单元格
-    cell = worksheet[f'{column_letter}{row_no}']  # 获取row_no行该列的单元格
+    return texts
 
-    # 获取该单元格的颜色 (前景色)
-    fill_color = cell.fill.fgColor.rgb
-    rgb_color = fill_color[2:]  # 获取RGB部分 '112233'
 
-    # 将颜色转换为 RGB 分量
-    red = int(rgb_color[0: 2], 16)  # '11' -> 17
-    green = int(rgb_color[2: 4], 16)  # '22' -> 34
-    blue = int(rgb_color[4: 6], 16)  # '33' -> 51
+def add_lyric_animation(slide, distance, formatted_lyrics):
+    text_boxs = renderer.text_shapes(slide)
+    if ANIMATION == 'linear':
+        add_linear_animation(slide, text_boxs, distance, formatted_lyrics)
+    else:
+        for i, _ in enumerate(text_boxs):
+            add_animation(slide, i, text_boxs[i:], distance, formatted_lyrics)
+
+
+def generate_ppt(new_ppt, song):
+    with tracing.song(song['row_idx'] + 2, song['song_name'], 'render'):
+        # 模板没变，不再每首歌都遍历幻灯片和版式
+        layout = renderer.layout_at(new_ppt, template.layout_index)
+        if IS_TRADITIONAL:
+            # 整首歌的封面和歌词一次转换成繁体，逐个文本框转换时直接命中缓存
+            with tracing.span('zh_convert') as counts:
+                counts['texts'] = len(to_traditional.convert_many(traditional_texts(song)))
+
+        if IS_DYNAMIC_LYRIC:
+            with tracing.span('cover_slide', counters=True):
+                if COVER_MODE == 'clone':
+                    clone_cover_slide(new_ppt, template.song_shapes, song)
+                else:
+                    add_cover_slide(new_ppt, layout, template.song_shapes, song)
+
+            if IS_COVER_ONLY:
+                return new_ppt
 
-    # 使用 python-pptx 的 RGBColor
-    return blue << 16 | green << 8 | red
+        with tracing.span('lyric_textboxes', counters=True) as counts:
+            slide, distance = add_lyric_slide(new_ppt, layout, template.lyric_text_shapes, song)
+            counts['lines'] = len(song['lyrics'])
 
+        if IS_DYNAMIC_LYRIC:
+            with tracing.span('animation', counters=True):
+                add_lyric_animation(slide, distance, song['lyrics'])
 
-def save_ppt(new_ppt, filename):
-    # 删除示例的幻灯片（3张），幻灯片id以1开始
-    # 获取所有幻灯片
-    slides = new_ppt.Slides
-    for _ in list(range(2)):
-        slides(1).Delete()
+        return new_ppt
 
-    new_ppt.SaveAs(filename)
-    new_ppt.Close()
 
+def static_file_name(path, song, used_names):
+    # 同名歌曲加上 Excel 行号，保证输出文件名固定且不互相覆盖
+    name = song['song_name']
+    if name in used_names:
+        name = f"{name}-{song['row_idx'] + 2}"
 
-def get_last_layout(ppt):
-    slides = ppt.Slides
-    # 记录所有幻灯片使用到的布局
-    used_layouts = set()
+    used_names.add(name)
+    return f'{path}/{name}.pptx'
 
-    for slide in slides:
-        # 获取幻灯片使用的布局
-        layout = slide.CustomLayout
-        used_layouts.add(layout)  # 将布局添加到集合中，确保唯一
 
-    # 遍历幻灯片母版中的所有布局，获取最后一个布局
-    last_layout = {}
-    for master in ppt.Designs:
-        layouts = master.SlideMaster.CustomLayouts
-        for layout in layouts:
-            if layout in used_layouts:
-                last_layout = layout
+def build_entry(song, build_hash):
+    # 增量生成清单中本行的记录，hash 包含了影响本行输出的所有输入
+    entry = {
+        'row': song['row_idx'] + 2,
+        'song_name': song['song_name'],
+        'settings_hash': song['settings_hash'],
+        'kuwo_id': song['kuwo_id'],
+        'netease_id': song['netease_id'],
+        'lyrics_hash': lyrics_hash(song['lyrics'], song['singers']),
+    }
+    entry['hash'] = hash_json(entry['settings_hash'], entry['kuwo_id'], entry['netease_id'], entry['lyrics_hash'],
+                              song['song_info'], song['cover'], build_hash)
+    return entry
+
+
+def get_render_settings():
+    return {
+        'IS_COVER_ONLY': IS_COVER_ONLY,
+        'IS_DYNAMIC_LYRIC': IS_DYNAMIC_LYRIC,
+        'IS_TRADITIONAL': IS_TRADITIONAL,
+        'PADDING_TOP': PADDING_TOP,
+        'MAX_FONT_SIZE_PT': MAX_FONT_SIZE_PT,
+        'LINE_SPACING': LINE_SPACING,
+        'ANIMATION': ANIMATION,
+        'COVER_MODE': COVER_MODE,
+        'SHOW_LEN_2_PTS': SHOW_LEN_2_PTS,
+    }
 
-    return slides, last_layout
+
+def init_render_worker(settings, renderer_name, template_path, trace_config):
+    # 子进程不会执行 __main__ 里的设置，要在这里恢复全局设置，并创建本进程自己的渲染器
+    global renderer, template_ppt, template
+    globals().update(settings)
+    tracing.configure(trace_config['log_path'], trace_config['chrome_path'], trace_config['profile_row'],
+                      trace_config['profile_dir'])
+    renderer = create_renderer(renderer_name)
+    tracing.add_counter('effects', lambda: renderer.effect_count)
+    template_ppt = renderer.open(template_path)
+    template = TemplateSnapshot(renderer, template_ppt)
+
+
+def save_static_song(new_ppt, song, new_file):
+    with tracing.song(song['row_idx'] + 2, song['song_name'], 'save'):
+        renderer.save(new_ppt, new_file)
+
+
+def render_static_song(song, new_file):
+    # 在子进程中渲染，计时事件随结果交回主进程
+    new_ppt = renderer.copy(template_ppt, new_file)
+    new_ppt = generate_ppt(new_ppt, song)
+    save_static_song(new_ppt, song, new_file)
+    return new_file, tracing.drain()
+
+
+def render_static_pool(songs, path, workers, renderer_name, template_path, manifest):
+    # 静态歌词每首歌一个文件，互不相关：多个进程各自持有渲染器，从队列中取歌渲染
+    # 返回 (生成的文件, [(行索引, 歌名, 错误)], 复用的文件数)
+    output_files = []
+    errors = []
+    reused = 0
+    used_names = set()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_render_worker,
+        initargs=(get_render_settings(), renderer_name, template_path, tracing.get_config()),
+    ) as executor:
+        futures = []
+        for song in songs:
+            if 'error' in song:
+                errors.append((song['row_idx'], song['song_name'], song['error']))
+                continue
+
+            new_file = static_file_name(path, song, used_names)
+            entry = build_entry(song, manifest.build_hash)
+            entry['file'] = os.path.basename(new_file)
+            if manifest.find_file(entry['hash'], entry['file']):
+                # 输入没变，保留上次生成的文件
+                output_files.append(new_file)
+                manifest.add(entry)
+                reused += 1
+                continue
+
+            futures.append((song, entry, executor.submit(render_static_song, song, new_file)))
+
+        for song, entry, future in futures:
+            try:
+                new_file, events = future.result()
+                tracing.extend(events)
+                output_files.append(new_file)
+                manifest.add(entry)
+            except Exception as e:
+                errors.append((song['row_idx'], song['song_name'], e))
+
+    return output_files, sorted(errors, key=lambda error: error[0]), reused
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('date', help='输出目录名')
+    parser.add_argument('file_path', help='设置 Excel 文件，也可以是 CSV、JSON 歌单')
+    parser.add_argument('template', help='PPT 模板文件（相对当前目录）')
+    parser.add_argument('--settings', metavar='PATH', help='全局设置所在的 Excel 或 JSON 文件，CSV 歌单必须指定，默认从歌单文件读取')
+    parser.add_argument('--cache-file', default='lyrics_cache.sqlite', help='接口响应缓存文件')
+    parser.add_argument('--no-cache', action='store_true', help='不使用接口响应缓存')
+    parser.add_argument('--offline', action='store_true', help='离线模式：只从缓存读取，不访问网络')
+    parser.add_argument('--cache-ttl-days', type=float, default=DEFAULT_TTL / 86400, help='缓存有效天数')
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024, help='缓存最大容量（MB）')
+    parser.add_argument('--image-cache-dir', default=DEFAULT_IMAGE_CACHE_DIR, help='封面图片缓存目录')
+    parser.add_argument('--catalog-file', default='song_catalog.json', help='歌曲 ID 目录文件，已知的歌不再调用搜索接口')
+    parser.add_argument('--no-catalog', action='store_true', help='不使用歌曲 ID 目录')
+    parser.add_argument('--import-catalog', action='append', default=[], metavar='PATH', help='运行前合并导入的歌曲 ID 目录，可多次指定')
+    parser.add_argument('--export-catalog', metavar='PATH', help='运行后把歌曲 ID 目录导出到此文件')
+    parser.add_argument('--corpus', metavar='PATH',
+                        help='列式歌词库文件（lyrics_corpus.py 生成），库中有的歌直接用解析好的歌词，不访问网易云')
+    parser.add_argument('--full-rebuild', action='store_true',
+                        help='忽略上次的生成清单，所有歌曲重新生成（默认只重新生成输入有变化的行）')
+    parser.add_argument('--trace-log', metavar='PATH', help='把每首歌各阶段的计时写入 JSON lines 文件')
+    parser.add_argument('--trace-chrome', metavar='PATH', help='把计时写成 Chrome trace_event 文件（chrome://tracing 打开）')
+    parser.add_argument('--profile-row', type=int, metavar='ROW', help='用 cProfile 采样 Excel 中这一行（行号从 2 开始）的取数据和渲染')
+    parser.add_argument('--profile-dir', default='.', help='cProfile 结果的保存目录')
+    parser.add_argument('--renderer', choices=RENDERERS, default='com' if os.name == 'nt' else 'pptx',
+                        help='com：驱动 PowerPoint；pptx：不需要 PowerPoint，直接写 .pptx 文件')
+    parser.add_argument('--animation', choices=ANIMATIONS, default=ANIMATION,
+                        help='动态歌词动画：legacy 每行让下面所有歌词各加一个移动效果；linear 每行固定两个效果')
+    parser.add_argument('--cover-mode', choices=COVER_MODES, default=COVER_MODE,
+                        help='动态歌词封面页：rebuild 按模板逐个新建形状；clone 复制模板封面页，只替换占位符和图片，保留模板样式')
+    parser.add_argument('--shard-songs', type=int, default=0, metavar='N',
+                        help='动态歌词每个输出文件最多包含的歌曲数，0 为不限制')
+    parser.add_argument('--shard-mb', type=float, default=0, metavar='MB',
+                        help='动态歌词每个输出文件的估算大小达到此值（MB）时另起一个文件，0 为不限制')
+    parser.add_argument('--jobs', type=int, default=8, help='并发获取歌曲数据的线程数')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='静态歌词模式下并行渲染的进程数，每个进程有自己的渲染器；'
+                             'PowerPoint 只能启动一个实例，多进程时建议配合 --renderer pptx')
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        exit()
+    args = parse_args()
+    date = args.date
+    file_path = args.file_path
+    ANIMATION = args.animation
+    COVER_MODE = args.cover_mode
+    if not args.no_cache or args.offline:
+        response_cache = ResponseCache(
+            args.cache_file,
+            ttl=args.cache_ttl_days * 86400,
+            max_bytes=int(args.cache_max_mb * 1024 * 1024),
+            offline=args.offline,
+        )
+
+    image_cache = ImageCache(args.image_cache_dir)
+    tracing.configure(args.trace_log, args.trace_chrome, args.profile_row, args.profile_dir)
+    if not args.no_catalog:
+        song_catalog = SongCatalog(args.catalog_file)
+        for catalog_path in args.import_catalog:
+            print(f'导入歌曲目录 {catalog_path}：{song_catalog.import_file(catalog_path)} 首')
 
-    date = sys.argv[1]
-    file_path = sys.argv[2]
+    if args.corpus:
+        lyrics_corpus = LyricsCorpus(args.corpus)
 
     # 获取当前程序的绝对路径
     current_path = os.path.abspath(__file__)
-    # 读取Excel文件
-    dfs = pd.read_excel(file_path, sheet_name=None)
-    # 提取设置列
-    selected_columns = dfs[SETTING_SHEET][['只生成歌曲封面？', '生成动态歌词？', '是否繁体歌词？', '页眉高度（厘米）', '最大字体（Pt）', '歌词行间距离（Pt）']]
-    for index, row in selected_columns.iterrows():
-        if index == 0:
-            IS_COVER_ONLY = row['只生成歌曲封面？'] == '是'
-            IS_DYNAMIC_LYRIC = row['生成动态歌词？'] == '是'
-            PADDING_TOP = cm_to_points(row['页眉高度（厘米）']) if IS_DYNAMIC_LYRIC else 4
-            IS_TRADITIONAL = row['是否繁体歌词？'] == '是'
-            MAX_FONT_SIZE_PT = row['最大字体（Pt）']
-            LINE_SPACING = row['歌词行间距离（Pt）']
+    # 读取全局设置；各歌的设置（含颜色）在渲染时逐行读取
+    settings, setlist_rows = open_setlist(file_path, args.settings)
+    IS_COVER_ONLY = settings['只生成歌曲封面？'] == '是'
+    IS_DYNAMIC_LYRIC = settings['生成动态歌词？'] == '是'
+    PADDING_TOP = cm_to_points(settings['页眉高度（厘米）']) if IS_DYNAMIC_LYRIC else 4
+    IS_TRADITIONAL = settings['是否繁体歌词？'] == '是'
+    MAX_FONT_SIZE_PT = settings['最大字体（Pt）']
+    LINE_SPACING = settings['歌词行间距离（Pt）']
 
     SHOW_LEN_2_PTS[0]['font'] = MAX_FONT_SIZE_PT
     SHOW_LEN_2_PTS[0]['line'] = MAX_FONT_SIZE_PT * 4 / 3
 
-    # 启动 PowerPoint 应用
-    app = CreateObject("PowerPoint.Application")
-    app.Visible = True
-
-    # 打开现有的 PowerPoint 演示文稿
     pwd = os.getcwd()
-    in_ppt = f"{pwd}/{sys.argv[3]}"
-    out_ppt = template_ppt = app.Presentations.Open(in_ppt)
-
-    slides, last_layout = get_last_layout(out_ppt)
+    in_ppt = f"{pwd}/{args.template}"
+    use_pool = not IS_DYNAMIC_LYRIC and args.workers > 1
+    if not use_pool:
+        # 启动 PowerPoint 应用（或 .pptx 渲染）
+        renderer = create_renderer(args.renderer)
+        tracing.add_counter('effects', lambda: renderer.effect_count)
 
     path = f'{pwd}/{date}'
     if not os.path.exists(path):
         os.makedirs(path)
 
     dt_object = datetime.fromtimestamp(time())
-    new_file = f'{path}/{dt_object.strftime("%Y%m%d-%H%M%S")}.pptx'
+    if IS_DYNAMIC_LYRIC:
+        # 动态歌词的演示文稿由 ShardWriter 打开，每个分片保存后重新打开模板
+        shards = ShardWriter(renderer, in_ppt, path, dt_object.strftime("%Y%m%d-%H%M%S"), args.shard_songs, args.shard_mb)
+        template = TemplateSnapshot(renderer, shards.open())
+    elif not use_pool:
+        # 打开现有的 PowerPoint 演示文稿
+        out_ppt = renderer.open(in_ppt)
+        template = TemplateSnapshot(renderer, out_ppt)
+
     start_tm = time()
-    selected_columns = dfs[LIST_SHEET][['歌曲', '歌手', '歌手数量', '合唱歌词颜色', '歌手1歌词颜色', '歌手2歌词颜色', '歌手3歌词颜色', '歌手4歌词颜色', '要修改的歌词', '修改后歌词', '指定酷我音乐歌曲ID', '指定网易云歌曲ID']]
-    for index, row in selected_columns.iterrows():
-        # //-//
-        # if index != 0:
-        #     break
+    output_files = []
+    # 模板、全局设置或渲染方式变了，所有行都要重新生成
+    build_hash = hash_json(file_hash(in_ppt), get_render_settings(), args.renderer)
+    manifest = BuildManifest(path, build_hash, full=args.full_rebuild)
+    reused = 0
+    if use_pool:
+        songs = prefetch_songs(setlist_rows, args.jobs, resolve=resolve_song_or_error)
+        output_files, errors, reused = render_static_pool(songs, path, args.workers, args.renderer, in_ppt, manifest)
+        for row_idx, song_name, error in errors:
+            print(f'第{row_idx + 2}行《{song_name}》生成失败：{error!r}')
+        manifest.save()
+    else:
+        used_names = set()
+        # 网络请求在线程池中预取，PowerPoint 只在主线程中按顺序渲染
+        for song in prefetch_songs(setlist_rows, args.jobs):
+            entry = build_entry(song, build_hash)
+            if IS_DYNAMIC_LYRIC:
+                out_ppt = shards.open()
+                # 保存时会删除前两张模板幻灯片，记录的是保存后的位置
+                first = renderer.slide_count(out_ppt) - 1
+                previous = manifest.find_slides(entry['hash'])
+                if previous is not None:
+                    # 输入没变，直接从上次的输出中复制幻灯片
+                    renderer.insert_slides(out_ppt, *previous)
+                    estimated_bytes = manifest.find(entry['hash']).get('bytes', 0)
+                    reused += 1
+                else:
+                    effects = renderer.effect_count
+                    shards.deck = out_ppt = generate_ppt(out_ppt, song)
+                    estimated_bytes = estimate_song_bytes(song, renderer.effect_count - effects)
+                entry['output'] = shards.file_name
+                entry['slides'] = [first, renderer.slide_count(out_ppt) - 2]
+                entry['bytes'] = estimated_bytes
+                shards.add(song['row_idx'] + 2, song['song_name'], entry['slides'], estimated_bytes)
+            else:
+                new_file = static_file_name(path, song, used_names)
+                output_files.append(new_file)
+                entry['file'] = os.path.basename(new_file)
+                if manifest.find_file(entry['hash'], entry['file']):
+                    reused += 1
+                else:
+                    new_ppt = renderer.copy(out_ppt, new_file)
+                    new_ppt = generate_ppt(new_ppt, song)
+                    save_static_song(new_ppt, song, new_file)
+
+            manifest.add(entry)
 
-        sfx = ''
         if IS_DYNAMIC_LYRIC:
-            out_ppt = generate_ppt(out_ppt, row, index)
-        else:
-            new_file = f'{path}/{str(row["歌曲"])}.pptx'
-            out_ppt.SaveCopyAs(new_file)
-            new_ppt = app.Presentations.Open(new_file)
-            # 获取所有幻灯片
-            new_ppt = generate_ppt(new_ppt, row, index)
-            save_ppt(new_ppt, new_file)
+            output_files = shards.close()
+            if shards.sharded:
+                print(f'分成 {len(output_files)} 个文件，索引：{shards.index_path}')
 
-    if IS_DYNAMIC_LYRIC:
-        save_ppt(out_ppt, new_file)
+        manifest.save()
+
+        renderer.quit()
 
-    app.Quit()
+    print(f'复用上次生成的歌曲：{reused} 首，重新生成：{len(manifest.rows) - reused} 首')
     print(f'用时：{time() - start_tm}秒')
+    if tracing.enabled():
+        print(tracing.summarize(tracing.write()))
+    output_size = sum(os.path.getsize(f) for f in output_files if os.path.exists(f))
+    if renderer is not None:
+        print(f'动画方式：{ANIMATION}，动画效果数：{renderer.effect_count}，关键帧数：{renderer.keyframe_count}，输出文件大小：{output_size / 1024:.1f}KB')
+    else:
+        print(f'生成 {len(output_files)} 个文件，输出文件大小：{output_size / 1024:.1f}KB')
+    if http_client.get_stats():
+        print(http_client.format_stats())
+    if response_cache is not None:
+        print(f'缓存命中：{response_cache.hits}，未命中：{response_cache.misses}')
+        response_cache.close()
+    print(f'封面缓存命中：{image_cache.hits}，下载：{image_cache.misses}')
+    if song_catalog is not None:
+        print(f'歌曲目录命中：{song_catalog.hits}，未命中：{song_catalog.misses}')
+        song_catalog.save()
+        if args.export_catalog:
+            song_catalog.export(args.export_catalog)
@@ -0,0 +1,110 @@
+import json
+import os
+
+import tracing
+
+# 动态歌词的分片输出：所有歌都追加到同一个演示文稿时，PowerPoint 的内存随歌单长度一直增长，文件也越来越慢打开、保存
+# 按歌曲数或估算的文件大小分片，一片满了立即保存并关闭，下一首歌再重新打开模板，内存峰值与歌单长度无关
+# 分片后另写一个索引文件，记录每片的文件名和包含的行
+INDEX_VERSION = 1
+# 估算文件大小用的经验值（字节）：封面幻灯片（不含图片）、每句歌词的文本框、每个动画效果
+SLIDE_BYTES = 8 * 1024
+LINE_BYTES = 1024
+EFFECT_BYTES = 400
+
+
+def estimate_song_bytes(song, effects):
+    # effects 为这首歌添加的动画效果数；图片按缓存中的原图大小算（插入时只会缩小）
+    cover = song['cover']
+    cover_bytes = os.path.getsize(cover) if cover and os.path.exists(cover) else 0
+    return SLIDE_BYTES * 2 + cover_bytes + LINE_BYTES * len(song['lyrics']) + EFFECT_BYTES * effects
+
+
+class ShardWriter:
+    def __init__(self, renderer, template_path, directory, stamp, max_songs=0, max_mb=0):
+        # max_songs、max_mb 都为 0 时不分片，输出与以前相同的一个文件 {stamp}.pptx
+        self.renderer = renderer
+        self.template_path = template_path
+        self.directory = directory
+        self.stamp = stamp
+        self.max_songs = max_songs
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.sharded = bool(max_songs or max_mb)
+        self.shards = []
+        self.deck = None
+        self.songs = []
+        self.estimated_bytes = 0
+
+    @property
+    def file_name(self):
+        if not self.sharded:
+            return f'{self.stamp}.pptx'
+
+        return f'{self.stamp}-{len(self.shards) + 1:03d}.pptx'
+
+    @property
+    def index_path(self):
+        return os.path.join(self.directory, f'{self.stamp}-index.json')
+
+    def open(self):
+        # 当前分片的演示文稿，上一片刚保存时重新打开模板
+        if self.deck is None:
+            self.deck = self.renderer.open(self.template_path)
+
+        return self.deck
+
+    def add(self, row, song_name, slides, estimated_bytes):
+        # 记录当前分片中刚生成的一首歌，slides 为保存后的 (第一张, 最后一张)；分片满了就保存
+        self.songs.append({'row': row, 'song_name': song_name, 'slides': list(slides)})
+        self.estimated_bytes += estimated_bytes
+        if self.sharded and (
+            (self.max_songs and len(self.songs) >= self.max_songs)
+            or (self.max_bytes and self.estimated_bytes >= self.max_bytes)
+        ):
+            self.flush()
+
+    def flush(self, force=False):
+        # 保存并关闭当前分片；没有歌的分片不保存，除非 force 为真
+        if self.deck is None or not (self.songs or force):
+            return
+
+        file_name = self.file_name
+        path = os.path.join(self.directory, file_name)
+        with tracing.span('save', counters=True, shard=file_name):
+            self.renderer.save(self.deck, path)
+        self.shards.append({
+            'file': file_name,
+            'first_row': self.songs[0]['row'] if self.songs else None,
+            'last_row': self.songs[-1]['row'] if self.songs else None,
+            'estimated_bytes': self.estimated_bytes,
+            'bytes': os.path.getsize(path) if os.path.exists(path) else None,
+            'songs': self.songs,
+        })
+        self.deck = None
+        self.songs = []
+        self.estimated_bytes = 0
+
+    def close(self):
+        # 保存最后一片，分片时写索引文件；返回所有输出文件的路径
+        if not self.shards:
+            # 一首歌都没有时也保存一个文件，与以前的行为一致
+            self.open()
+
+        self.flush(force=not self.shards)
+        if self.sharded:
+            self.write_index()
+
+        return [os.path.join(self.directory, shard['file']) for shard in self.shards]
+
+    def write_index(self):
+        data = {
+            'version': INDEX_VERSION,
+            'max_songs': self.max_songs,
+            'max_bytes': self.max_bytes,
+            'shards': self.shards,
+        }
+        tmp_path = f'{self.index_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+        os.replace(tmp_path, self.index_path)
@@ -0,0 +1,228 @@
+# 渲染接口：generate_ppt 只通过这里的方法操作演示文稿，具体由 PowerPoint(COM) 或直接写 .pptx 的后端实现
+# 所有位置、大小的单位都是磅(pt)，颜色都是 PowerPoint 的 RGB 整数（blue << 16 | green << 8 | red）
+
+# 动画触发方式，取值与 PowerPoint 的 MsoAnimTriggerType 一致
+TRIGGER_ON_CLICK = 1
+TRIGGER_WITH_PREVIOUS = 2
+TRIGGER_AFTER_PREVIOUS = 3
+
+# 动画效果
+EFFECT_OPACITY = 'opacity'  # 保持显示一段时间
+EFFECT_VISIBILITY = 'visibility'  # 消失
+EFFECT_MOTION = 'motion'  # 按 by_y（幻灯片高度的百分比）移动
+EFFECT_STEP_MOTION = 'step_motion'  # 多次跳跃式移动，见 add_step_motion
+
+# 形状类型，取值与 PowerPoint 的 MsoShapeType 一致
+SHAPE_AUTO = 1
+SHAPE_PICTURE = 13
+
+# 封面模板中的占位符，按此顺序替换
+PLACEHOLDERS = ['<歌名>', '<歌手>', '<作曲人>', '<作词人>']
+
+RENDERERS = ['com', 'pptx']
+# 动态歌词的动画方式：legacy 每行都让下面所有歌词各移动一次（约 N²/2 个效果）；linear 每行只有移动和消失两个效果
+ANIMATIONS = ['legacy', 'linear']
+# 动态歌词的封面页：rebuild 按模板的形状逐个新建文本框、矩形和图片；clone 复制模板的封面页，只替换占位符文字和图片
+COVER_MODES = ['rebuild', 'clone']
+
+
+class Renderer:
+    # 已添加的动画效果数和移动关键帧数（普通移动效果算一个），用于比较不同动画方式
+    effect_count = 0
+    keyframe_count = 0
+
+    def open(self, path):
+        # 打开演示文稿，返回 deck
+        raise NotImplementedError
+
+    def copy(self, deck, path):
+        # 把 deck 另存一份到 path 并打开，返回新的 deck
+        raise NotImplementedError
+
+    def save(self, deck, path):
+        # 删除前两张模板幻灯片，保存到 path 并关闭
+        raise NotImplementedError
+
+    def quit(self):
+        pass
+
+    def get_layout(self, deck):
+        # 幻灯片用到的最后一个版式，新幻灯片都用这个版式
+        raise NotImplementedError
+
+    def layout_index(self, deck):
+        # get_layout 选中的版式的位置 (第几个母版, 第几个版式)，从 1 开始；同一模板打开的其他演示文稿可以用 layout_at 直接取回
+        raise NotImplementedError
+
+    def layout_at(self, deck, index):
+        raise NotImplementedError
+
+    def template_slides(self, deck):
+        # 返回 (歌曲封面模板, 歌词模板) 两张幻灯片
+        raise NotImplementedError
+
+    def shapes(self, slide):
+        # 幻灯片中的形状，每个形状有 left/top/width/height/rotation/type/has_text_frame/text/
+        # font_name/font_size/bold/italic/underline/alignment/fill_rgb 属性
+        raise NotImplementedError
+
+    def text_shapes(self, slide):
+        # 幻灯片中所有带文本框的形状，用于添加动画
+        raise NotImplementedError
+
+    def slide_width(self, deck):
+        raise NotImplementedError
+
+    def slide_height(self, deck):
+        raise NotImplementedError
+
+    def set_slide_height(self, deck, height):
+        raise NotImplementedError
+
+    def add_slide(self, deck, layout):
+        # 在末尾添加一张幻灯片
+        raise NotImplementedError
+
+    def slide_count(self, deck):
+        raise NotImplementedError
+
+    def clone_slide(self, deck, index):
+        # 把第 index 张（从 1 开始）幻灯片连同形状、样式、版式复制一份追加到末尾，返回新幻灯片；形状的顺序与原幻灯片相同
+        raise NotImplementedError
+
+    def replace_text(self, slide, index, replacements, rgb=None):
+        # 幻灯片第 index 个形状（从 1 开始）的文字中，[(旧, 新)] 每一项替换第一处，保留原有格式；rgb 不为 None 时文字都改为这个颜色
+        raise NotImplementedError
+
+    def replace_picture(self, slide, index, path, left, top, width, height):
+        # 把第 index 个形状（图片）换成 path 的图片，放在原来的位置和层次
+        raise NotImplementedError
+
+    def insert_slides(self, deck, path, first, last):
+        # 把 path 中第 first 到 last 张（从 1 开始）幻灯片连同动画追加到末尾，用于复用上次生成的结果
+        raise NotImplementedError
+
+    def add_textbox(self, slide, left, top, width, height):
+        raise NotImplementedError
+
+    def set_rotation(self, shape, rotation):
+        raise NotImplementedError
+
+    def set_font(self, textbox, name, size, bold, italic, underline):
+        # 同时设置拉丁字体和中文字体
+        raise NotImplementedError
+
+    def set_text(self, textbox, text):
+        raise NotImplementedError
+
+    def set_color(self, textbox, rgb):
+        # 整个文本框的文字颜色
+        raise NotImplementedError
+
+    def set_char_color(self, textbox, start, length, rgb):
+        # 部分文字的颜色，start 从 1 开始，与 PowerPoint 的 Characters 一致
+        raise NotImplementedError
+
+    def set_alignment(self, textbox, alignment):
+        # 取值与 PowerPoint 的 PpParagraphAlignment 一致
+        raise NotImplementedError
+
+    def set_styled_text(self, textbox, text, font, color=None, runs=(), alignment=None):
+        # 一次设好文本框的文字、字体、颜色和对齐：font 为 (字体, 字号, 粗体, 斜体, 下划线)，
+        # color 为整个文本框的颜色，runs 为部分文字的颜色 [(start, length, rgb)]，start 从 1 开始；为 None 的不设置
+        self.set_text(textbox, text)
+        self.set_font(textbox, *font)
+        if color is not None:
+            self.set_color(textbox, color)
+
+        for start, length, rgb in runs:
+            self.set_char_color(textbox, start, length, rgb)
+
+        if alignment is not None:
+            self.set_alignment(textbox, alignment)
+
+    def add_rectangle(self, slide, left, top, width, height, rgb):
+        raise NotImplementedError
+
+    def add_picture(self, slide, path, left, top, width, height):
+        raise NotImplementedError
+
+    def add_effect(self, slide, shape, effect, trigger, duration, by_y=0, delay=0):
+        # duration、delay（触发后延迟多久开始）单位为秒
+        raise NotImplementedError
+
+    def add_step_motion(self, slide, shape, trigger, steps, delay=0):
+        # 一个效果完成多次跳跃式移动：steps 为 [(效果开始后的秒数, 相对原位置的 by_y)]，
+        # 到达每个时间点时直接跳到对应位置
+        raise NotImplementedError
+
+
+class ShapeSnapshot:
+    # 模板形状的纯 Python 副本，属性与 shapes() 返回的形状相同；一次读出所有属性，之后不再访问演示文稿
+    __slots__ = ('left', 'top', 'width', 'height', 'rotation', 'type', 'has_text_frame', 'text', 'font_name',
+                 'font_size', 'bold', 'italic', 'underline', 'alignment', 'fill_rgb', 'placeholders')
+
+    def __init__(self, shape):
+        self.left = shape.left
+        self.top = shape.top
+        self.width = shape.width
+        self.height = shape.height
+        self.rotation = shape.rotation
+        self.type = shape.type
+        self.has_text_frame = bool(shape.has_text_frame)
+        self.text = self.font_name = self.font_size = self.alignment = None
+        self.bold = self.italic = self.underline = None
+        self.placeholders = ()
+        if self.has_text_frame:
+            self.text = shape.text
+            self.font_name = shape.font_name
+            self.font_size = shape.font_size
+            self.bold = shape.bold
+            self.italic = shape.italic
+            self.underline = shape.underline
+            self.alignment = shape.alignment
+            # 文字中出现的占位符
+            self.placeholders = tuple(p for p in PLACEHOLDERS if p in self.text)
+
+        # 只有矩形用到填充色，图片等形状读取填充色可能出错
+        self.fill_rgb = shape.fill_rgb if not self.has_text_frame and self.type == SHAPE_AUTO else None
+
+
+class TemplateSnapshot:
+    # 两张模板幻灯片（歌曲封面、歌词）的形状、新幻灯片使用的版式位置和幻灯片宽高，启动时读取一次，每首歌都用它渲染
+    def __init__(self, renderer, deck):
+        song_slide, lyric_slide = renderer.template_slides(deck)
+        self.song_shapes = [ShapeSnapshot(shape) for shape in renderer.shapes(song_slide)]
+        self.lyric_shapes = [ShapeSnapshot(shape) for shape in renderer.shapes(lyric_slide)]
+        self.lyric_text_shapes = [shape for shape in self.lyric_shapes if shape.has_text_frame]
+        self.layout_index = renderer.layout_index(deck)
+        self.slide_width = renderer.slide_width(deck)
+        self.slide_height = renderer.slide_height(deck)
+
+
+def create_renderer(name):
+    if name == 'com':
+        from renderer_com import ComRenderer
+        return ComRenderer()
+
+    if name == 'pptx':
+        from renderer_pptx import PptxRenderer
+        return PptxRenderer()
+
+    raise ValueError(f'不支持的渲染方式：{name}')
+
+
+def merge_runs(runs, color=None):
+    # 去掉与整体颜色相同的部分，相邻（只隔一个空格）同色的合成一段，减少设置颜色的次数；空格的颜色看不出来
+    merged = []
+    for start, length, rgb in runs:
+        if length <= 0 or rgb == color:
+            continue
+
+        if merged and merged[-1][2] == rgb and start <= merged[-1][0] + merged[-1][1] + 1:
+            prev_start = merged[-1][0]
+            merged[-1] = (prev_start, start + length - prev_start, rgb)
+        else:
+            merged.append((start, length, rgb))
+
+    return merged
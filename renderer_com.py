@@ -0,0 +1,342 @@
+import os
+from functools import cached_property
+
+from renderer import Renderer, EFFECT_MOTION, EFFECT_OPACITY, merge_runs
+
+msoAnimTypeNone = 0
+msoAnimTypeMotion = 1
+# 要分别用 msoAnimOpacity 和 msoAnimVisibility 控制显示/隐藏
+msoAnimTypeProperty = 5
+msoAnimOpacity = 5
+msoAnimVisibility = 8
+msoAnimY = 2
+msoAnimEffectCustom = 0
+msoAnimEffectPathUp = 148
+msoTextOrientationHorizontal = 1
+msoShapeRectangle = 1
+msoSendBackward = 3
+# 关键帧跳跃的过渡时长（秒）
+STEP_EPSILON = 0.01
+
+
+class ComShape:
+    # 模板形状，属性在第一次读取时才通过 COM 获取，之后用缓存的值（模板在生成过程中不会变），每次读取都是一次跨进程调用
+    def __init__(self, shape):
+        self.shape = shape
+
+    @cached_property
+    def text_range(self):
+        return self.shape.TextFrame.TextRange
+
+    @cached_property
+    def font(self):
+        return self.text_range.Font
+
+    @cached_property
+    def left(self):
+        return self.shape.Left
+
+    @cached_property
+    def top(self):
+        return self.shape.Top
+
+    @cached_property
+    def width(self):
+        return self.shape.Width
+
+    @cached_property
+    def height(self):
+        return self.shape.Height
+
+    @cached_property
+    def rotation(self):
+        return self.shape.Rotation
+
+    @cached_property
+    def type(self):
+        return self.shape.Type
+
+    @cached_property
+    def has_text_frame(self):
+        return self.shape.HasTextFrame
+
+    @cached_property
+    def text(self):
+        return self.text_range.Text
+
+    @cached_property
+    def font_name(self):
+        return self.font.Name
+
+    @cached_property
+    def font_size(self):
+        return self.font.Size
+
+    @cached_property
+    def bold(self):
+        return self.font.Bold
+
+    @cached_property
+    def italic(self):
+        return self.font.Italic
+
+    @cached_property
+    def underline(self):
+        return self.font.Underline
+
+    @cached_property
+    def alignment(self):
+        return self.text_range.ParagraphFormat.Alignment
+
+    @cached_property
+    def fill_rgb(self):
+        return self.shape.Fill.ForeColor.RGB
+
+
+class ComRenderer(Renderer):
+    def __init__(self, app=None):
+        # 启动 PowerPoint 应用；app 可以传入与 PowerPoint 对象模型相同的替身（见 fake_powerpoint.py），不需要 Office
+        if app is None:
+            from comtypes.client import CreateObject
+
+            app = CreateObject("PowerPoint.Application")
+            app.Visible = True
+
+        self.app = app
+
+    def open(self, path):
+        return self.app.Presentations.Open(os.path.abspath(path))
+
+    def copy(self, deck, path):
+        deck.SaveCopyAs(os.path.abspath(path))
+        return self.open(path)
+
+    def save(self, deck, path):
+        # 删除示例的幻灯片（2张），幻灯片id以1开始
+        slides = deck.Slides
+        for _ in list(range(2)):
+            slides(1).Delete()
+
+        deck.SaveAs(os.path.abspath(path))
+        deck.Close()
+
+    def quit(self):
+        self.app.Quit()
+
+    def get_layout(self, deck):
+        index = self.layout_index(deck)
+        return self.layout_at(deck, index) if index is not None else {}
+
+    def layout_index(self, deck):
+        # 记录所有幻灯片使用到的布局
+        used_layouts = set()
+        for slide in deck.Slides:
+            # 获取幻灯片使用的布局，将布局添加到集合中，确保唯一
+            used_layouts.add(slide.CustomLayout)
+
+        # 遍历幻灯片母版中的所有布局，获取最后一个布局
+        last_index = None
+        for i, master in enumerate(deck.Designs, 1):
+            for j, layout in enumerate(master.SlideMaster.CustomLayouts, 1):
+                if layout in used_layouts:
+                    last_index = (i, j)
+
+        return last_index
+
+    def layout_at(self, deck, index):
+        design, layout = index
+        return deck.Designs(design).SlideMaster.CustomLayouts(layout)
+
+    def template_slides(self, deck):
+        slides = deck.Slides
+        return slides[1], slides[2]
+
+    def shapes(self, slide):
+        return [ComShape(shape) for shape in slide.Shapes]
+
+    def text_shapes(self, slide):
+        return [shape for shape in slide.Shapes if shape.HasTextFrame]
+
+    def slide_width(self, deck):
+        return deck.PageSetup.SlideWidth
+
+    def slide_height(self, deck):
+        return deck.PageSetup.SlideHeight
+
+    def set_slide_height(self, deck, height):
+        deck.PageSetup.SlideHeight = height
+
+    def add_slide(self, deck, layout):
+        slides = deck.Slides
+        return slides.AddSlide(slides.Count + 1, layout)
+
+    def slide_count(self, deck):
+        return deck.Slides.Count
+
+    def clone_slide(self, deck, index):
+        slides = deck.Slides
+        clone = slides(index).Duplicate()
+        # Duplicate 把副本放在原幻灯片之后，移到末尾
+        clone.MoveTo(slides.Count)
+        return clone(1)
+
+    def replace_text(self, slide, index, replacements, rgb=None):
+        text_range = slide.Shapes(index).TextFrame.TextRange
+        for old, new in replacements:
+            text_range.Replace(old, new)
+
+        if rgb is not None:
+            text_range.Font.Color.RGB = rgb
+
+    def replace_picture(self, slide, index, path, left, top, width, height):
+        shapes = slide.Shapes
+        old = shapes(index)
+        picture = self.add_picture(slide, path, left, top, width, height)
+        # 新图片在最上层（集合中的位置即层次），移到原图片之上再删除原图片，其他形状的位置不变
+        for _ in range(shapes.Count - index - 1):
+            picture.ZOrder(msoSendBackward)
+
+        old.Delete()
+        return picture
+
+    def insert_slides(self, deck, path, first, last):
+        slides = deck.Slides
+        slides.InsertFromFile(os.path.abspath(path), slides.Count, first, last)
+
+    def add_textbox(self, slide, left, top, width, height):
+        return slide.Shapes.AddTextbox(
+            Orientation=msoTextOrientationHorizontal,
+            Left=left,
+            Top=top,
+            Width=width,
+            Height=height,
+        )
+
+    def set_rotation(self, shape, rotation):
+        shape.Rotation = rotation
+
+    def set_font(self, textbox, name, size, bold, italic, underline):
+        font = textbox.TextFrame.TextRange.Font
+        # Font.Name设置的仅为拉丁字体，要确保中文字体生效需要设置 Font.NameFarEast 属性
+        font.Name = name
+        font.NameFarEast = name
+        font.Size = size
+        font.Bold = bold
+        font.Italic = italic
+        font.Underline = underline
+
+    def set_text(self, textbox, text):
+        textbox.TextFrame.TextRange.Text = text
+
+    def set_color(self, textbox, rgb):
+        textbox.TextFrame.TextRange.Font.Color.RGB = rgb
+
+    def set_char_color(self, textbox, start, length, rgb):
+        textbox.TextFrame.TextRange.Characters(start, length).Font.Color.RGB = rgb
+
+    def set_alignment(self, textbox, alignment):
+        textbox.TextFrame.TextRange.ParagraphFormat.Alignment = alignment
+
+    def set_styled_text(self, textbox, text, font, color=None, runs=(), alignment=None):
+        # TextRange、Font 只取一次；先设文字再设字体，字体作用于全部文字
+        text_range = textbox.TextFrame.TextRange
+        text_range.Text = text
+        font_obj = text_range.Font
+        name, size, bold, italic, underline = font
+        font_obj.Name = name
+        font_obj.NameFarEast = name
+        font_obj.Size = size
+        font_obj.Bold = bold
+        font_obj.Italic = italic
+        font_obj.Underline = underline
+        if color is not None:
+            font_obj.Color.RGB = color
+
+        for start, length, rgb in merge_runs(runs, color):
+            text_range.Characters(start, length).Font.Color.RGB = rgb
+
+        if alignment is not None:
+            text_range.ParagraphFormat.Alignment = alignment
+
+    def add_rectangle(self, slide, left, top, width, height, rgb):
+        shape = slide.Shapes.AddShape(
+            msoShapeRectangle,
+            Left=left,
+            Top=top,
+            Width=width,
+            Height=height,
+        )
+        shape.Fill.ForeColor.RGB = rgb
+        return shape
+
+    def add_picture(self, slide, path, left, top, width, height):
+        return slide.Shapes.AddPicture(
+            os.path.abspath(path),
+            LinkToFile=False,
+            SaveWithDocument=True,
+            Left=left,
+            Top=top,
+            Width=width,
+            Height=height,
+        )
+
+    def add_effect(self, slide, shape, effect, trigger, duration, by_y=0, delay=0):
+        if effect == EFFECT_MOTION:
+            animation = slide.TimeLine.MainSequence.AddEffect(
+                shape,
+                effectId=msoAnimEffectPathUp,
+                trigger=trigger,
+            )
+            behavior = animation.Behaviors.Add(msoAnimTypeMotion)
+            behavior.MotionEffect.ByX = 0
+            behavior.MotionEffect.ByY = by_y
+        else:
+            animation = slide.TimeLine.MainSequence.AddEffect(
+                shape,
+                effectId=msoAnimTypeNone,
+                trigger=trigger,
+            )
+            behavior = animation.Behaviors.Add(msoAnimTypeProperty)
+            behavior.PropertyEffect.Property = msoAnimOpacity if effect == EFFECT_OPACITY else msoAnimVisibility
+
+        animation.Timing.Duration = duration
+        if delay:
+            animation.Timing.TriggerDelayTime = delay
+
+        self.effect_count += 1
+        if effect == EFFECT_MOTION:
+            self.keyframe_count += 1
+        return animation
+
+    def add_step_motion(self, slide, shape, trigger, steps, delay=0):
+        # 用 y 坐标的关键帧动画实现：关键帧时间为效果时长的比例，值为相对原位置的公式
+        duration = max(steps[-1][0], STEP_EPSILON)
+        animation = slide.TimeLine.MainSequence.AddEffect(
+            shape,
+            effectId=msoAnimEffectCustom,
+            trigger=trigger,
+        )
+        animation.Timing.Duration = duration
+        if delay:
+            animation.Timing.TriggerDelayTime = delay
+
+        behavior = animation.Behaviors.Add(msoAnimTypeProperty)
+        behavior.PropertyEffect.Property = msoAnimY
+        points = behavior.PropertyEffect.Points
+        prev_value = '#ppt_y'
+        for sec, by_y in steps:
+            time = sec / duration
+            if time > 0:
+                # COM 不能设置离散插值，在跳跃前一刻保持上一个位置
+                point = points.Add()
+                point.Time = max(0, time - STEP_EPSILON / duration)
+                point.Value = prev_value
+
+            prev_value = f'#ppt_y{by_y / 100:+.6f}'
+            point = points.Add()
+            point.Time = time
+            point.Value = prev_value
+
+        self.effect_count += 1
+        self.keyframe_count += len(steps)
+        return animation
@@ -0,0 +1,583 @@
+import copy
+import io
+
+from pptx import Presentation
+from pptx.dml.color import RGBColor
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.enum.text import MSO_AUTO_SIZE, PP_ALIGN
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
+from pptx.shapes.shapetree import SlideShapes
+from pptx.util import Emu
+
+from renderer import (
+    Renderer,
+    EFFECT_MOTION,
+    EFFECT_STEP_MOTION,
+    EFFECT_VISIBILITY,
+    TRIGGER_ON_CLICK,
+    TRIGGER_WITH_PREVIOUS,
+    merge_runs,
+)
+
+# 不依赖 PowerPoint，直接用 python-pptx 写 .pptx；动画的 p:timing 节点手工生成
+EMU_PER_PT = 12700
+DEFAULT_FONT_SIZE = 18
+
+
+def pt_to_emu(pt):
+    return Emu(int(round(pt * EMU_PER_PT)))
+
+
+def emu_to_pt(emu):
+    return (emu or 0) / EMU_PER_PT
+
+
+def bgr_to_rgb_color(bgr):
+    # PowerPoint 的 RGB 整数是 blue << 16 | green << 8 | red
+    return RGBColor(bgr & 0xFF, (bgr >> 8) & 0xFF, (bgr >> 16) & 0xFF)
+
+
+def rgb_color_to_bgr(color):
+    return color[2] << 16 | color[1] << 8 | color[0]
+
+
+def set_east_asian_font(font, name):
+    # python-pptx 只能设置拉丁字体(a:latin)，中文字体(a:ea)要直接改 XML，且 a:ea 要紧跟在 a:latin 后面
+    rPr = font._rPr
+    ea = rPr.find(qn('a:ea'))
+    if ea is None:
+        ea = parse_xml(f'<a:ea {nsdecls("a")}/>')
+        rPr.find(qn('a:latin')).addnext(ea)
+
+    ea.set('typeface', name)
+
+
+class PptxShape:
+    # 模板形状，统一成与 PowerPoint 相同的单位（磅）
+    def __init__(self, shape):
+        self.shape = shape
+
+    def _first_run_font(self):
+        if not self.shape.has_text_frame:
+            return None
+
+        for paragraph in self.shape.text_frame.paragraphs:
+            for run in paragraph.runs:
+                return run.font
+
+        return None
+
+    @property
+    def left(self):
+        return emu_to_pt(self.shape.left)
+
+    @property
+    def top(self):
+        return emu_to_pt(self.shape.top)
+
+    @property
+    def width(self):
+        return emu_to_pt(self.shape.width)
+
+    @property
+    def height(self):
+        return emu_to_pt(self.shape.height)
+
+    @property
+    def rotation(self):
+        return self.shape.rotation
+
+    @property
+    def type(self):
+        try:
+            return int(self.shape.shape_type)
+        except (NotImplementedError, TypeError):
+            return 0
+
+    @property
+    def has_text_frame(self):
+        return self.shape.has_text_frame
+
+    @property
+    def text(self):
+        return self.shape.text_frame.text
+
+    @property
+    def font_name(self):
+        font = self._first_run_font()
+        return font.name if font is not None else None
+
+    @property
+    def font_size(self):
+        font = self._first_run_font()
+        if font is None or font.size is None:
+            return DEFAULT_FONT_SIZE
+
+        return font.size.pt
+
+    @property
+    def bold(self):
+        font = self._first_run_font()
+        return font.bold if font is not None else None
+
+    @property
+    def italic(self):
+        font = self._first_run_font()
+        return font.italic if font is not None else None
+
+    @property
+    def underline(self):
+        font = self._first_run_font()
+        return font.underline if font is not None else None
+
+    @property
+    def alignment(self):
+        alignment = self.shape.text_frame.paragraphs[0].alignment
+        return int(alignment) if alignment is not None else None
+
+    @property
+    def fill_rgb(self):
+        try:
+            return rgb_color_to_bgr(self.shape.fill.fore_color.rgb)
+        except (AttributeError, TypeError):
+            # 没有纯色填充，用白色
+            return 0xFFFFFF
+
+
+class PptxTextbox:
+    # 文本框的文字、字体和颜色先记在这里，每次修改后重新生成段落和文字块
+    def __init__(self, shape):
+        self.shape = shape
+        self.text = ''
+        self.font = None
+        self.color = None
+        self.spans = []
+        self.alignment = None
+
+    @property
+    def shape_id(self):
+        return self.shape.shape_id
+
+    def char_colors(self):
+        colors = [self.color] * len(self.text)
+        for start, length, rgb in self.spans:
+            for i in range(start - 1, min(start - 1 + length, len(self.text))):
+                colors[i] = rgb
+
+        return colors
+
+    def render(self):
+        tf = self.shape.text_frame
+        # 清空原有段落，只保留第一个
+        txBody = tf._txBody
+        for p in txBody.findall(qn('a:p'))[1:]:
+            txBody.remove(p)
+
+        first = tf.paragraphs[0]
+        for child in list(first._p):
+            if child.tag != qn('a:pPr'):
+                first._p.remove(child)
+
+        colors = self.char_colors()
+        pos = 0
+        for i, line in enumerate(self.text.split('\n')):
+            paragraph = first if i == 0 else tf.add_paragraph()
+            if self.alignment is not None:
+                paragraph.alignment = PP_ALIGN(self.alignment)
+
+            for j, segment in enumerate(line.split('\v')):
+                if j > 0:
+                    paragraph.add_line_break()
+                    pos += 1
+
+                # 相邻同色的字合成一个文字块
+                start = 0
+                while start < len(segment):
+                    end = start + 1
+                    while end < len(segment) and colors[pos + end] == colors[pos + start]:
+                        end += 1
+
+                    run = paragraph.add_run()
+                    run.text = segment[start:end]
+                    self.apply_font(run.font, colors[pos + start])
+                    start = end
+
+                pos += len(segment)
+
+            # 换段的 '\n'
+            pos += 1
+
+    def apply_font(self, font, color):
+        if self.font is not None:
+            name, size, bold, italic, underline = self.font
+            if name:
+                font.name = name
+                set_east_asian_font(font, name)
+
+            font.size = pt_to_emu(size)
+            font.bold = bold
+            font.italic = italic
+            font.underline = underline
+
+        if color is not None:
+            font.color.rgb = bgr_to_rgb_color(color)
+
+
+def effect_xml(e, node_type, next_id):
+    # 单个动画效果的 p:par 节点
+    spid = f'<p:tgtEl><p:spTgt spid="{e["shape_id"]}"/></p:tgtEl>'
+    dur = max(1, int(round(e['duration'] * 1000)))
+    ctn_id = next_id()
+    if e['effect'] == EFFECT_STEP_MOTION:
+        # y 坐标的离散关键帧动画：到达每个时间点直接跳到对应位置
+        preset = 'presetID="0" presetClass="path" presetSubtype="0"'
+        tavs = ''.join(
+            f'<p:tav tm="{int(round(sec * 1000 / dur * 100000)) if dur > 1 else 0}">'
+            f'<p:val><p:strVal val="#ppt_y{by_y / 100:+.6f}"/></p:val></p:tav>'
+            for sec, by_y in e['steps']
+        )
+        behavior = (
+            f'<p:anim calcmode="discrete" valueType="num">'
+            f'<p:cBhvr additive="base"><p:cTn id="{next_id()}" dur="{dur}" fill="hold"/>{spid}'
+            f'<p:attrNameLst><p:attrName>ppt_y</p:attrName></p:attrNameLst></p:cBhvr>'
+            f'<p:tavLst>{tavs}</p:tavLst></p:anim>'
+        )
+    elif e['effect'] == EFFECT_MOTION:
+        dy = e['by_y'] / 100
+        preset = 'presetID="0" presetClass="path" presetSubtype="0"'
+        behavior = (
+            f'<p:animMotion origin="layout" path="M 0 0 L 0 {dy:.6f} E" pathEditMode="relative" ptsTypes="AA">'
+            f'<p:cBhvr><p:cTn id="{next_id()}" dur="{dur}" fill="hold"/>{spid}'
+            f'<p:attrNameLst><p:attrName>ppt_x</p:attrName><p:attrName>ppt_y</p:attrName></p:attrNameLst></p:cBhvr>'
+            f'<p:rCtr x="0" y="{int(dy * 50000)}"/></p:animMotion>'
+        )
+    elif e['effect'] == EFFECT_VISIBILITY:
+        # 消失（Disappear）
+        preset = 'presetID="1" presetClass="exit" presetSubtype="0"'
+        behavior = (
+            f'<p:set><p:cBhvr><p:cTn id="{next_id()}" dur="1" fill="hold">'
+            f'<p:stCondLst><p:cond delay="{dur - 1}"/></p:stCondLst></p:cTn>{spid}'
+            f'<p:attrNameLst><p:attrName>style.visibility</p:attrName></p:attrNameLst></p:cBhvr>'
+            f'<p:to><p:strVal val="hidden"/></p:to></p:set>'
+        )
+    else:
+        # 保持不透明，只用来占用时长
+        preset = 'presetClass="emph"'
+        behavior = (
+            f'<p:set><p:cBhvr><p:cTn id="{next_id()}" dur="{dur}" fill="hold"/>{spid}'
+            f'<p:attrNameLst><p:attrName>style.opacity</p:attrName></p:attrNameLst></p:cBhvr>'
+            f'<p:to><p:strVal val="1"/></p:to></p:set>'
+        )
+
+    return (
+        f'<p:par><p:cTn id="{ctn_id}" {preset} fill="hold" grpId="0" nodeType="{node_type}">'
+        f'<p:stCondLst><p:cond delay="{int(round(e.get("delay", 0) * 1000))}"/></p:stCondLst>'
+        f'<p:childTnLst>{behavior}</p:childTnLst></p:cTn></p:par>'
+    )
+
+
+def timing_xml(effects):
+    # 把按顺序添加的效果分成：点击组 -> 依次播放的步骤 -> 同时播放的效果
+    groups = []
+    for e in effects:
+        if e['trigger'] == TRIGGER_ON_CLICK or len(groups) == 0:
+            groups.append({'auto': e['trigger'] != TRIGGER_ON_CLICK, 'steps': [[e]]})
+        elif e['trigger'] == TRIGGER_WITH_PREVIOUS:
+            groups[-1]['steps'][-1].append(e)
+        else:
+            groups[-1]['steps'].append([e])
+
+    ids = iter(range(3, 1 << 31))
+
+    def next_id():
+        return next(ids)
+
+    group_xmls = []
+    for group in groups:
+        group_id = next_id()
+        step_xmls = []
+        delay = 0
+        for i, step in enumerate(group['steps']):
+            step_id = next_id()
+            effect_xmls = []
+            for j, e in enumerate(step):
+                if j > 0:
+                    node_type = 'withEffect'
+                elif i == 0 and not group['auto']:
+                    node_type = 'clickEffect'
+                else:
+                    node_type = 'afterEffect'
+
+                effect_xmls.append(effect_xml(e, node_type, next_id))
+
+            step_xmls.append(
+                f'<p:par><p:cTn id="{step_id}" fill="hold"><p:stCondLst><p:cond delay="{delay}"/></p:stCondLst>'
+                f'<p:childTnLst>{"".join(effect_xmls)}</p:childTnLst></p:cTn></p:par>'
+            )
+            delay += max(int(round((e.get('delay', 0) + e['duration']) * 1000)) for e in step)
+
+        auto = '<p:cond evt="onBegin" delay="0"><p:tn val="2"/></p:cond>' if group['auto'] else ''
+        group_xmls.append(
+            f'<p:par><p:cTn id="{group_id}" fill="hold"><p:stCondLst><p:cond delay="indefinite"/>{auto}</p:stCondLst>'
+            f'<p:childTnLst>{"".join(step_xmls)}</p:childTnLst></p:cTn></p:par>'
+        )
+
+    shape_ids = list(dict.fromkeys(e['shape_id'] for e in effects))
+    builds = ''.join(f'<p:bldP spid="{shape_id}" grpId="0" animBg="1"/>' for shape_id in shape_ids)
+    return (
+        f'<p:timing {nsdecls("p", "a")}><p:tnLst><p:par>'
+        f'<p:cTn id="1" dur="indefinite" restart="never" nodeType="tmRoot"><p:childTnLst>'
+        f'<p:seq concurrent="1" nextAc="seek"><p:cTn id="2" dur="indefinite" nodeType="mainSeq">'
+        f'<p:childTnLst>{"".join(group_xmls)}</p:childTnLst></p:cTn>'
+        f'<p:prevCondLst><p:cond evt="onPrev" delay="0"><p:tgtEl><p:sldTgt/></p:tgtEl></p:cond></p:prevCondLst>'
+        f'<p:nextCondLst><p:cond evt="onNext" delay="0"><p:tgtEl><p:sldTgt/></p:tgtEl></p:cond></p:nextCondLst>'
+        f'</p:seq></p:childTnLst></p:cTn></p:par></p:tnLst><p:bldLst>{builds}</p:bldLst></p:timing>'
+    )
+
+
+def write_timing(slide, effects):
+    sld = slide._element
+    for timing in sld.findall(qn('p:timing')):
+        sld.remove(timing)
+
+    timing = parse_xml(timing_xml(effects))
+    ext_lst = sld.find(qn('p:extLst'))
+    if ext_lst is not None:
+        ext_lst.addprevious(timing)
+    else:
+        sld.append(timing)
+
+
+def copy_slide(source, slide):
+    # 用源幻灯片的内容（背景、形状树）和动画替换 slide 的内容；生成的幻灯片只引用图片，图片按内容复用
+    rids = {}
+    for rid, rel in source.part.rels.items():
+        if rel.reltype == RT.IMAGE:
+            _, rids[rid] = slide.part.get_or_add_image_part(io.BytesIO(rel.target_part.blob))
+
+    sld = slide._element
+    for tag in ('p:cSld', 'p:timing'):
+        for el in sld.findall(qn(tag)):
+            sld.remove(el)
+
+    c_sld = copy.deepcopy(source._element.find(qn('p:cSld')))
+    sld.insert(0, c_sld)
+    timing = source._element.find(qn('p:timing'))
+    if timing is not None:
+        timing = copy.deepcopy(timing)
+        ext_lst = sld.find(qn('p:extLst'))
+        if ext_lst is not None:
+            ext_lst.addprevious(timing)
+        else:
+            sld.append(timing)
+
+    # 图片的 r:embed 改为新幻灯片中的关系 id
+    r_embed = qn('r:embed')
+    for el in c_sld.iter():
+        rid = el.get(r_embed)
+        if rid in rids:
+            el.set(r_embed, rids[rid])
+
+
+def slide_shapes(slide):
+    # copy_slide 替换了形状树，slide.shapes 缓存的还是原来的，要按当前的形状树重新取
+    return SlideShapes(slide._element.cSld.spTree, slide)
+
+
+class PptxRenderer(Renderer):
+    def __init__(self):
+        # 各幻灯片的动画效果，保存时统一写入 p:timing
+        self.effects = {}
+        # insert_slides 打开过的文件
+        self.sources = {}
+
+    def open(self, path):
+        return Presentation(path)
+
+    def copy(self, deck, path):
+        deck.save(path)
+        return self.open(path)
+
+    def save(self, deck, path):
+        # 删除示例的幻灯片（2张）
+        sld_id_lst = deck.slides._sldIdLst
+        for sld_id in list(sld_id_lst)[:2]:
+            deck.part.drop_rel(sld_id.rId)
+            sld_id_lst.remove(sld_id)
+
+        for slide in deck.slides:
+            effects = self.effects.pop(slide.part, None)
+            if effects:
+                write_timing(slide, effects)
+
+        deck.save(path)
+
+    def get_layout(self, deck):
+        index = self.layout_index(deck)
+        return self.layout_at(deck, index) if index is not None else None
+
+    def layout_index(self, deck):
+        used_layouts = {slide.slide_layout.part for slide in deck.slides}
+        last_index = None
+        for i, master in enumerate(deck.slide_masters, 1):
+            for j, layout in enumerate(master.slide_layouts, 1):
+                if layout.part in used_layouts:
+                    last_index = (i, j)
+
+        return last_index
+
+    def layout_at(self, deck, index):
+        master, layout = index
+        return deck.slide_masters[master - 1].slide_layouts[layout - 1]
+
+    def template_slides(self, deck):
+        return deck.slides[0], deck.slides[1]
+
+    def shapes(self, slide):
+        return [PptxShape(shape) for shape in slide.shapes]
+
+    def text_shapes(self, slide):
+        return [shape for shape in slide.shapes if shape.has_text_frame]
+
+    def slide_width(self, deck):
+        return emu_to_pt(deck.slide_width)
+
+    def slide_height(self, deck):
+        return emu_to_pt(deck.slide_height)
+
+    def set_slide_height(self, deck, height):
+        deck.slide_height = pt_to_emu(height)
+
+    def add_slide(self, deck, layout):
+        return deck.slides.add_slide(layout)
+
+    def slide_count(self, deck):
+        return len(deck.slides)
+
+    def clone_slide(self, deck, index):
+        source = deck.slides[index - 1]
+        slide = deck.slides.add_slide(source.slide_layout)
+        copy_slide(source, slide)
+        return slide
+
+    def replace_text(self, slide, index, replacements, rgb=None):
+        paragraphs = slide_shapes(slide)[index - 1].text_frame.paragraphs
+        for old, new in replacements:
+            for paragraph in paragraphs:
+                runs = paragraph.runs
+                run = next((run for run in runs if old in run.text), None)
+                if run is not None:
+                    run.text = run.text.replace(old, new, 1)
+                    break
+
+                text = ''.join(run.text for run in runs)
+                if old in text:
+                    # 占位符跨了几个文字块，整段合到第一个文字块中，用它的格式
+                    runs[0].text = text.replace(old, new, 1)
+                    for run in runs[1:]:
+                        run.text = ''
+                    break
+
+        if rgb is not None:
+            for paragraph in paragraphs:
+                for run in paragraph.runs:
+                    run.font.color.rgb = bgr_to_rgb_color(rgb)
+
+    def replace_picture(self, slide, index, path, left, top, width, height):
+        # 只换图片数据的引用，形状的位置、大小、裁剪和层次都不变
+        picture = slide_shapes(slide)[index - 1]
+        blip = picture._element.blipFill.blip
+        old_rid = blip.rEmbed
+        _, blip.rEmbed = slide.part.get_or_add_image_part(path)
+        if old_rid != blip.rEmbed:
+            # 原图没有别的形状引用时去掉关系，不留在文件中
+            slide.part.drop_rel(old_rid)
+        return picture
+
+    def insert_slides(self, deck, path, first, last):
+        if path not in self.sources:
+            self.sources[path] = Presentation(path)
+
+        layout = self.get_layout(deck)
+        for source in list(self.sources[path].slides)[first - 1:last]:
+            copy_slide(source, deck.slides.add_slide(layout))
+
+    def add_textbox(self, slide, left, top, width, height):
+        shape = slide.shapes.add_textbox(pt_to_emu(left), pt_to_emu(top), pt_to_emu(width), pt_to_emu(height))
+        # 与 PowerPoint 新建文本框的默认设置一致：自动换行，根据文字调整形状大小
+        shape.text_frame.word_wrap = True
+        shape.text_frame.auto_size = MSO_AUTO_SIZE.SHAPE_TO_FIT_TEXT
+        return PptxTextbox(shape)
+
+    def set_rotation(self, shape, rotation):
+        shape.shape.rotation = rotation
+
+    def set_font(self, textbox, name, size, bold, italic, underline):
+        textbox.font = (name, size, bold, italic, underline)
+        textbox.render()
+
+    def set_text(self, textbox, text):
+        # 与 PowerPoint 一致：替换文字后，部分文字的颜色失效
+        textbox.text = text
+        textbox.spans = []
+        textbox.render()
+
+    def set_color(self, textbox, rgb):
+        textbox.color = rgb
+        textbox.spans = []
+        textbox.render()
+
+    def set_char_color(self, textbox, start, length, rgb):
+        textbox.spans.append((start, length, rgb))
+        textbox.render()
+
+    def set_alignment(self, textbox, alignment):
+        textbox.alignment = alignment
+        textbox.render()
+
+    def set_styled_text(self, textbox, text, font, color=None, runs=(), alignment=None):
+        # 全部设好后只生成一次段落和文字块
+        textbox.text = text
+        textbox.font = font
+        textbox.color = color
+        textbox.spans = merge_runs(runs, color)
+        if alignment is not None:
+            textbox.alignment = alignment
+
+        textbox.render()
+
+    def add_rectangle(self, slide, left, top, width, height, rgb):
+        shape = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, pt_to_emu(left), pt_to_emu(top), pt_to_emu(width), pt_to_emu(height))
+        shape.fill.solid()
+        shape.fill.fore_color.rgb = bgr_to_rgb_color(rgb)
+        return shape
+
+    def add_picture(self, slide, path, left, top, width, height):
+        return slide.shapes.add_picture(path, pt_to_emu(left), pt_to_emu(top), pt_to_emu(width), pt_to_emu(height))
+
+    def add_effect(self, slide, shape, effect, trigger, duration, by_y=0, delay=0):
+        self.effects.setdefault(slide.part, []).append({
+            'shape_id': shape.shape_id,
+            'effect': effect,
+            'trigger': trigger,
+            'duration': duration,
+            'by_y': by_y,
+            'delay': delay,
+        })
+        self.effect_count += 1
+        if effect == EFFECT_MOTION:
+            self.keyframe_count += 1
+
+    def add_step_motion(self, slide, shape, trigger, steps, delay=0):
+        self.effects.setdefault(slide.part, []).append({
+            'shape_id': shape.shape_id,
+            'effect': EFFECT_STEP_MOTION,
+            'trigger': trigger,
+            'duration': steps[-1][0],
+            'steps': steps,
+            'delay': delay,
+        })
+        self.effect_count += 1
+        self.keyframe_count += len(steps)
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from time import time
+
+# 接口响应的本地缓存：以 接口地址+参数 的哈希为键，把响应原文存进 SQLite
+# 支持过期时间（TTL）、按总大小做 LRU 淘汰，以及只读缓存的离线模式
+# 接口的错误或空响应（如网易云 code 不是 200）只保留 error_ttl，过后重新请求
+DEFAULT_TTL = 30 * 24 * 3600
+DEFAULT_ERROR_TTL = 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class CacheMiss(Exception):
+    pass
+
+
+def cache_key(url, params=None):
+    # 参数排序后再哈希，保证同一请求无论参数顺序如何都得到同一个键
+    items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+    raw = json.dumps([url, items], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, offline=False, error_ttl=DEFAULT_ERROR_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, url TEXT, body BLOB, size INTEGER, created REAL, accessed REAL, ttl REAL)'
+        )
+        # 以前的缓存文件没有 ttl 列（为 NULL 时用 self.ttl）
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(responses)')]
+        if 'ttl' not in columns:
+            self._conn.execute('ALTER TABLE responses ADD COLUMN ttl REAL')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+        self._conn.commit()
+        self._total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute('SELECT body, created, ttl FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+
+            body, created, ttl = row
+            if ttl is None:
+                ttl = self.ttl
+
+            # 离线模式下过期的缓存也照用
+            if not self.offline and ttl is not None and time() - created > ttl:
+                return None
+
+            self._conn.execute('UPDATE responses SET accessed = ? WHERE key = ?', (time(), key))
+            self._conn.commit()
+            return body
+
+    def put(self, key, url, body, ttl=None):
+        # ttl 为 None 时用 self.ttl
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            if old is not None:
+                self._total -= old[0]
+
+            now = time()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, url, body, size, created, accessed, ttl) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, url, body, len(body), now, now, ttl),
+            )
+            self._total += len(body)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # 超出总大小时，按最近访问时间从旧到新删除
+        while self.max_bytes is not None and self._total > self.max_bytes:
+            row = self._conn.execute('SELECT key, size FROM responses ORDER BY accessed LIMIT 1').fetchone()
+            if row is None:
+                break
+
+            self._conn.execute('DELETE FROM responses WHERE key = ?', (row[0],))
+            self._total -= row[1]
+
+    def fetch(self, url, params, download, is_error=None):
+        # download 为真正发请求的函数，返回响应原文 bytes；is_error(原文) 为真时是错误响应，只保留 error_ttl
+        key = cache_key(url, params)
+        body = self.get(key)
+        if body is not None:
+            self.hits += 1
+            return body
+
+        if self.offline:
+            raise CacheMiss(f'离线模式下缓存中没有：{url} {params or ""}')
+
+        self.misses += 1
+        body = download()
+        self.put(key, url, body, self.error_ttl if is_error is not None and is_error(body) else None)
+        return body
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,252 @@
+import csv
+import json
+import os
+
+# 歌单读取：Excel 用 openpyxl 只读模式按行流式读取，一次读出单元格的值和填充色；也可以用 CSV、JSON 歌单（颜色写成十六进制）
+# 每行返回一个类型确定的记录：文本为 str（空为 ''），歌手数量为 int，指定的歌曲 ID 为 str（空为 ''），
+# 各 '颜色' 列在 record['colors'] 中，为 PowerPoint 的 RGB 整数（blue << 16 | green << 8 | red）
+SETTING_SHEET = '全局设置'
+LIST_SHEET = '各歌设置'
+SETTING_COLUMNS = ['只生成歌曲封面？', '生成动态歌词？', '是否繁体歌词？', '页眉高度（厘米）', '最大字体（Pt）', '歌词行间距离（Pt）']
+TEXT_COLUMNS = ['歌曲', '歌手', '要修改的歌词', '修改后歌词']
+ID_COLUMNS = ['指定酷我音乐歌曲ID', '指定网易云歌曲ID']
+# 其他列可以没有，按空值处理
+REQUIRED_COLUMNS = ['歌曲', '歌手']
+COLOR_SUFFIX = '颜色'
+# 生成时要用到的颜色列，各歌手的颜色列按歌手数量另加；没有这些列或单元格为空时按黑色（0）处理，与 Excel 中没有填充的单元格相同
+COLOR_COLUMNS = ['封面字体颜色', '合唱歌词颜色']
+# 表头占第一行，歌曲的行号从 2 开始，与 Excel 一致
+FIRST_ROW = 2
+
+
+def is_empty(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def to_text(value):
+    if is_empty(value):
+        return ''
+
+    # Excel 中纯数字的歌名（如 1989）读出来是数字
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+
+    return str(value)
+
+
+def to_number(value):
+    # 整数保持为 int，与以前用 pandas 读出的类型一致
+    if isinstance(value, str):
+        value = float(value.strip())
+
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+
+    return value
+
+
+def to_id(value):
+    if is_empty(value):
+        return ''
+
+    return str(int(float(value)))
+
+
+def hex_to_color(value):
+    # '#RRGGBB'、'RRGGBB' 或 openpyxl 的 'AARRGGBB'
+    value = value.strip().lstrip('#')
+    if len(value) == 8:
+        value = value[2:]
+
+    if len(value) != 6:
+        raise ValueError(f'颜色格式不对：{value}')
+
+    red, green, blue = int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16)
+    return blue << 16 | green << 8 | red
+
+
+def cell_to_color(cell):
+    # 单元格填充的前景色；主题色等非 RGB 填充（rgb 不是字符串）无法转换
+    # 只读模式下没有样式的单元格没有 fill，与默认填充（'00000000'）一样按黑色处理
+    if getattr(cell, 'fill', None) is None:
+        return 0
+
+    return hex_to_color(cell.fill.fgColor.rgb)
+
+
+def singer_color_column(i):
+    # 第 i 个歌手（从 0 开始）的歌词颜色列
+    return f'歌手{i + 1}歌词{COLOR_SUFFIX}'
+
+
+def song_record(values, colors, row, color_errors=None):
+    # values 为 {列名: 值}，colors 为 {颜色列名: 颜色}，row 为行号
+    # color_errors 为 {颜色列名: 错误信息}，是无法转换的单元格，只在要用到这一列时报错
+    record = {'row': row, 'colors': colors}
+    for column in TEXT_COLUMNS:
+        record[column] = to_text(values.get(column))
+
+    for column in ID_COLUMNS:
+        record[column] = to_id(values.get(column))
+
+    # 没填歌手数量按一个歌手
+    singer_cnt = values.get('歌手数量')
+    record['歌手数量'] = 1 if is_empty(singer_cnt) else int(to_number(singer_cnt))
+    for column in COLOR_COLUMNS + [singer_color_column(i) for i in range(record['歌手数量'])]:
+        if color_errors and column in color_errors:
+            raise ValueError(color_errors[column])
+
+        colors.setdefault(column, 0)
+
+    return record
+
+
+def check_columns(path, header, columns):
+    missing = [column for column in columns if column not in header]
+    if missing:
+        raise ValueError(f'{path} 缺少列：{"、".join(missing)}')
+
+
+def read_settings(values, path):
+    check_columns(path, values, SETTING_COLUMNS)
+    settings = {column: values[column] for column in SETTING_COLUMNS}
+    for column in ['页眉高度（厘米）', '最大字体（Pt）', '歌词行间距离（Pt）']:
+        settings[column] = to_number(settings[column])
+
+    return settings
+
+
+def open_setlist(path, settings_path=None):
+    # 返回 (全局设置, 歌曲记录的生成器)，生成器产生 (行号 - 2, 记录)，可直接交给 prefetch_songs
+    # settings_path 为另外的全局设置文件（Excel 或 JSON），CSV 歌单没有全局设置，必须指定
+    ext = os.path.splitext(path)[1].lower()
+    settings = load_settings(settings_path) if settings_path else None
+    if ext == '.csv':
+        if settings is None:
+            raise ValueError('CSV 歌单需要用 --settings 指定全局设置文件')
+        return settings, iter_csv(path)
+
+    if ext == '.json':
+        data = load_json(path)
+        if settings is None:
+            settings = read_settings(data.get(SETTING_SHEET) or {}, path)
+
+        return settings, iter_json(data, path)
+
+    workbook = open_workbook(path)
+    try:
+        if settings is None:
+            settings = read_settings(read_sheet_settings(workbook[SETTING_SHEET]), path)
+    except Exception:
+        workbook.close()
+        raise
+
+    return settings, iter_workbook(workbook, path)
+
+
+def iter_setlist(path):
+    # 只读各歌设置，不需要全局设置（如导出游戏资源），CSV 歌单也不用指定设置文件
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return iter_csv(path)
+
+    if ext == '.json':
+        return iter_json(load_json(path), path)
+
+    return iter_workbook(open_workbook(path), path)
+
+
+def load_settings(path):
+    if os.path.splitext(path)[1].lower() == '.json':
+        return read_settings(load_json(path).get(SETTING_SHEET) or {}, path)
+
+    workbook = open_workbook(path)
+    try:
+        return read_settings(read_sheet_settings(workbook[SETTING_SHEET]), path)
+    finally:
+        workbook.close()
+
+
+def open_workbook(path):
+    # 用到 Excel 时才导入，CSV、JSON 歌单不需要安装 openpyxl
+    import openpyxl
+
+    # 只读模式按需解析，不把整个工作簿读进内存；填充色仍然可以读到
+    return openpyxl.load_workbook(path, read_only=True)
+
+
+def read_sheet_settings(worksheet):
+    # 全局设置只用表头下的第一行
+    rows = worksheet.iter_rows(min_row=1, max_row=2, values_only=True)
+    header = next(rows, ())
+    values = next(rows, ())
+    return {name: value for name, value in zip(header, values) if name is not None}
+
+
+def iter_workbook(workbook, path):
+    try:
+        rows = workbook[LIST_SHEET].iter_rows()
+        header = [cell.value for cell in next(rows, ())]
+        check_columns(path, header, REQUIRED_COLUMNS)
+        color_columns = [(i, name) for i, name in enumerate(header) if isinstance(name, str) and name.endswith(COLOR_SUFFIX)]
+        for row_number, cells in enumerate(rows, FIRST_ROW):
+            values = {name: cells[i].value for i, name in enumerate(header) if name is not None and i < len(cells)}
+            if all(is_empty(value) for value in values.values()):
+                continue
+
+            colors = {}
+            color_errors = {}
+            for i, name in color_columns:
+                try:
+                    colors[name] = cell_to_color(cells[i]) if i < len(cells) else 0
+                except (AttributeError, TypeError, ValueError):
+                    # 主题色等非 RGB 填充无法转换，要用到这一列时再报错
+                    color_errors[name] = f'{path} 第{row_number}行 {name}：无法读取填充色（主题色等），请改用 RGB 颜色填充'
+
+            yield row_number - FIRST_ROW, song_record(values, colors, row_number, color_errors)
+    finally:
+        workbook.close()
+
+
+def parse_colors(values, path, row_number):
+    colors = {}
+    for name, value in values.items():
+        if not name.endswith(COLOR_SUFFIX):
+            continue
+
+        if is_empty(value):
+            # 与 Excel 中没有填充的单元格一样按黑色处理
+            colors[name] = 0
+        else:
+            try:
+                colors[name] = hex_to_color(str(value))
+            except ValueError as e:
+                raise ValueError(f'{path} 第{row_number}行 {name}：{e}') from None
+
+    return colors
+
+
+def iter_csv(path):
+    # utf-8-sig：兼容 Excel 另存的带 BOM 的 CSV
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        check_columns(path, reader.fieldnames or [], REQUIRED_COLUMNS)
+        for row_number, values in enumerate(reader, FIRST_ROW):
+            if all(is_empty(value) for value in values.values()):
+                continue
+
+            yield row_number - FIRST_ROW, song_record(values, parse_colors(values, path, row_number), row_number)
+
+
+def load_json(path):
+    # {"全局设置": {列名: 值}, "各歌设置": [{列名: 值}, ...]}，也可以只是歌曲的列表
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    return {LIST_SHEET: data} if isinstance(data, list) else data
+
+
+def iter_json(data, path):
+    for row_number, values in enumerate(data.get(LIST_SHEET) or [], FIRST_ROW):
+        check_columns(f'{path} 第{row_number}行', values, REQUIRED_COLUMNS)
+        yield row_number - FIRST_ROW, song_record(values, parse_colors(values, path, row_number), row_number)
@@ -0,0 +1,108 @@
+import json
+import os
+import re
+import threading
+from time import time
+
+from zh_convert import to_simplified
+
+# 歌曲 ID 目录：把 歌名+歌手 映射到上次选中的酷我、网易云歌曲 ID，已知的歌不用再调用搜索接口
+# 键为简体、统一括号、大写后的 歌名|歌手，文件为 JSON，可导出给别人导入
+CATALOG_VERSION = 1
+# 目录中每首歌保存的字段
+CATALOG_FIELDS = ['kuwo_id', 'kuwo_albumpic', 'netease_id']
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_name(name):
+    name = to_simplified.convert(str(name))
+    name = name.replace('（', '(').replace('）', ')').replace('【', '[').replace('】', ']')
+    return WHITESPACE_RE.sub(' ', name).strip().upper()
+
+
+def catalog_key(song_name, artist_name):
+    return f'{normalize_name(song_name)}|{normalize_name(artist_name)}'
+
+
+class SongCatalog:
+    def __init__(self, path=None):
+        self.path = path
+        self.songs = {}
+        self.hits = 0
+        self.misses = 0
+        self.changed = False
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.songs = self._read(path)
+
+    @staticmethod
+    def _read(path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+
+        if data.get('version') != CATALOG_VERSION:
+            raise ValueError(f'不支持的歌曲目录版本：{path} {data.get("version")}')
+
+        return data['songs']
+
+    def _write(self, path):
+        with self._lock:
+            data = {'version': CATALOG_VERSION, 'songs': dict(sorted(self.songs.items()))}
+
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # 先写临时文件再替换，中途出错不会损坏原目录
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+        os.replace(tmp_path, path)
+
+    def get(self, song_name, artist_name):
+        # 返回 {kuwo_id, kuwo_albumpic, netease_id}（字段可能缺失），没有记录时返回 None
+        with self._lock:
+            entry = self.songs.get(catalog_key(song_name, artist_name))
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return dict(entry)
+
+    def update(self, song_name, artist_name, **ids):
+        # 只记录有值的字段，保留其他字段原来的值
+        ids = {k: str(v) for k, v in ids.items() if k in CATALOG_FIELDS and v}
+        if not ids:
+            return
+
+        key = catalog_key(song_name, artist_name)
+        with self._lock:
+            entry = self.songs.setdefault(key, {'song_name': song_name, 'artist_name': artist_name})
+            if all(entry.get(k) == v for k, v in ids.items()):
+                return
+
+            entry.update(ids)
+            entry['updated'] = int(time())
+            self.changed = True
+
+    def save(self):
+        if self.path and self.changed:
+            self._write(self.path)
+            self.changed = False
+
+    def export(self, path):
+        self._write(path)
+
+    def import_file(self, path):
+        # 合并另一个目录文件，同一首歌以导入的为准，返回导入的歌曲数
+        songs = self._read(path)
+        with self._lock:
+            for key, entry in songs.items():
+                self.songs.setdefault(key, {}).update(entry)
+
+            if songs:
+                self.changed = True
+
+        return len(songs)
@@ -0,0 +1,192 @@
+import cProfile
+import json
+import os
+import threading
+from contextlib import contextmanager
+from time import perf_counter_ns, time_ns
+
+# 分阶段计时：每首歌的每个阶段（搜索、下载、解析、渲染、保存……）记为一个 span，带歌曲、耗时和计数（字节数、动画效果数等）
+# 结果写成 JSON lines 日志和 Chrome trace_event 文件（chrome://tracing 或 https://ui.perfetto.dev 打开）
+# 没有调用 configure 时所有函数都不做事，开销可以忽略
+_lock = threading.Lock()
+_local = threading.local()
+_events = []
+_counters = {}
+_config = {
+    'enabled': False,
+    'log_path': None,
+    'chrome_path': None,
+    'profile_row': None,
+    'profile_dir': '.',
+}
+# perf_counter 没有绝对起点，换算成从 1970 年起的时间，多进程的事件才能对齐
+_offset_ns = time_ns() - perf_counter_ns()
+
+
+def configure(log_path=None, chrome_path=None, profile_row=None, profile_dir='.'):
+    # profile_row 为 Excel 行号，这一行取数据和渲染时用 cProfile 采样，结果存到 profile_dir
+    _config.update({
+        'enabled': bool(log_path or chrome_path or profile_row),
+        'log_path': log_path,
+        'chrome_path': chrome_path,
+        'profile_row': profile_row,
+        'profile_dir': profile_dir,
+    })
+
+
+def get_config():
+    return dict(_config)
+
+
+def enabled():
+    return _config['enabled']
+
+
+def add_counter(name, func):
+    # 注册一个计数器（如动画效果数、COM 调用数），用 counters=True 的 span 会记录它在 span 期间的增量
+    _counters[name] = func
+
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+
+    return _local.stack
+
+
+@contextmanager
+def span(name, counters=False, **args):
+    # 返回的 dict 可以直接写入计数，也可以在 span 内任意位置调用 count()
+    if not _config['enabled']:
+        yield {}
+        return
+
+    counts = dict(args)
+    before = {k: func() for k, func in _counters.items()} if counters else {}
+    stack = _stack()
+    stack.append(counts)
+    start = perf_counter_ns()
+    try:
+        yield counts
+    finally:
+        end = perf_counter_ns()
+        stack.pop()
+        for k, value in before.items():
+            delta = _counters[k]() - value
+            if delta:
+                counts[k] = delta
+
+        event = {
+            'name': name,
+            'row': getattr(_local, 'row', None),
+            'song': getattr(_local, 'song', None),
+            'start_us': (start + _offset_ns) // 1000,
+            'dur_us': (end - start) // 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'counts': counts,
+        }
+        with _lock:
+            _events.append(event)
+
+
+def count(name, value=1):
+    # 累加到当前线程最内层的 span
+    if not _config['enabled']:
+        return
+
+    stack = _stack()
+    if stack:
+        stack[-1][name] = stack[-1].get(name, 0) + value
+
+
+@contextmanager
+def song(row, song_name, phase):
+    # 标记当前线程正在处理的歌曲（row 为 Excel 行号），整个阶段也记为一个 span；选中的行用 cProfile 采样
+    if not _config['enabled']:
+        yield
+        return
+
+    prev = getattr(_local, 'row', None), getattr(_local, 'song', None)
+    _local.row, _local.song = row, song_name
+    profiler = cProfile.Profile() if row == _config['profile_row'] else None
+    try:
+        with span(phase, counters=phase != 'resolve'):
+            if profiler is None:
+                yield
+            else:
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+                    os.makedirs(_config['profile_dir'], exist_ok=True)
+                    profiler.dump_stats(os.path.join(_config['profile_dir'], f'row{row}-{phase}.prof'))
+    finally:
+        _local.row, _local.song = prev
+
+
+def drain():
+    # 取出并清空已记录的事件（多进程渲染时，子进程把事件交回主进程）
+    with _lock:
+        events = list(_events)
+        _events.clear()
+
+    return events
+
+
+def extend(events):
+    with _lock:
+        _events.extend(events)
+
+
+def chrome_trace(events):
+    return {
+        'traceEvents': [
+            {
+                'name': e['name'],
+                'cat': 'song' if e['row'] is not None else 'run',
+                'ph': 'X',
+                'ts': e['start_us'],
+                'dur': e['dur_us'],
+                'pid': e['pid'],
+                'tid': e['tid'],
+                'args': dict(e['counts'], row=e['row'], song=e['song']),
+            }
+            for e in events
+        ],
+        'displayTimeUnit': 'ms',
+    }
+
+
+def write():
+    events = sorted(drain(), key=lambda e: e['start_us'])
+    if _config['log_path']:
+        with open(_config['log_path'], 'w', encoding='utf-8') as f:
+            for e in events:
+                f.write(json.dumps(e, ensure_ascii=False, default=str) + '\n')
+
+    if _config['chrome_path']:
+        with open(_config['chrome_path'], 'w', encoding='utf-8') as f:
+            json.dump(chrome_trace(events), f, ensure_ascii=False, default=str)
+
+    return events
+
+
+def summarize(events, top=5):
+    # 各阶段总耗时，以及耗时最长的歌曲
+    phases = {}
+    songs = {}
+    for e in events:
+        total = phases.setdefault(e['name'], [0, 0])
+        total[0] += e['dur_us']
+        total[1] += 1
+        if e['name'] in ('resolve', 'render') and e['row'] is not None:
+            songs[(e['row'], e['song'])] = songs.get((e['row'], e['song']), 0) + e['dur_us']
+
+    lines = [f'{name}：{us / 1e6:.3f}s（{n} 次）' for name, (us, n) in sorted(phases.items(), key=lambda x: -x[1][0])]
+    slowest = sorted(songs.items(), key=lambda x: -x[1])[:top]
+    if slowest:
+        lines.append('最慢的歌：' + '，'.join(f'第{row}行《{name}》{us / 1e6:.2f}s' for (row, name), us in slowest))
+
+    return '\n'.join(lines)
@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+
+import zhconv
+
+# 简繁转换：zhconv.convert 每次调用都要从头扫描字符串、查前缀表，逐个文本框、逐段歌词调用时开销随行数×段数增长
+# 这里把一首歌的所有文本用换行连起来只调用一次，再按换行拆回各段；转换过的文本放在 LRU 中，各歌之间共用
+# 转换表中的词都不含换行，按换行拼接不会改变转换结果
+SEPARATOR = '\n'
+DEFAULT_MAXSIZE = 8192
+
+
+class ZhConverter:
+    def __init__(self, locale, maxsize=DEFAULT_MAXSIZE):
+        self.locale = locale
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.calls = 0
+        self._cache = OrderedDict()
+        # 取数据的线程池中也会用到（歌手名、歌曲目录）
+        self._lock = threading.Lock()
+
+    def _get(self, text):
+        value = self._cache.get(text)
+        if value is not None:
+            self._cache.move_to_end(text)
+            self.hits += 1
+
+        return value
+
+    def _put(self, text, value):
+        self._cache[text] = value
+        self._cache.move_to_end(text)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def convert(self, text):
+        return self.convert_many([text])[0]
+
+    def convert_many(self, texts):
+        # 返回与 texts 一一对应的转换结果；没转换过的文本合并成一次 zhconv.convert 调用
+        texts = list(texts)
+        results = [None] * len(texts)
+        pending = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                value = self._get(text)
+                if value is None:
+                    pending.setdefault(text, []).append(i)
+                else:
+                    results[i] = value
+
+        if pending:
+            sources = list(pending)
+            converted = zhconv.convert(SEPARATOR.join(sources), self.locale).split(SEPARATOR)
+            with self._lock:
+                self.calls += 1
+                pos = 0
+                for text in sources:
+                    # 文本本身含有换行时占多段
+                    n = text.count(SEPARATOR) + 1
+                    value = SEPARATOR.join(converted[pos:pos + n])
+                    pos += n
+                    self.misses += 1
+                    self._put(text, value)
+                    for i in pending[text]:
+                        results[i] = value
+
+        return results
+
+
+# 繁体歌词（香港繁体）和歌手名、歌名的规范化（简体）
+to_traditional = ZhConverter('zh-hk')
+to_simplified = ZhConverter('zh-cn')